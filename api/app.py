@@ -5,6 +5,11 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from core.logging_setup import setup_logging
 from core.startup import initialize_rag_components
+from core.executors import shutdown_executors
+from core.metrics import REQUEST_DURATION
+from core.profiling import ADMIN_TOKEN, PROFILING_ENABLED, ProfilingMiddleware
+from core.rate_limit import RATE_LIMIT_ENABLED, RateLimitMiddleware
+from vectorstore.qdrant import close_async_qdrant_client
 
 setup_logging()
 logger = logging.getLogger("api")
@@ -24,6 +29,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down NMK Chatbot API...")
+    shutdown_executors()
+    await close_async_qdrant_client()
 
 app = FastAPI(
     title="NMK Chatbot API",
@@ -32,6 +39,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Gan truoc CORS (CORS nam ngoai) de response 429 van co header CORS cho frontend
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
@@ -47,14 +58,29 @@ async def track_response_time(request: Request, call_next):
     response = await call_next(request)
     duration = time.time() - start_time
     response.headers["X-Response-Time"] = f"{duration:.3f}s"
+    route = request.scope.get("route")
+    # label theo route template (khong theo URL that) de so series khong tang theo path
+    REQUEST_DURATION.observe(duration, method=request.method, path=getattr(route, "path", "unmatched"), status=str(response.status_code))
     logger.info(f"{request.method} {request.url.path} took {duration:.3f}s")
     return response
 
+# Tat profiling thi khong gan middleware / router, request khong di qua them lop nao
+# Capture lo stack / du lieu request: khong co admin_token thi khong bat
+profiling_active = PROFILING_ENABLED and ADMIN_TOKEN is not None
+if PROFILING_ENABLED and not profiling_active:
+    logger.warning("profiling.enabled is set without profiling.admin_token: profiling stays disabled")
+if profiling_active:
+    app.add_middleware(ProfilingMiddleware)
+
 from api.routes import chat_router, health_router
 
 app.include_router(health_router, tags=["health"])
 app.include_router(chat_router, prefix="/api", tags=["chat"])
 
+if profiling_active:
+    from api.profiling import router as profiling_router
+    app.include_router(profiling_router, tags=["profiling"])
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -1,12 +1,19 @@
 import logging
 import os
 from fastapi import APIRouter
-from vectorstore.qdrant import get_qdrant_client
+from fastapi.responses import PlainTextResponse
+from core.metrics import render
+from vectorstore.qdrant import get_async_qdrant_client
 from core.settings_loader import load_settings
 
 logger = logging.getLogger("health")
 router = APIRouter()
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics dang Prometheus text format: latency tung stage, cache hit, loi, Qdrant retry"""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @router.get("/health")
 async def health_check():
     health_status = {
@@ -15,8 +22,8 @@ async def health_check():
     }
     
     try:
-        client = get_qdrant_client()
-        collections = client.get_collections()
+        client = get_async_qdrant_client()
+        collections = await client.get_collections()
         health_status["services"]["qdrant"] = {
             "status": "up",
             "collections": len(collections.collections)
@@ -62,10 +69,28 @@ async def health_check():
             "bm25": "ready" if rag_status["bm25"] else "not initialized",
             "reranker": "ready" if rag_status["reranker"] else "not initialized",
             "vocabulary_size": rag_status["vocabulary_size"],
+            "sparse_model_version": rag_status["sparse_model_version"],
+            "sparse_search": "ready" if rag_status["sparse_search_ready"] else "local BM25 only",
             "avg_document_length": round(rag_status["avg_doc_length"], 2)
         }
     except Exception as e:
         logger.error(f"Failed to get RAG components status: {e}")
         health_status["services"]["rag_components"] = {"status": "error", "error": str(e)}
     
+    try:
+        from core.startup import get_reranking_service
+        reranking_service = get_reranking_service()
+        health_status["services"]["reranking"] = reranking_service.stats() if reranking_service else {"status": "not initialized"}
+    except Exception as e:
+        logger.error(f"Failed to get reranking stats: {e}")
+        health_status["services"]["reranking"] = {"status": "error", "error": str(e)}
+    
+    try:
+        from cache.semantic_cache import get_answer_cache
+        answer_cache = get_answer_cache()
+        health_status["services"]["answer_cache"] = answer_cache.stats() if answer_cache else {"status": "disabled"}
+    except Exception as e:
+        logger.error(f"Failed to get answer cache stats: {e}")
+        health_status["services"]["answer_cache"] = {"status": "error", "error": str(e)}
+    
     return health_status
@@ -0,0 +1,40 @@
+import json
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from core.profiling import capture_store, is_authorized
+
+router = APIRouter()
+
+def require_admin(token: str | None):
+    if not is_authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.get("/admin/profiles")
+async def list_profiles(x_admin_token: str | None = Header(None)):
+    """Cac capture gan nhat (moi nhat truoc)"""
+    require_admin(x_admin_token)
+    return {"profiles": capture_store.list()}
+
+@router.get("/admin/profiles/{capture_id}")
+async def download_profile(
+    capture_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    x_admin_token: str | None = Header(None),
+):
+    """Tai capture: collapsed stack (flamegraph.pl, speedscope) hoac speedscope JSON"""
+    require_admin(x_admin_token)
+    capture = capture_store.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "speedscope":
+        return Response(
+            json.dumps(capture.speedscope()),
+            media_type="application/json",
+            headers={"Content-Disposition": f'attachment; filename="profile-{capture_id}.speedscope.json"'},
+        )
+    return PlainTextResponse(
+        capture.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{capture_id}.collapsed.txt"'},
+    )
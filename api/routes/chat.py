@@ -1,49 +1,36 @@
+import asyncio
+import json
 import logging
 import os
 import time
+from contextlib import aclosing
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import uuid
 
-from retrieval.hybrid_retriever import hybrid_retrieve
-from core.startup import get_bm25, get_reranker
-from llm.generator import generate_answer
+from retrieval.hybrid_retriever import hybrid_retrieve, hybrid_retrieve_async
+from core.startup import get_bm25, get_reranker, get_reranking_service
+from llm.generator import generate_answer, generate_answer_async, stream_answer, error_message, is_fallback_answer
+from embedding.service import get_embedding_service
+from cache.semantic_cache import CachedAnswer, get_answer_cache
+from cache.session_store import Turn, get_session_store
+from core.executors import run_blocking
+from core.metrics import CACHE_REQUESTS, ERRORS, METRICS_DEBUG, breakdown_ms, record_stage, stage, start_trace
 from core.settings_loader import load_settings
+from core.schema import RetrievedDocument
 
 settings = load_settings()
 logger = logging.getLogger("chat")
 router = APIRouter()
 
 MAX_QUERY_LENGTH = int(os.getenv("MAX_QUERY_LENGTH", "500"))
-RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
 RERRANKING_TOP_K = settings.get("reranking", {}).get("top_k", 5)
+HISTORY_TURNS = settings.get("llm", {}).get("history_turns", 3) # so luot hoi dap truoc dua vao prompt, 0: khong dung
 
-sessions = {}
-
-# Simple in-memory rate limiting
-rate_limit_storage = {}  # {ip: [timestamps]}
-
-def check_rate_limit(client_ip: str) -> bool:
-    """Check if client has exceeded rate limit"""
-    current_time = time.time()
-    minute_ago = current_time - 60
-    
-    if client_ip not in rate_limit_storage:
-        rate_limit_storage[client_ip] = []
-    
-    # Remove timestamps older than 1 minute
-    rate_limit_storage[client_ip] = [
-        ts for ts in rate_limit_storage[client_ip] if ts > minute_ago
-    ]
-    
-    # Check if exceeded limit
-    if len(rate_limit_storage[client_ip]) >= RATE_LIMIT_PER_MINUTE:
-        return False
-    
-    # Add current request
-    rate_limit_storage[client_ip].append(current_time)
-    return True
+NO_DOCUMENTS_ANSWER = "Tôi không tìm thấy thông tin phù hợp trong dữ liệu hiện có."
+ERROR_ANSWER = "Xin lỗi, đã xảy ra lỗi khi xử lý câu hỏi của bạn. Vui lòng thử lại sau."
 
 class ChatRequest(BaseModel):
     """Chat request model"""
@@ -55,103 +42,303 @@ class ChatResponse(BaseModel):
     answer: str = Field(..., description="Bot's answer")
     sources: list = Field(default_factory=list, description="Source documents")
     session_id: str = Field(..., description="Session ID")
+    timings: Optional[dict] = Field(None, description="Thoi gian tung stage (ms), chi co khi bat metrics.debug")
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest, req: Request):
-    # Rate limiting check
-    client_ip = req.client.host if req.client else "unknown"
-    if not check_rate_limit(client_ip):
-        logger.warning(f"Rate limit exceeded for IP: {client_ip}")
+async def lookup_cached_answer(question: str, session_id: str) -> tuple[CachedAnswer | None, list[float] | None]:
+    """
+    Tra ve (cau tra loi da cache, query embedding).
+    Exact match truoc (khong can embed), sau do semantic match; embedding duoc tra ve de retrieval dung lai.
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return None, None
+    
+    cached = cache.get_exact(question)
+    if cached is not None:
+        logger.info(f"Session {session_id}: Answer cache hit (exact)")
+        CACHE_REQUESTS.inc(cache="answer", result="exact")
+        return cached, None
+    
+    try:
+        with stage("embed"):
+            query_vector = await get_embedding_service().embed_query(question)
+    except Exception as e:
+        logger.error(f"Session {session_id}: Failed to embed query for cache lookup: {e}")
+        ERRORS.inc(stage="embed")
+        return None, None
+    
+    cached = cache.get_similar(question, query_vector)
+    if cached is not None:
+        logger.info(f"Session {session_id}: Answer cache hit (semantic)")
+    CACHE_REQUESTS.inc(cache="answer", result="miss" if cached is None else "semantic")
+    return cached, query_vector
+
+def cache_answer(question: str, query_vector: list[float] | None, answer: str, sources: list[dict]):
+    """Chi cache cau tra loi that cua LLM (khong cache thong bao loi)"""
+    cache = get_answer_cache()
+    if cache is not None and answer and not is_fallback_answer(answer):
+        cache.put(question, query_vector, answer, sources)
+
+async def retrieve_documents(question: str, session_id: str, query_vector: list[float] | None = None) -> list[RetrievedDocument]:
+    """Hybrid retrieval + reranking, dung chung cho /chat va /chat/stream"""
+    # Get BM25 and Reranker from startup
+    bm25 = get_bm25()
+    reranker = get_reranking_service()
+    
+    if bm25 is None:
+        logger.error(f"Session {session_id}: BM25 not initialized!")
         raise HTTPException(
-            status_code=429,
-            detail=f"Tốc độ request quá nhanh. Vui lòng thử lại sau. (Max {RATE_LIMIT_PER_MINUTE} requests/minute)"
+            status_code=503,
+            detail="Hệ thống chưa sẵn sàng. Vui lòng thử lại sau."
         )
     
+    # Step 1: Hybrid retrieval (Dense + BM25), embedding chay trong executor, Qdrant qua async client
+    logger.info(f"Session {session_id}: Running hybrid retrieval...")
+    documents = await hybrid_retrieve_async(question, bm25, query_vector=query_vector)
+    
+    if not documents:
+        logger.warning(f"Session {session_id}: No documents retrieved")
+        return []
+    
+    logger.info(f"Session {session_id}: Retrieved {len(documents)} documents from hybrid search")
+    
+    # Step 2: Reranking (if available)
+    if reranker is not None:
+        logger.info(f"Session {session_id}: Reranking documents...")
+        # Score cache + gom cap (query, document) cua cac request dong thoi vao 1 lan predict
+        with stage("rerank"):
+            documents = await reranker.rerank(question, documents, top_k=RERRANKING_TOP_K)
+        logger.info(f"Session {session_id}: After reranking: {len(documents)} documents")
+    else:
+        logger.warning(f"Session {session_id}: Reranker not available, using hybrid scores only")
+        documents = documents[:RERRANKING_TOP_K]  # Cut to top K
+    
+    return documents
+
+def build_context(documents: list[RetrievedDocument]) -> str:
+    return "\n\n".join(
+        f"[{i+1}] {doc.text}\n(Nguồn: {doc.metadata})" 
+        for i, doc in enumerate(documents)
+    )
+
+def build_sources(documents: list[RetrievedDocument]) -> list[dict]:
+    return [
+        {
+            "text": doc.text[:200] + "..." if len(doc.text) > 200 else doc.text,
+            "metadata": doc.metadata,
+            "score": doc.score
+        }
+        for doc in documents
+    ]
+
+async def call_session_store(method: str, *args):
+    """Backend sqlite / redis (khoa file, network) chay trong executor "sessions", memory goi thang"""
+    store = get_session_store()
+    if store.blocking:
+        return await run_blocking("sessions", getattr(store, method), *args)
+    return getattr(store, method)(*args)
+
+async def load_history(session_id: str | None) -> list[Turn]:
+    """HISTORY_TURNS luot gan nhat cua session (session moi: khong co), loi session store khong lam hong request"""
+    if session_id is None or HISTORY_TURNS <= 0:
+        return []
+    try:
+        return await call_session_store("history", session_id, HISTORY_TURNS)
+    except Exception as e:
+        logger.error(f"Session {session_id}: Failed to load history: {e}")
+        ERRORS.inc(stage="session")
+        return []
+
+async def save_turn(session_id: str, question: str, answer: str, sources: list[dict]):
+    try:
+        await call_session_store("append", session_id, Turn.from_response(question, answer, sources))
+    except Exception as e:
+        logger.error(f"Session {session_id}: Failed to save turn: {e}")
+        ERRORS.inc(stage="session")
+
+def debug_timings(breakdown: dict) -> dict | None:
+    """Breakdown thoi gian tung stage cua request (ms), chi tra ve client khi bat metrics.debug"""
+    return breakdown_ms(breakdown) if METRICS_DEBUG else None
+
+@router.post("/chat", response_model=ChatResponse, response_model_exclude_none=True)
+async def chat_endpoint(request: ChatRequest):
     question = request.query.strip()
     
     if not question:
         raise HTTPException(status_code=400, detail="Vui lòng nhập câu hỏi.")
     
+    history = await load_history(request.session_id)
     session_id = request.session_id or str(uuid.uuid4())
     
     logger.info(f"Session {session_id}: Received question: {question}")
+    breakdown = start_trace()
     
     try:
-        # Get BM25 and Reranker from startup
-        bm25 = get_bm25()
-        reranker = get_reranker()
-        
-        if bm25 is None:
-            logger.error(f"Session {session_id}: BM25 not initialized!")
-            raise HTTPException(
-                status_code=503,
-                detail="Hệ thống chưa sẵn sàng. Vui lòng thử lại sau."
+        # Co lich su hoi thoai thi cau tra loi da cache (khong co lich su) khong dung duoc
+        cached, query_vector = await lookup_cached_answer(question, session_id) if not history else (None, None)
+        if cached is not None:
+            await save_turn(session_id, question, cached.answer, cached.sources)
+            return ChatResponse(
+                answer=cached.answer,
+                sources=cached.sources,
+                session_id=session_id,
+                timings=debug_timings(breakdown)
             )
         
-        # Step 1: Hybrid retrieval (Dense + BM25)
-        logger.info(f"Session {session_id}: Running hybrid retrieval...")
-        documents = hybrid_retrieve(question, bm25)
+        documents = await retrieve_documents(question, session_id, query_vector)
         
         if not documents:
-            logger.warning(f"Session {session_id}: No documents retrieved")
             return ChatResponse(
-                answer="Tôi không tìm thấy thông tin phù hợp trong dữ liệu hiện có.",
+                answer=NO_DOCUMENTS_ANSWER,
                 sources=[],
-                session_id=session_id
+                session_id=session_id,
+                timings=debug_timings(breakdown)
             )
         
-        logger.info(f"Session {session_id}: Retrieved {len(documents)} documents from hybrid search")
-        
-        # Step 2: Reranking (if available)
-        if reranker is not None:
-            logger.info(f"Session {session_id}: Reranking documents...")
-            documents = reranker.rerank(question, documents, top_k=RERRANKING_TOP_K)
-            logger.info(f"Session {session_id}: After reranking: {len(documents)} documents")
-        else:
-            logger.warning(f"Session {session_id}: Reranker not available, using hybrid scores only")
-            documents = documents[:RERRANKING_TOP_K]  # Cut to top K
-        
         # Step 3: Build context and generate answer
-        context = "\n\n".join(
-            f"[{i+1}] {doc.text}\n(Nguồn: {doc.metadata})" 
-            for i, doc in enumerate(documents)
-        )
+        with stage("context_build"):
+            context = build_context(documents)
         logger.info(f"Session {session_id}: Retrieved {len(documents)} documents")
         
-        answer = generate_answer(context, question)
+        with stage("llm"):
+            answer = await generate_answer_async(context, question, history)
         logger.info(f"Session {session_id}: Generated answer successfully")
         
-        sources = [
-            {
-                "text": doc.text[:200] + "..." if len(doc.text) > 200 else doc.text,
-                "metadata": doc.metadata,
-                "score": doc.score
-            }
-            for doc in documents
-        ]
-        
-        if session_id not in sessions:
-            sessions[session_id] = []
-        sessions[session_id].append({
-            "question": question,
-            "answer": answer,
-            "sources": sources
-        })
+        sources = build_sources(documents)
+        await save_turn(session_id, question, answer, sources)
+        if not history: # cau tra loi dua vao lich su hoi thoai khong dung cho session khac
+            cache_answer(question, query_vector, answer, sources)
         
         return ChatResponse(
             answer=answer,
             sources=sources,
-            session_id=session_id
+            session_id=session_id,
+            timings=debug_timings(breakdown)
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Session {session_id}: Error in chat: {e}", exc_info=True)
+        ERRORS.inc(stage="chat")
         raise HTTPException(
             status_code=500,
-            detail="Xin lỗi, đã xảy ra lỗi khi xử lý câu hỏi của bạn. Vui lòng thử lại sau."
+            detail=ERROR_ANSWER
         )
 
+def sse_event(event: str, data: dict) -> str:
+    """Format 1 Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, req: Request):
+    """
+    Stream cau tra loi qua Server-Sent Events:
+        event: sources -> {"sources": [...], "session_id": ...}   (gui truoc token dau tien)
+        event: token   -> {"content": "..."}
+        event: done    -> {"session_id": ..., "time_to_first_token_ms": ..., "tokens": ..., "tokens_per_second": ...}
+                          (cau tra loi tu cache: 1 event token chua ca cau tra loi, done co "cached": true)
+                          (bat metrics.debug: done co them "timings" = thoi gian tung stage, ms)
+        event: error   -> {"detail": "..."}
+    """
+    question = request.query.strip()
+    
+    if not question:
+        raise HTTPException(status_code=400, detail="Vui lòng nhập câu hỏi.")
+    
+    history = await load_history(request.session_id)
+    session_id = request.session_id or str(uuid.uuid4())
+    request_start = time.perf_counter()
+    
+    logger.info(f"Session {session_id}: Received streaming question: {question}")
+    
+    async def event_stream():
+        breakdown = start_trace() # generator chay trong task cua StreamingResponse
+        try:
+            cached, query_vector = await lookup_cached_answer(question, session_id) if not history else (None, None)
+            if cached is not None:
+                yield sse_event("sources", {"sources": cached.sources, "session_id": session_id})
+                yield sse_event("token", {"content": cached.answer})
+                await save_turn(session_id, question, cached.answer, cached.sources)
+                yield sse_event("done", {
+                    "session_id": session_id,
+                    "time_to_first_token_ms": round((time.perf_counter() - request_start) * 1000, 1),
+                    "cached": True,
+                    **({"timings": debug_timings(breakdown)} if METRICS_DEBUG else {}),
+                })
+                return
+            
+            documents = await retrieve_documents(question, session_id, query_vector)
+        except HTTPException as e:
+            yield sse_event("error", {"detail": e.detail})
+            return
+        except Exception as e:
+            logger.error(f"Session {session_id}: Error in streaming retrieval: {e}", exc_info=True)
+            ERRORS.inc(stage="stream")
+            yield sse_event("error", {"detail": ERROR_ANSWER})
+            return
+        
+        sources = build_sources(documents)
+        yield sse_event("sources", {"sources": sources, "session_id": session_id})
+        
+        if not documents:
+            yield sse_event("token", {"content": NO_DOCUMENTS_ANSWER})
+            yield sse_event("done", {"session_id": session_id})
+            return
+        
+        parts: list[str] = []
+        first_token_at = None
+        with stage("context_build"):
+            context = build_context(documents)
+        generation_start = time.perf_counter()
+        
+        try:
+            async with aclosing(stream_answer(context, question, history)) as tokens:
+                async for token in tokens:
+                    if await req.is_disconnected():
+                        # Thoat vong lap -> dong stream toi Ollama -> Ollama dung generate
+                        logger.info(f"Session {session_id}: Client disconnected after {len(parts)} tokens, generation cancelled")
+                        return
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        record_stage("ttft", first_token_at - request_start)
+                    parts.append(token)
+                    yield sse_event("token", {"content": token})
+        except asyncio.CancelledError:
+            logger.info(f"Session {session_id}: Stream cancelled after {len(parts)} tokens")
+            raise
+        except Exception as e:
+            yield sse_event("error", {"detail": error_message(e)})
+            return
+        
+        generation_seconds = time.perf_counter() - generation_start
+        record_stage("llm", generation_seconds)
+        time_to_first_token = (first_token_at - request_start) if first_token_at else None
+        tokens_per_second = len(parts) / generation_seconds if generation_seconds > 0 else 0.0
+        logger.info(
+            f"Session {session_id}: Streamed {len(parts)} tokens, "
+            f"time to first token {time_to_first_token or 0:.3f}s, {tokens_per_second:.1f} tokens/s"
+        )
+        
+        answer = "".join(parts).strip()
+        await save_turn(session_id, question, answer, sources)
+        if not history:
+            cache_answer(question, query_vector, answer, sources)
+        yield sse_event("done", {
+            "session_id": session_id,
+            "time_to_first_token_ms": round(time_to_first_token * 1000, 1) if time_to_first_token else None,
+            "tokens": len(parts),
+            "tokens_per_second": round(tokens_per_second, 2),
+            **({"timings": debug_timings(breakdown)} if METRICS_DEBUG else {}),
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 def chat(question: str) -> str:
     """Legacy CLI chat function - now uses hybrid retrieval"""
@@ -0,0 +1,142 @@
+"""
+Chay API production: load model + BM25 1 lan trong process cha (preload) roi fork N worker uvicorn.
+
+    python -m api.server                  # server.workers worker (SERVER_WORKERS)
+    python -m api.server --workers 4 --port 8000
+
+Preload (process cha): initialize_rag_components (BM25 snapshot mmap hoac scroll Qdrant, CrossEncoder) + embedding
+model. Worker la process fork nen dung chung trang nho cua weight / numpy array voi process cha (copy-on-write) cho
+toi khi ghi; gc.freeze() truoc khi fork de GC cua worker khong ghi vao object da preload. BM25 snapshot la file mmap
+nen dung chung page cache ke ca khi khong preload.
+Preload chi load model, khong chay inference: torch da chay song song (intra-op thread pool) truoc khi fork thi worker
+bi treo o lan inference dau tien.
+
+Cac worker accept tren cung 1 socket. Worker chet thi process cha fork lai, SIGTERM / SIGINT thi dung tat ca worker.
+State trong process (answer cache, query / score cache, rate_limit va sessions backend memory) la rieng tung worker:
+dung rate_limit.backend / sessions.backend = sqlite (1 may) hoac redis de dung chung.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable
+
+import uvicorn
+
+from core.logging_setup import setup_logging
+from core.settings_loader import load_settings
+
+settings = load_settings()
+logger = logging.getLogger("api")
+
+SERVER_CONFIG = settings.get("server", {})
+SERVER_HOST = SERVER_CONFIG.get("host", "0.0.0.0")
+SERVER_PORT = SERVER_CONFIG.get("port", 8000)
+SERVER_WORKERS = SERVER_CONFIG.get("workers", 1)
+SERVER_PRELOAD = SERVER_CONFIG.get("preload", True)
+RESTART_DELAY_SECONDS = 1.0 # tranh fork lien tuc khi worker loi ngay luc start
+
+def preload():
+    """Load cac thanh phan nang 1 lan truoc khi fork"""
+    from core.startup import initialize_rag_components
+    from embedding.embedder import get_model
+    from vectorstore.qdrant import close_qdrant_client
+
+    start = time.perf_counter()
+    initialize_rag_components()
+    get_model()
+    close_qdrant_client() # worker khong dung chung connection cua process cha
+    logger.info(f"Preload completed in {time.perf_counter() - start:.1f}s")
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(app, sock: socket.socket, post_fork: Callable[[], None] | None):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL) # uvicorn dat lai handler cua no trong Server.run
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    if post_fork is not None:
+        post_fork()
+    server = uvicorn.Server(uvicorn.Config(app, log_config=None, timeout_graceful_shutdown=30))
+    server.run(sockets=[sock])
+
+def run_workers(app, sock: socket.socket, workers: int, post_fork: Callable[[], None] | None = None):
+    """Fork `workers` worker chay uvicorn tren `sock`, giam sat va fork lai worker chet cho toi khi nhan SIGTERM / SIGINT"""
+    children: dict[int, int] = {} # pid -> worker index
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock, post_fork)
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+        logger.info(f"Started worker {index} (pid {pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    gc.collect()
+    gc.freeze() # object da preload vao permanent generation: GC cua worker khong duyet (va ghi) vao chung
+
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if stopping:
+            logger.info(f"Worker {index} (pid {pid}) stopped")
+            continue
+        logger.warning(f"Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        time.sleep(RESTART_DELAY_SECONDS)
+        if not stopping:
+            spawn(index)
+
+def main():
+    parser = argparse.ArgumentParser(description="NMK Chatbot API: preload models, fork uvicorn workers")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--no-preload", action="store_true", help="moi worker tu load model (khong chia se bo nho)")
+    args = parser.parse_args()
+
+    setup_logging()
+    preload_enabled = SERVER_PRELOAD and not args.no_preload
+    if preload_enabled:
+        preload()
+    from api.app import app
+
+    sock = bind_socket(args.host, args.port)
+    logger.info(f"Listening on {args.host}:{args.port} with {args.workers} workers (preload={preload_enabled})")
+    run_workers(app, sock, args.workers)
+    sock.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+class LRUCache:
+    """
+    LRU cache co TTL va gioi han bo nho, thread-safe.
+
+        max_entries : so entry toi da
+        max_bytes   : tong kich thuoc toi da (do bang size_of), None la khong gioi han
+        ttl_seconds : thoi gian song cua 1 entry, None la khong het han
+        on_evict    : callback(key, value) khi entry bi xoa (het han, bi day ra, hoac clear)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int | None = None,
+        ttl_seconds: float | None = None,
+        size_of: Callable[[Any], int] | None = None,
+        on_evict: Callable[[Hashable, Any], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size_of = size_of or (lambda value: 0)
+        self.on_evict = on_evict
+        self.clock = clock
+
+        self._entries: OrderedDict[Hashable, tuple[Any, float, int]] = OrderedDict() # key -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> Any:
+        value, _, size = self._entries.pop(key)
+        self.total_bytes -= size
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at < self.clock():
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key) # danh dau vua duoc dung
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        size = self.size_of(value)
+        expires_at = self.clock() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires_at, size)
+            self.total_bytes += size
+
+            # Day cac entry it dung nhat ra cho den khi nam trong gioi han
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """Snapshot cac entry con han, khong cap nhat thu tu LRU"""
+        now = self.clock()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at, _) in self._entries.items() if expires_at >= now]
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,213 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from cache.lru import LRUCache
+from core.settings_loader import load_settings
+
+settings = load_settings()
+logger = logging.getLogger("cache")
+
+CACHE_CONFIG = settings.get("cache", {})
+CACHE_ENABLED = CACHE_CONFIG.get("enabled", True)
+CACHE_MAX_ENTRIES = CACHE_CONFIG.get("max_entries", 1000)
+CACHE_MAX_BYTES = CACHE_CONFIG.get("max_bytes", 50 * 1024 * 1024)
+CACHE_TTL_SECONDS = CACHE_CONFIG.get("ttl_seconds", 3600)
+SIMILARITY_THRESHOLD = CACHE_CONFIG.get("similarity_threshold", 0.95)
+VERSION_FILE = CACHE_CONFIG.get("version_file", "data/index_version")
+
+_PUNCTUATION = "?!.,;:…\"'“”"
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+def normalize_query(query: str) -> str:
+    """NFC + lowercase + gop khoang trang + bo dau cau o 2 dau, dung lam key exact match"""
+    text = unicodedata.normalize("NFC", query).lower()
+    text = " ".join(text.split())
+    return text.strip(_PUNCTUATION + " ")
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: list[dict]
+    numbers: frozenset[str] = field(default_factory=frozenset) # cac so trong cau hoi (quan 7 != quan 2)
+    slot: int = -1 # vi tri embedding trong ma tran, -1 la khong co embedding
+
+def _entry_size(entry: CachedAnswer) -> int:
+    # Embedding nam trong ma tran cap phat san (max_entries x dim), khong tinh vao day
+    return len(entry.answer.encode("utf-8")) + len(json.dumps(entry.sources, ensure_ascii=False, default=str).encode("utf-8"))
+
+class SemanticAnswerCache:
+    """
+    Cache cau tra loi cuoi cung (answer + sources) cua chat_endpoint.
+
+    Lookup 2 buoc:
+        1. exact match theo normalize_query (khong can embedding)
+        2. cosine similarity giua query embedding va embedding cac cau hoi da cache (>= threshold)
+    Eviction: LRU + TTL + gioi han bo nho (LRUCache). Cache tu xoa khi version file doi
+    (run_ingestion_pipeline goi mark_index_updated sau khi upsert).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int | None = CACHE_MAX_BYTES,
+        ttl_seconds: float | None = CACHE_TTL_SECONDS,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        version_file: str | None = VERSION_FILE,
+        clock=time.monotonic,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.version_file = version_file
+        self._entries = LRUCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            ttl_seconds=ttl_seconds,
+            size_of=_entry_size,
+            on_evict=self._on_evict,
+            clock=clock,
+        )
+        self._lock = threading.RLock()
+
+        # Ma tran embedding: du 1 slot cho entry moi truoc khi LRUCache day entry cu ra
+        self._capacity = max_entries + 1
+        self._matrix: np.ndarray | None = None
+        self._slot_keys: list[str | None] = [None] * self._capacity
+        self._active = np.zeros(self._capacity, dtype=bool)
+        self._free_slots = list(range(self._capacity - 1, -1, -1))
+
+        self._version = self._read_version()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _on_evict(self, key: str, entry: CachedAnswer):
+        if entry.slot >= 0:
+            self._active[entry.slot] = False
+            self._slot_keys[entry.slot] = None
+            self._free_slots.append(entry.slot)
+
+    def _read_version(self) -> int | None:
+        if not self.version_file:
+            return None
+        try:
+            return os.stat(self.version_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_version(self):
+        """Xoa cache neu collection da duoc ingest lai (version file doi)"""
+        version = self._read_version()
+        if version != self._version:
+            self._version = version
+            if len(self._entries):
+                logger.info("Vector index changed, clearing answer cache")
+                self.clear()
+                self.invalidations += 1
+
+    def get_exact(self, query: str) -> CachedAnswer | None:
+        """Buoc 1: exact match, khong tinh la miss neu khong thay (con buoc semantic)"""
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(normalize_query(query))
+            if entry is not None:
+                self.exact_hits += 1
+            return entry
+
+    def get_similar(self, query: str, query_vector: list[float]) -> CachedAnswer | None:
+        """Buoc 2: cau hoi da cache co cosine similarity cao nhat, neu >= threshold"""
+        with self._lock:
+            self._check_version()
+            if self._matrix is None or not self._active.any():
+                self.misses += 1
+                return None
+
+            vector = np.asarray(query_vector, dtype=np.float32)
+            similarities = self._matrix @ vector # embedding da normalize -> dot = cosine
+            similarities[~self._active] = -np.inf
+            best = int(np.argmax(similarities))
+
+            if similarities[best] >= self.similarity_threshold:
+                entry = self._entries.get(self._slot_keys[best]) # cap nhat LRU, kiem tra TTL
+                if entry is not None and entry.numbers == frozenset(_NUMBER_PATTERN.findall(query)):
+                    self.semantic_hits += 1
+                    logger.info(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+                    return entry
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, query_vector: list[float] | None, answer: str, sources: list[dict]):
+        key = normalize_query(query)
+        entry = CachedAnswer(answer=answer, sources=sources, numbers=frozenset(_NUMBER_PATTERN.findall(query)))
+
+        with self._lock:
+            self._check_version()
+            if query_vector is not None:
+                vector = np.asarray(query_vector, dtype=np.float32)
+                if self._matrix is None:
+                    self._matrix = np.zeros((self._capacity, vector.shape[0]), dtype=np.float32)
+                entry.slot = self._free_slots.pop()
+                self._matrix[entry.slot] = vector
+                self._slot_keys[entry.slot] = key
+                self._active[entry.slot] = True
+            self._entries.set(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        entries = self._entries.stats()
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": entries["entries"],
+            "bytes": entries["bytes"],
+            "evictions": entries["evictions"],
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+_answer_cache: SemanticAnswerCache | None = None
+
+def get_answer_cache() -> SemanticAnswerCache | None:
+    """Tra ve None neu cache bi tat trong settings"""
+    global _answer_cache
+    if not CACHE_ENABLED:
+        return None
+    if _answer_cache is None:
+        logger.info(
+            f"Creating answer cache: {CACHE_MAX_ENTRIES} entries, ttl {CACHE_TTL_SECONDS}s, "
+            f"similarity threshold {SIMILARITY_THRESHOLD}"
+        )
+        _answer_cache = SemanticAnswerCache()
+    return _answer_cache
+
+def mark_index_updated(version_file: str | None = VERSION_FILE):
+    """
+    Danh dau vector index vua duoc ingest lai: ghi version file (API process kiem tra mtime moi lookup)
+    va xoa cache trong process hien tai.
+    """
+    if version_file:
+        directory = os.path.dirname(version_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(version_file, "w", encoding="utf-8") as file:
+            file.write(str(time.time_ns()))
+        logger.info(f"Updated index version file: {version_file}")
+
+    if _answer_cache is not None:
+        _answer_cache.clear()
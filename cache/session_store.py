@@ -0,0 +1,295 @@
+"""
+Lich su hoi thoai theo session_id, co gioi han (thay cho dict `sessions` lon mai trong api/routes/chat.py).
+
+Moi luot luu 1 Turn gon: cau hoi, cau tra loi va ten nguon (khong luu text chunk / metadata / score cua sources).
+Moi session giu toi da max_turns luot va max_bytes (bo luot cu nhat truoc), session khong dung qua ttl_seconds bi xoa.
+
+Backend (sessions.backend):
+    memory : LRUCache trong process, toi da max_sessions session (session it dung nhat bi day ra)
+    sqlite : file sqlite3 (sqlite_path), giu qua restart va dung chung giua cac worker tren 1 may
+    redis  : client kieu redis-py (rpush / lrange / ltrim / expire / delete), dung chung giua nhieu may
+Backend sqlite / redis la I/O blocking (khoa file, network): api/routes/chat.py goi trong executor "sessions".
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from cache.lru import LRUCache
+from core.settings_loader import load_settings
+
+settings = load_settings()
+logger = logging.getLogger("cache")
+
+SESSIONS_CONFIG = settings.get("sessions", {})
+SESSIONS_BACKEND = SESSIONS_CONFIG.get("backend", "memory")
+MAX_SESSIONS = SESSIONS_CONFIG.get("max_sessions", 10000)
+SESSION_TTL_SECONDS = SESSIONS_CONFIG.get("ttl_seconds", 86400)
+MAX_TURNS = SESSIONS_CONFIG.get("max_turns", 20)
+MAX_BYTES = SESSIONS_CONFIG.get("max_bytes", 32768)
+MAX_SOURCES = SESSIONS_CONFIG.get("max_sources", 5)
+SQLITE_PATH = SESSIONS_CONFIG.get("sqlite_path", "data/sessions.sqlite3")
+REDIS_URL = SESSIONS_CONFIG.get("redis_url", "redis://localhost:6379/0")
+REDIS_PREFIX = SESSIONS_CONFIG.get("redis_prefix", "nmk:session:")
+
+# Thu tu uu tien khi lay ten nguon tu metadata cua 1 source
+SOURCE_NAME_FIELDS = (
+    "project_name", "news_item_title", "interior_name", "architecture_type_name",
+    "project_category_name", "news_category_name", "company_name", "source",
+)
+
+def source_name(source: dict) -> str:
+    metadata = source.get("metadata") or {}
+    return next((str(metadata[name]) for name in SOURCE_NAME_FIELDS if metadata.get(name)), "")
+
+@dataclass
+class Turn:
+    question: str
+    answer: str
+    sources: list[str] = field(default_factory=list) # ten nguon, khong luu text chunk
+    created_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_response(cls, question: str, answer: str, sources: list[dict], max_sources: int = MAX_SOURCES) -> "Turn":
+        names = list(dict.fromkeys(name for name in map(source_name, sources) if name)) # bo trung, giu thu tu
+        return cls(question=question, answer=answer, sources=names[:max_sources])
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "Turn":
+        return cls(**json.loads(data))
+
+    def size(self) -> int:
+        return len(self.to_json().encode("utf-8"))
+
+def _trim(turns: list[Turn], max_turns: int, max_bytes: int | None) -> list[Turn]:
+    """Bo cac luot cu nhat cho den khi <= max_turns va <= max_bytes (luon giu luot moi nhat)"""
+    turns = turns[-max_turns:] if max_turns > 0 else turns
+    if max_bytes is not None:
+        total = sum(turn.size() for turn in turns)
+        while len(turns) > 1 and total > max_bytes:
+            total -= turns[0].size()
+            turns = turns[1:]
+    return turns
+
+class SessionStore(ABC):
+    """Interface chung cua cac backend"""
+
+    blocking = True # history / append lam I/O: goi trong executor tu async code
+
+    def __init__(self, max_turns: int = MAX_TURNS, max_bytes: int | None = MAX_BYTES, ttl_seconds: float | None = SESSION_TTL_SECONDS):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def append(self, session_id: str, turn: Turn):
+        ...
+
+    @abstractmethod
+    def history(self, session_id: str, max_turns: int | None = None) -> list[Turn]:
+        """max_turns luot gan nhat (cu -> moi), [] neu session khong ton tai / het han"""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__}
+
+def _last(turns: list[Turn], max_turns: int | None) -> list[Turn]:
+    if max_turns is None:
+        return list(turns)
+    return list(turns[-max_turns:]) if max_turns > 0 else []
+
+class InMemorySessionStore(SessionStore):
+    """LRU + TTL theo session (LRUCache), moi lan append gia han TTL cua session"""
+
+    blocking = False # chi lock ngan trong process, goi thang tren event loop
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, clock=time.monotonic, **limits):
+        super().__init__(**limits)
+        self._sessions = LRUCache(
+            max_entries=max_sessions,
+            ttl_seconds=self.ttl_seconds,
+            size_of=lambda turns: sum(turn.size() for turn in turns),
+            clock=clock,
+        )
+        self._lock = threading.Lock()
+
+    def append(self, session_id: str, turn: Turn):
+        with self._lock:
+            turns = self._sessions.get(session_id, [])
+            self._sessions.set(session_id, _trim(turns + [turn], self.max_turns, self.max_bytes))
+
+    def history(self, session_id: str, max_turns: int | None = None) -> list[Turn]:
+        return _last(self._sessions.get(session_id, []), max_turns)
+
+    def delete(self, session_id: str):
+        self._sessions.pop(session_id)
+
+    def stats(self) -> dict:
+        return {**super().stats(), **self._sessions.stats()}
+
+class SQLiteSessionStore(SessionStore):
+    """
+    1 bang turns(session_id, created_at, data JSON), WAL de nhieu worker doc/ghi cung file.
+    Session het han (luot moi nhat cu hon ttl) bi bo qua khi doc va duoc xoa toi da 1 lan / cleanup_interval giay.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH, cleanup_interval: float = 60.0, clock=time.time, **limits):
+        super().__init__(**limits)
+        self.path = path
+        self.cleanup_interval = cleanup_interval
+        self.clock = clock
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, created_at REAL NOT NULL, "
+            "size INTEGER NOT NULL, data TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, id)")
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+    def _expired_before(self) -> float | None:
+        return self.clock() - self.ttl_seconds if self.ttl_seconds is not None else None
+
+    def _cleanup(self):
+        expired_before = self._expired_before()
+        if expired_before is None or self.clock() - self._last_cleanup < self.cleanup_interval:
+            return
+        self._last_cleanup = self.clock()
+        self._conn.execute(
+            "DELETE FROM turns WHERE session_id IN "
+            "(SELECT session_id FROM turns GROUP BY session_id HAVING MAX(created_at) < ?)",
+            (expired_before,),
+        )
+
+    def append(self, session_id: str, turn: Turn):
+        data = turn.to_json()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO turns (session_id, created_at, size, data) VALUES (?, ?, ?, ?)",
+                    (session_id, self.clock(), len(data.encode("utf-8")), data),
+                )
+                rows = self._conn.execute(
+                    "SELECT id, size FROM turns WHERE session_id = ? ORDER BY id DESC", (session_id,)
+                ).fetchall()
+                # Giu cac luot moi nhat trong gioi han, xoa phan con lai
+                kept, total = 0, 0
+                for _, size in rows:
+                    if kept and ((self.max_turns > 0 and kept >= self.max_turns) or (self.max_bytes is not None and total + size > self.max_bytes)):
+                        break
+                    kept += 1
+                    total += size
+                if kept < len(rows):
+                    self._conn.execute("DELETE FROM turns WHERE session_id = ? AND id <= ?", (session_id, rows[kept][0]))
+                self._cleanup()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def history(self, session_id: str, max_turns: int | None = None) -> list[Turn]:
+        if max_turns is not None and max_turns <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT created_at, data FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, max_turns if max_turns is not None else -1),
+            ).fetchall()
+        expired_before = self._expired_before()
+        if not rows or (expired_before is not None and rows[0][0] < expired_before):
+            return []
+        return [Turn.from_json(data) for _, data in reversed(rows)]
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            sessions, turns, size = self._conn.execute(
+                "SELECT COUNT(DISTINCT session_id), COUNT(*), COALESCE(SUM(size), 0) FROM turns"
+            ).fetchone()
+        return {**super().stats(), "entries": sessions, "turns": turns, "bytes": size}
+
+    def close(self):
+        self._conn.close()
+
+class RedisSessionStore(SessionStore):
+    """
+    Moi session la 1 list JSON turn (key = prefix + session_id), TTL bang EXPIRE (gia han moi lan append).
+    client: bat ky client nao co rpush / lrange / ltrim / expire / delete giong redis-py.
+    """
+
+    def __init__(self, client: Any, prefix: str = REDIS_PREFIX, **limits):
+        super().__init__(**limits)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, session_id: str) -> str:
+        return self.prefix + session_id
+
+    def append(self, session_id: str, turn: Turn):
+        key = self._key(session_id)
+        self.client.rpush(key, turn.to_json())
+        if self.max_turns > 0:
+            self.client.ltrim(key, -self.max_turns, -1)
+        if self.max_bytes is not None:
+            sizes = [len(item) for item in self.client.lrange(key, 0, -1)]
+            drop, total = 0, sum(sizes)
+            while drop < len(sizes) - 1 and total > self.max_bytes:
+                total -= sizes[drop]
+                drop += 1
+            if drop:
+                self.client.ltrim(key, drop, -1)
+        if self.ttl_seconds is not None:
+            self.client.expire(key, int(self.ttl_seconds))
+
+    def history(self, session_id: str, max_turns: int | None = None) -> list[Turn]:
+        if max_turns is not None and max_turns <= 0:
+            return []
+        start = -max_turns if max_turns is not None else 0
+        return [Turn.from_json(item) for item in self.client.lrange(self._key(session_id), start, -1)]
+
+    def delete(self, session_id: str):
+        self.client.delete(self._key(session_id))
+
+def create_session_store(backend: str = SESSIONS_BACKEND) -> SessionStore:
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("sessions.backend=redis can package redis: pip install redis") from e
+        return RedisSessionStore(redis.Redis.from_url(REDIS_URL))
+    raise ValueError(f"Unknown session backend: {backend}")
+
+_session_store: SessionStore | None = None
+
+def get_session_store() -> SessionStore:
+    global _session_store
+    if _session_store is None:
+        logger.info(
+            f"Creating '{SESSIONS_BACKEND}' session store: {MAX_TURNS} turns / {MAX_BYTES} bytes per session, "
+            f"ttl {SESSION_TTL_SECONDS}s"
+        )
+        _session_store = create_session_store()
+    return _session_store
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Any, Callable
+
+from core.executors import run_blocking
+
+logger = logging.getLogger("batching")
+
+class MicroBatcher:
+    """
+    Gom cac request dong thoi thanh 1 batch roi goi process_batch 1 lan (trong executor pool `executor_name`).
+
+    Batch duoc flush khi du max_batch_size item, hoac:
+        - ngay vong lap event loop ke tiep neu khong co batch nao dang chay (khong them latency khi it tai)
+        - sau toi da max_wait_ms neu model dang ban (cac request den trong luc cho duoc gom lai)
+    process_batch(items) phai tra ve list ket qua cung thu tu voi items.
+    Phai dung trong 1 event loop (tao lai batcher neu doi loop).
+    """
+
+    def __init__(self, process_batch: Callable[[list], list], executor_name: str, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.process_batch = process_batch
+        self.executor_name = executor_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.loop = asyncio.get_running_loop()
+
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._in_flight = 0
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: Any) -> Any:
+        future = self.loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(0 if self._in_flight == 0 else self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if self._pending: # con du thi hen flush tiep
+            self._timer = self.loop.call_later(self.max_wait, self._flush)
+        if not batch:
+            return
+
+        task = self.loop.create_task(self._run(batch))
+        self._tasks.add(task) # giu reference de task khong bi GC
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        self.batches += 1
+        self.items += len(items)
+        self._in_flight += 1
+
+        try:
+            results = await run_blocking(self.executor_name, self.process_batch, items)
+            if len(results) != len(items):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logger.error(f"Batch of {len(items)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+            if self._pending and self._in_flight == 0: # model ranh -> chay ngay batch dang cho
+                self._flush()
+
+        for (_, future), result in zip(batch, results):
+            if not future.done(): # request co the da bi cancel
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,42 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from core.settings_loader import load_settings
+
+settings = load_settings()
+logger = logging.getLogger("startup")
+
+CONCURRENCY_CONFIG = settings.get("concurrency", {})
+
+# Moi loai cong viec CPU-bound (model inference) co 1 pool rieng, gioi han so thread de khong tranh CPU voi nhau
+POOL_SIZES = {
+    "embedding": CONCURRENCY_CONFIG.get("embedding_workers", 2),
+    "reranking": CONCURRENCY_CONFIG.get("reranking_workers", 1),
+    "rate_limit": CONCURRENCY_CONFIG.get("rate_limit_workers", 4), # I/O (sqlite / redis), khong phai CPU
+    "sessions": CONCURRENCY_CONFIG.get("session_workers", 4), # I/O (sqlite / redis), khong phai CPU
+}
+
+_executors: dict[str, ThreadPoolExecutor] = {}
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    if name not in POOL_SIZES:
+        raise ValueError(f"Unknown executor pool: {name}")
+
+    if name not in _executors:
+        logger.info(f"Creating '{name}' executor with {POOL_SIZES[name]} workers")
+        _executors[name] = ThreadPoolExecutor(max_workers=POOL_SIZES[name], thread_name_prefix=f"{name}-worker")
+    return _executors[name]
+
+async def run_blocking(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Chay ham blocking trong pool `name` de khong chan event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(name), functools.partial(func, *args, **kwargs))
+
+def shutdown_executors():
+    for name, executor in _executors.items():
+        logger.info(f"Shutting down '{name}' executor")
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
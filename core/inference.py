@@ -0,0 +1,85 @@
+import glob
+import importlib.util
+import logging
+import os
+
+from core.settings_loader import load_settings
+
+settings = load_settings()
+logger = logging.getLogger("inference")
+
+INFERENCE_CONFIG = settings.get("inference", {})
+MODEL_CACHE_DIR = INFERENCE_CONFIG.get("model_cache_dir", "models")
+INTRA_OP_THREADS = INFERENCE_CONFIG.get("intra_op_threads", 0) # thread / ONNX Runtime session, 0: mac dinh cua thu vien (so core)
+TORCH_THREADS = INFERENCE_CONFIG.get("torch_threads", 0) # torch.set_num_threads, anh huong ca process (ke ca ingestion), 0: khong doi
+QUANTIZATION_CONFIG = INFERENCE_CONFIG.get("quantization_config", "avx2") # avx2 | avx512 | avx512_vnni | arm64
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def _local_model_dir(model_name: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, model_name.strip("/").replace("/", "__"))
+
+def _session_options():
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if INTRA_OP_THREADS:
+        options.intra_op_num_threads = INTRA_OP_THREADS
+        options.inter_op_num_threads = 1 # moi request da chay trong executor rieng
+    # Nhieu session (embedding + reranking) chia it core: thread ranh ngu thay vi spin-wait chiem CPU
+    options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return options
+
+def _export_onnx(model_class, model_name: str, local_dir: str, backend: str, **kwargs) -> str:
+    """
+    Export model sang ONNX (va quantize int8 neu can) 1 lan, luu vao local_dir.
+    Tra ve duong dan file .onnx tuong doi voi local_dir.
+    """
+    if not os.path.exists(os.path.join(local_dir, "onnx", "model.onnx")):
+        logger.info(f"Exporting {model_name} to ONNX: {local_dir}")
+        model = model_class(model_name, device="cpu", backend="onnx", **kwargs)
+        model.save_pretrained(local_dir)
+
+    if backend == "onnx":
+        return os.path.join("onnx", "model.onnx")
+
+    pattern = os.path.join(local_dir, "onnx", f"model_q*8_{QUANTIZATION_CONFIG}.onnx")
+    if not glob.glob(pattern):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        logger.info(f"Quantizing {model_name} to int8 ({QUANTIZATION_CONFIG})")
+        model = model_class(local_dir, device="cpu", backend="onnx", model_kwargs={"file_name": os.path.join("onnx", "model.onnx")}, **kwargs)
+        export_dynamic_quantized_onnx_model(model, QUANTIZATION_CONFIG, local_dir)
+
+    return os.path.relpath(glob.glob(pattern)[0], local_dir)
+
+def load_model(model_class, model_name: str, backend: str = "torch", device: str = "cpu", cache_dir: str = MODEL_CACHE_DIR, **kwargs):
+    """
+    Load SentenceTransformer / CrossEncoder voi backend:
+        torch     : PyTorch (mac dinh)
+        onnx      : ONNX Runtime, model duoc export 1 lan va cache trong cache_dir
+        onnx-int8 : nhu onnx + dynamic quantization int8 (nhanh hon, it RAM hon tren CPU)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend} (expected one of {BACKENDS})")
+
+    if backend == "torch":
+        if TORCH_THREADS:
+            import torch
+            torch.set_num_threads(TORCH_THREADS)
+        return model_class(model_name, device=device, **kwargs)
+
+    if importlib.util.find_spec("optimum") is None or importlib.util.find_spec("onnxruntime") is None:
+        raise ImportError(f"Backend '{backend}' requires ONNX Runtime: pip install 'sentence-transformers[onnx]'")
+
+    local_dir = _local_model_dir(model_name, cache_dir)
+    file_name = _export_onnx(model_class, model_name, local_dir, backend, **kwargs)
+    logger.info(f"Loading {model_name} with ONNX Runtime: {os.path.join(local_dir, file_name)}")
+    return model_class(
+        local_dir,
+        device="cpu",
+        backend="onnx",
+        model_kwargs={"file_name": file_name, "provider": "CPUExecutionProvider", "session_options": _session_options()},
+        **kwargs,
+    )
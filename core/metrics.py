@@ -0,0 +1,153 @@
+"""
+Metrics cua process dang Prometheus text exposition format (0.0.4), khong can prometheus_client:
+Counter / Histogram co label, dang ky vao REGISTRY khi tao, render() cho endpoint /metrics.
+
+stage(name) do thoi gian 1 buoc cua request (embed, dense_search, bm25, rerank, context_build, llm, ...):
+ghi vao histogram rag_stage_duration_seconds{stage=name} va cong vao breakdown cua request hien tai
+(contextvar, bat dau bang start_trace()) de tra ve cho client khi bat metrics.debug.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from core.settings_loader import load_settings
+
+settings = load_settings()
+
+METRICS_CONFIG = settings.get("metrics", {})
+METRICS_ENABLED = METRICS_CONFIG.get("enabled", True)
+METRICS_DEBUG = METRICS_CONFIG.get("debug", False) # tra ve breakdown thoi gian tung stage trong response
+# giay: tu cache hit (~ms) toi LLM (~chuc giay)
+DEFAULT_BUCKETS = tuple(METRICS_CONFIG.get("buckets") or (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+
+REGISTRY: list = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        with self._lock:
+            samples = self._samples()
+        return "\n".join([f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}", *samples])
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED or amount <= 0:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+            state["counts"][bisect_left(self.buckets, value)] += 1 # bucket dau tien co upper bound >= value
+            state["sum"] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state["counts"]) if state else 0
+
+    def _samples(self) -> list[str]:
+        samples = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for upper, count in zip(self.buckets + (math.inf,), state["counts"]):
+                cumulative += count
+                bound = 'le="' + _format_value(upper) + '"'
+                samples.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, bound)} {cumulative}")
+            samples.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state['sum'])}")
+            samples.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return samples
+
+STAGE_DURATION = Histogram("rag_stage_duration_seconds", "Duration of each chat pipeline stage", ("stage",))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request duration", ("method", "path", "status"))
+CACHE_REQUESTS = Counter("rag_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+ERRORS = Counter("rag_errors_total", "Errors by pipeline stage", ("stage",))
+QDRANT_RETRIES = Counter("qdrant_retries_total", "Qdrant calls retried after an error", ("operation",))
+RATE_LIMITED = Counter("rate_limited_requests_total", "Requests rejected by the rate limiter", ("path",))
+
+_breakdown: ContextVar[dict | None] = ContextVar("stage_breakdown", default=None)
+
+def start_trace() -> dict:
+    """Bat dau breakdown cho request hien tai, tra ve dict stage -> giay (duoc cong don boi stage())"""
+    breakdown = {}
+    _breakdown.set(breakdown)
+    return breakdown
+
+def record_stage(name: str, seconds: float):
+    STAGE_DURATION.observe(seconds, stage=name)
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown[name] = breakdown.get(name, 0.0) + seconds # stage chay lai (vd. search lai khong filter) thi cong don
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+def breakdown_ms(breakdown: dict) -> dict:
+    return {name: round(seconds * 1000, 2) for name, seconds in breakdown.items()}
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
@@ -0,0 +1,207 @@
+"""
+Profiling theo request (opt-in, profiling.enabled): sampling profiler kieu py-spy chay trong process.
+
+Trong luc profile 1 request, 1 thread rieng lay stack cua moi thread (sys._current_frames) moi interval_ms, nen
+bao gom ca code chay trong executor (tokenizer / embedding, BM25, reranker) chu khong chi event loop nhu cProfile.
+Request chay dong thoi cung bi lay mau (stack duoc gom theo ten thread). Thread dang cho (select, Condition.wait,
+queue.get) bi bo qua.
+
+Request duoc profile khi:
+    - header X-Profile: 1 (hoac query ?profile=1) kem X-Admin-Token = profiling.admin_token
+    - lay mau 1 / sample_every request (0: tat)
+Ket qua giu trong bo nho (max_captures capture gan nhat), tai ve dang collapsed stack (flamegraph.pl, speedscope)
+hoac speedscope JSON qua /admin/profiles. Tat profiling thi middleware va router khong duoc gan: khong ton gi.
+Stack capture lo code / du lieu request nen khong co admin_token thi profiling khong duoc bat (xem api/app.py).
+"""
+import hmac
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+from core.settings_loader import load_settings
+
+settings = load_settings()
+
+PROFILING_CONFIG = settings.get("profiling", {})
+PROFILING_ENABLED = PROFILING_CONFIG.get("enabled", False)
+SAMPLE_EVERY = PROFILING_CONFIG.get("sample_every", 0) # profile 1 / N request, 0: chi profile khi co header
+INTERVAL_MS = PROFILING_CONFIG.get("interval_ms", 5)
+MAX_CAPTURES = PROFILING_CONFIG.get("max_captures", 20)
+ADMIN_TOKEN = PROFILING_CONFIG.get("admin_token") or None
+PROFILED_PATHS = tuple(PROFILING_CONFIG.get("paths") or ("/api/chat",)) # prefix
+
+# (file, function) cua frame dang block cho I/O / lock, khong phai thoi gian chay Python
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("selectors.py", "select"),
+    ("queue.py", "get"), ("thread.py", "_worker"),
+}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(ROOT):
+        filename = os.path.relpath(filename, ROOT)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename}:{code.co_firstlineno})"
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+@dataclass
+class Capture:
+    id: str
+    path: str
+    started_at: float
+    interval_ms: float
+    duration: float = 0.0
+    stacks: Counter = field(default_factory=Counter) # tuple frame (root -> leaf) -> so mau
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 1),
+            "samples": self.samples,
+        }
+
+    def collapsed(self) -> str:
+        """Moi dong 'thread;frame;...;frame so_mau' (flamegraph.pl / speedscope / inferno doc duoc)"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self) -> dict:
+        frames: dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.most_common():
+            samples.append([frames.setdefault(name, len(frames)) for name in stack])
+            weights.append(count * self.interval_ms)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.path} {self.id}",
+            "exporter": "nmk-chatbot",
+            "shared": {"frames": [{"name": name} for name in frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.path,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+class SamplingProfiler:
+    """Thread lay mau stack cua moi thread trong process cho toi khi stop()"""
+
+    def __init__(self, path: str, interval_ms: float = INTERVAL_MS):
+        self.capture = Capture(id=uuid.uuid4().hex[:12], path=path, started_at=time.time(), interval_ms=interval_ms)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._start = 0.0
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self._thread.ident or _is_idle(frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.capture.stacks[tuple(reversed(stack))] += 1
+
+    def _run(self):
+        interval = self.capture.interval_ms / 1000
+        while not self._stop.wait(interval):
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self._start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> Capture:
+        self._stop.set()
+        self._thread.join()
+        self.capture.duration = time.perf_counter() - self._start
+        return self.capture
+
+class CaptureStore:
+    """max_captures capture gan nhat, thread-safe"""
+
+    def __init__(self, max_captures: int = MAX_CAPTURES):
+        self._captures: deque[Capture] = deque(maxlen=max_captures)
+        self._lock = threading.Lock()
+
+    def add(self, capture: Capture):
+        with self._lock:
+            self._captures.append(capture)
+
+    def get(self, capture_id: str) -> Capture | None:
+        with self._lock:
+            return next((capture for capture in self._captures if capture.id == capture_id), None)
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [capture.summary() for capture in reversed(self._captures)]
+
+    def clear(self):
+        with self._lock:
+            self._captures.clear()
+
+capture_store = CaptureStore()
+
+def is_authorized(token: str | None) -> bool:
+    # Chua dat admin_token thi tu choi het, khong mo /admin/profiles cho moi client
+    return ADMIN_TOKEN is not None and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware (khong dung BaseHTTPMiddleware de profile het ca response streaming cua /api/chat/stream).
+    Request duoc profile co header X-Profile-Id de tai capture.
+    """
+
+    def __init__(self, app, sample_every: int = SAMPLE_EVERY, paths: tuple[str, ...] = PROFILED_PATHS, store: CaptureStore = capture_store):
+        self.app = app
+        self.sample_every = sample_every
+        self.paths = paths
+        self.store = store
+        self._counter = itertools.count(1)
+
+    def _should_profile(self, scope) -> bool:
+        if not scope["path"].startswith(self.paths):
+            return False
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope.get("headers", [])}
+        requested = headers.get("x-profile") == "1" or b"profile=1" in scope.get("query_string", b"").split(b"&")
+        if requested and is_authorized(headers.get("x-admin-token")):
+            return True
+        return self.sample_every > 0 and next(self._counter) % self.sample_every == 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(scope["path"]).start()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profiler.capture.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.store.add(profiler.stop())
@@ -0,0 +1,278 @@
+"""
+Rate limit theo IP cho /api/chat (thay cho list timestamp / IP trong api/routes/chat.py).
+
+Thuat toan sliding window counter: moi key chi giu so request cua window hien tai va window truoc,
+uoc luong = previous * (phan window truoc con nam trong cua so truot) + current -> O(1) moi lan kiem tra,
+bo nho co dinh moi key. Sai so so voi sliding log (list timestamp) la nho khi request phan bo deu.
+
+Backend (rate_limit.backend):
+    memory : OrderedDict trong process theo thu tu dung gan nhat, key idle (> 2 window) bi xoa dan tu dau -> O(1)
+             amortized, toi da max_keys key. Moi worker dem rieng (N worker: toi da N x limit).
+    sqlite : 1 file dung chung giua cac worker tren 1 may (moi lan kiem tra 1 transaction ngan)
+    redis  : client kieu redis-py (mget + pipeline incr / expire), dung chung giua nhieu may
+Backend sqlite / redis goi I/O blocking (khoa file, network) nen chay trong executor "rate_limit", khong chan event loop.
+Loi backend (vd. Redis mat ket noi) thi cho request di qua (fail open) va ghi log.
+
+RateLimitMiddleware la ASGI middleware: request bi tu choi tra 429 ngay, khong toi pydantic / retrieval.
+"""
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from core.executors import run_blocking
+from core.metrics import RATE_LIMITED
+from core.settings_loader import load_settings
+
+settings = load_settings()
+logger = logging.getLogger("api")
+
+RATE_LIMIT_CONFIG = settings.get("rate_limit", {})
+RATE_LIMIT_ENABLED = RATE_LIMIT_CONFIG.get("enabled", True)
+RATE_LIMIT = RATE_LIMIT_CONFIG.get("limit", 60) # so request toi da trong 1 window
+WINDOW_SECONDS = RATE_LIMIT_CONFIG.get("window_seconds", 60)
+RATE_LIMIT_BACKEND = RATE_LIMIT_CONFIG.get("backend", "memory")
+MAX_KEYS = RATE_LIMIT_CONFIG.get("max_keys", 100000)
+LIMITED_PATHS = tuple(RATE_LIMIT_CONFIG.get("paths") or ("/api/chat",)) # prefix
+TRUST_FORWARDED = RATE_LIMIT_CONFIG.get("trust_forwarded", False) # lay IP tu X-Forwarded-For (chi bat khi sau proxy)
+SQLITE_PATH = RATE_LIMIT_CONFIG.get("sqlite_path", "data/rate_limit.sqlite3")
+REDIS_URL = RATE_LIMIT_CONFIG.get("redis_url", "redis://localhost:6379/0")
+REDIS_PREFIX = RATE_LIMIT_CONFIG.get("redis_prefix", "nmk:ratelimit:")
+
+@dataclass
+class Decision:
+    allowed: bool
+    retry_after: float = 0.0 # giay, chi co nghia khi allowed=False
+
+def _estimate(previous: int, current: int, elapsed: float, window: float) -> float:
+    return previous * (1 - elapsed / window) + current
+
+def _decide(previous: int, current: int, elapsed: float, limit: int, window: float) -> Decision:
+    """Quyet dinh cho 1 request moi voi so dem window truoc / hien tai, elapsed: giay tu dau window hien tai"""
+    if _estimate(previous, current, elapsed, window) + 1 <= limit:
+        return Decision(True)
+    if current + 1 > limit or previous == 0:
+        return Decision(False, window - elapsed) # window hien tai da day: cho sang window moi
+    # Cho den khi phan window truoc con tinh giam du de them 1 request
+    fraction = 1 - (limit - 1 - current) / previous
+    return Decision(False, max(fraction * window - elapsed, 0.0))
+
+class RateLimiter(ABC):
+    """Interface chung cua cac backend"""
+
+    blocking = True # hit() lam I/O: middleware goi trong executor
+
+    def __init__(self, limit: int = RATE_LIMIT, window_seconds: float = WINDOW_SECONDS):
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    @abstractmethod
+    def hit(self, key: str) -> Decision:
+        """Dem 1 request cua key neu con trong gioi han"""
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__}
+
+class InMemoryRateLimiter(RateLimiter):
+
+    blocking = False # chi lock ngan trong process, goi thang tren event loop
+
+    def __init__(self, max_keys: int = MAX_KEYS, clock=time.time, **limits):
+        super().__init__(**limits)
+        self.max_keys = max_keys
+        self.clock = clock
+        self._keys: OrderedDict[str, list] = OrderedDict() # key -> [window index, current, previous, last_seen]
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _evict_idle(self, now: float):
+        # Key dung lau nhat nam dau OrderedDict: dung ngay khi gap key con trong 2 window gan nhat
+        idle_before = now - 2 * self.window_seconds
+        while self._keys:
+            key, state = next(iter(self._keys.items()))
+            if state[3] >= idle_before and len(self._keys) <= self.max_keys:
+                break
+            del self._keys[key]
+            self.evictions += 1
+
+    def hit(self, key: str) -> Decision:
+        now = self.clock()
+        window = math.floor(now / self.window_seconds)
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                state = self._keys[key] = [window, 0, 0, now]
+            elif state[0] != window:
+                state[2] = state[1] if state[0] == window - 1 else 0
+                state[1] = 0
+                state[0] = window
+            self._keys.move_to_end(key)
+            state[3] = now
+
+            decision = _decide(state[2], state[1], now - window * self.window_seconds, self.limit, self.window_seconds)
+            if decision.allowed:
+                state[1] += 1
+            self._evict_idle(now)
+        return decision
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "keys": len(self._keys), "evictions": self.evictions}
+
+class SQLiteRateLimiter(RateLimiter):
+    """Bang rate_limits(key, window, current, previous, updated_at), key idle bi xoa toi da 1 lan / cleanup_interval"""
+
+    def __init__(self, path: str = SQLITE_PATH, cleanup_interval: float = 60.0, clock=time.time, **limits):
+        super().__init__(**limits)
+        self.cleanup_interval = cleanup_interval
+        self.clock = clock
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL") # mat vai so dem khi mat dien la chap nhan duoc
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, window INTEGER NOT NULL, current INTEGER NOT NULL, "
+            "previous INTEGER NOT NULL, updated_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+    def hit(self, key: str) -> Decision:
+        now = self.clock()
+        window = math.floor(now / self.window_seconds)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE") # khoa ghi truoc khi doc: 2 worker khong cung dem tren so cu
+            try:
+                row = self._conn.execute("SELECT window, current, previous FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                current, previous = 0, 0
+                if row is not None:
+                    if row[0] == window:
+                        current, previous = row[1], row[2]
+                    elif row[0] == window - 1:
+                        previous = row[1]
+                decision = _decide(previous, current, now - window * self.window_seconds, self.limit, self.window_seconds)
+                self._conn.execute(
+                    "INSERT INTO rate_limits (key, window, current, previous, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET window = excluded.window, current = excluded.current, "
+                    "previous = excluded.previous, updated_at = excluded.updated_at",
+                    (key, window, current + decision.allowed, previous, now),
+                )
+                if now - self._last_cleanup >= self.cleanup_interval:
+                    self._last_cleanup = now
+                    self._conn.execute("DELETE FROM rate_limits WHERE updated_at < ?", (now - 2 * self.window_seconds,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return decision
+
+    def stats(self) -> dict:
+        with self._lock:
+            keys = self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+        return {**super().stats(), "keys": keys}
+
+    def close(self):
+        self._conn.close()
+
+class RedisRateLimiter(RateLimiter):
+    """
+    1 counter / key / window (INCR + EXPIRE 2 window trong 1 pipeline MULTI/EXEC: key khong bao gio mat TTL),
+    doc window truoc va hien tai bang 1 MGET.
+    Khong atomic giua MGET va INCR: nhieu worker dong thoi co the vuot limit vai request.
+    """
+
+    def __init__(self, client: Any, prefix: str = REDIS_PREFIX, clock=time.time, **limits):
+        super().__init__(**limits)
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    def hit(self, key: str) -> Decision:
+        now = self.clock()
+        window = math.floor(now / self.window_seconds)
+        current_key = f"{self.prefix}{key}:{window}"
+        previous, current = (int(value or 0) for value in self.client.mget([f"{self.prefix}{key}:{window - 1}", current_key]))
+        decision = _decide(previous, current, now - window * self.window_seconds, self.limit, self.window_seconds)
+        if decision.allowed:
+            pipeline = self.client.pipeline(transaction=True)
+            pipeline.incr(current_key)
+            pipeline.expire(current_key, int(2 * self.window_seconds))
+            pipeline.execute()
+        return decision
+
+def create_rate_limiter(backend: str = RATE_LIMIT_BACKEND) -> RateLimiter:
+    if backend == "memory":
+        return InMemoryRateLimiter()
+    if backend == "sqlite":
+        return SQLiteRateLimiter()
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("rate_limit.backend=redis can package redis: pip install redis") from e
+        return RedisRateLimiter(redis.Redis.from_url(REDIS_URL))
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+def client_key(scope, trust_forwarded: bool = TRUST_FORWARDED) -> str:
+    if trust_forwarded:
+        for name, value in scope.get("headers", []):
+            if name.lower() == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+class RateLimitMiddleware:
+    """ASGI middleware: request vuot gioi han toi LIMITED_PATHS nhan 429 + Retry-After"""
+
+    def __init__(self, app, limiter: RateLimiter | None = None, paths: tuple[str, ...] = LIMITED_PATHS, trust_forwarded: bool = TRUST_FORWARDED):
+        self.app = app
+        self.limiter = limiter if limiter is not None else create_rate_limiter()
+        self.paths = paths
+        self.trust_forwarded = trust_forwarded
+        logger.info(f"Rate limit: {self.limiter.limit} requests / {self.limiter.window_seconds}s per IP ({type(self.limiter).__name__})")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope, self.trust_forwarded)
+        try:
+            if self.limiter.blocking:
+                decision = await run_blocking("rate_limit", self.limiter.hit, key)
+            else:
+                decision = self.limiter.hit(key)
+        except Exception as e:
+            logger.error(f"Rate limiter error, allowing request: {e}")
+            decision = Decision(True)
+
+        if decision.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        logger.warning(f"Rate limit exceeded for IP: {key}")
+        RATE_LIMITED.inc(path=scope["path"])
+        body = json.dumps({
+            "detail": f"Tốc độ request quá nhanh. Vui lòng thử lại sau. (Max {self.limiter.limit} requests/{self.limiter.window_seconds:g}s)"
+        }, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(math.ceil(decision.retry_after), 1)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
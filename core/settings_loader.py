@@ -11,6 +11,20 @@ def load_settings():
     if os.getenv("APP_ENV"):
         settings["app"]["env"] = os.getenv("APP_ENV")
     
+    # Data overrides
+    if os.getenv("DATA_RAW_DIR"):
+        settings["data"]["raw_dir"] = os.getenv("DATA_RAW_DIR")
+    if os.getenv("DATA_PROCESSED_DIR"):
+        settings["data"]["processed_dir"] = os.getenv("DATA_PROCESSED_DIR")
+    if os.getenv("DATA_PROCESSED_FORMAT"):
+        settings["data"]["processed_format"] = os.getenv("DATA_PROCESSED_FORMAT")
+    
+    # Chunking overrides
+    if os.getenv("CHUNKING_CHUNK_SIZE"):
+        settings["chunking"]["chunk_size"] = int(os.getenv("CHUNKING_CHUNK_SIZE"))
+    if os.getenv("CHUNKING_CHUNK_OVERLAP"):
+        settings["chunking"]["chunk_overlap"] = int(os.getenv("CHUNKING_CHUNK_OVERLAP"))
+    
     # Vector database overrides
     if os.getenv("QDRANT_URL"):
         settings["vector_database"]["url"] = os.getenv("QDRANT_URL")
@@ -20,6 +34,10 @@ def load_settings():
         settings["vector_database"]["collection_name"] = os.getenv("QDRANT_COLLECTION_NAME")
     if os.getenv("QDRANT_TIMEOUT"):
         settings["vector_database"]["timeout"] = int(os.getenv("QDRANT_TIMEOUT"))
+    if os.getenv("QDRANT_UPLOAD_PARALLELISM"):
+        settings["vector_database"]["upload_parallelism"] = int(os.getenv("QDRANT_UPLOAD_PARALLELISM"))
+    if os.getenv("QDRANT_UPLOAD_MAX_RETRIES"):
+        settings["vector_database"]["upload_max_retries"] = int(os.getenv("QDRANT_UPLOAD_MAX_RETRIES"))
     
     # Embedding overrides
     if os.getenv("EMBEDDING_MODEL"):
@@ -28,6 +46,12 @@ def load_settings():
         settings["embedding"]["device"] = os.getenv("EMBEDDING_DEVICE")
     if os.getenv("EMBEDDING_BATCH_SIZE"):
         settings["embedding"]["batch_size"] = int(os.getenv("EMBEDDING_BATCH_SIZE"))
+    if os.getenv("EMBEDDING_BACKEND"):
+        settings["embedding"]["backend"] = os.getenv("EMBEDDING_BACKEND")
+    if os.getenv("EMBEDDING_MAX_BATCH_SIZE"):
+        settings["embedding"]["max_batch_size"] = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE"))
+    if os.getenv("EMBEDDING_MAX_BATCH_WAIT_MS"):
+        settings["embedding"]["max_batch_wait_ms"] = float(os.getenv("EMBEDDING_MAX_BATCH_WAIT_MS"))
     
     # LLM overrides
     if os.getenv("LLM_PROVIDER"):
@@ -40,6 +64,8 @@ def load_settings():
         settings["llm"]["temperature"] = float(os.getenv("LLM_TEMPERATURE"))
     if os.getenv("LLM_MAX_TOKENS"):
         settings["llm"]["max_tokens"] = int(os.getenv("LLM_MAX_TOKENS"))
+    if os.getenv("LLM_HISTORY_TURNS"):
+        settings["llm"]["history_turns"] = int(os.getenv("LLM_HISTORY_TURNS"))
     if os.getenv("LLM_TIMEOUT"):
         settings["llm"]["timeout"] = int(os.getenv("LLM_TIMEOUT"))
     
@@ -52,6 +78,42 @@ def load_settings():
         settings["retrieval"]["dense_weight"] = float(os.getenv("DENSE_WEIGHT"))
     if os.getenv("BM25_WEIGHT"):
         settings["retrieval"]["bm25_weight"] = float(os.getenv("BM25_WEIGHT"))
+    if os.getenv("RETRIEVAL_SCORE_FUSION"):
+        settings["retrieval"]["score_fusion"] = os.getenv("RETRIEVAL_SCORE_FUSION")
+    if os.getenv("BM25_SNAPSHOT_DIR"):
+        settings["retrieval"]["bm25_snapshot_dir"] = os.getenv("BM25_SNAPSHOT_DIR")
+    if os.getenv("KEYWORD_SEARCH"):
+        settings["retrieval"]["keyword_search"] = os.getenv("KEYWORD_SEARCH")
+    if os.getenv("RETRIEVAL_FUSION"):
+        settings["retrieval"]["fusion"] = os.getenv("RETRIEVAL_FUSION")
+    if os.getenv("RETRIEVAL_QUERY_ROUTER"):
+        settings["retrieval"]["query_router"] = os.getenv("RETRIEVAL_QUERY_ROUTER").lower() in ("1", "true", "yes")
+    
+    # Ingestion overrides
+    if "ingestion" not in settings:
+        settings["ingestion"] = {}
+    if os.getenv("INGESTION_CHUNKING_WORKERS"):
+        settings["ingestion"]["chunking_workers"] = int(os.getenv("INGESTION_CHUNKING_WORKERS"))
+    if os.getenv("INGESTION_HTML_EXTRACTOR"):
+        settings["ingestion"]["html_extractor"] = os.getenv("INGESTION_HTML_EXTRACTOR")
+    
+    # Metrics overrides
+    if "metrics" not in settings:
+        settings["metrics"] = {}
+    if os.getenv("METRICS_ENABLED"):
+        settings["metrics"]["enabled"] = os.getenv("METRICS_ENABLED").lower() in ("1", "true", "yes")
+    if os.getenv("METRICS_DEBUG"):
+        settings["metrics"]["debug"] = os.getenv("METRICS_DEBUG").lower() in ("1", "true", "yes")
+    
+    # Profiling overrides
+    if "profiling" not in settings:
+        settings["profiling"] = {}
+    if os.getenv("PROFILING_ENABLED"):
+        settings["profiling"]["enabled"] = os.getenv("PROFILING_ENABLED").lower() in ("1", "true", "yes")
+    if os.getenv("PROFILING_SAMPLE_EVERY"):
+        settings["profiling"]["sample_every"] = int(os.getenv("PROFILING_SAMPLE_EVERY"))
+    if os.getenv("PROFILING_ADMIN_TOKEN"):
+        settings["profiling"]["admin_token"] = os.getenv("PROFILING_ADMIN_TOKEN")
     
     # Reranking overrides
     if "reranking" not in settings:
@@ -62,5 +124,86 @@ def load_settings():
         settings["reranking"]["device"] = os.getenv("RERANKING_DEVICE")
     if os.getenv("RERANKING_TOP_K"):
         settings["reranking"]["top_k"] = int(os.getenv("RERANKING_TOP_K"))
+    if os.getenv("RERANKING_BACKEND"):
+        settings["reranking"]["backend"] = os.getenv("RERANKING_BACKEND")
+    if os.getenv("RERANKING_MAX_LENGTH"):
+        settings["reranking"]["max_length"] = int(os.getenv("RERANKING_MAX_LENGTH"))
+    if os.getenv("RERANKING_TRUNCATION"):
+        settings["reranking"]["truncation"] = os.getenv("RERANKING_TRUNCATION")
+    
+    # Inference backend overrides
+    if "inference" not in settings:
+        settings["inference"] = {}
+    if os.getenv("MODEL_CACHE_DIR"):
+        settings["inference"]["model_cache_dir"] = os.getenv("MODEL_CACHE_DIR")
+    if os.getenv("INTRA_OP_THREADS"):
+        settings["inference"]["intra_op_threads"] = int(os.getenv("INTRA_OP_THREADS"))
+    if os.getenv("TORCH_THREADS"):
+        settings["inference"]["torch_threads"] = int(os.getenv("TORCH_THREADS"))
+    
+    # Server overrides
+    if "server" not in settings:
+        settings["server"] = {}
+    if os.getenv("SERVER_HOST"):
+        settings["server"]["host"] = os.getenv("SERVER_HOST")
+    if os.getenv("SERVER_PORT"):
+        settings["server"]["port"] = int(os.getenv("SERVER_PORT"))
+    if os.getenv("SERVER_WORKERS"):
+        settings["server"]["workers"] = int(os.getenv("SERVER_WORKERS"))
+    if os.getenv("SERVER_PRELOAD"):
+        settings["server"]["preload"] = os.getenv("SERVER_PRELOAD").lower() in ("1", "true", "yes")
+    
+    # Concurrency overrides
+    if "concurrency" not in settings:
+        settings["concurrency"] = {}
+    if os.getenv("EMBEDDING_WORKERS"):
+        settings["concurrency"]["embedding_workers"] = int(os.getenv("EMBEDDING_WORKERS"))
+    if os.getenv("RERANKING_WORKERS"):
+        settings["concurrency"]["reranking_workers"] = int(os.getenv("RERANKING_WORKERS"))
+    if os.getenv("RATE_LIMIT_WORKERS"):
+        settings["concurrency"]["rate_limit_workers"] = int(os.getenv("RATE_LIMIT_WORKERS"))
+    if os.getenv("SESSION_WORKERS"):
+        settings["concurrency"]["session_workers"] = int(os.getenv("SESSION_WORKERS"))
+    
+    # Rate limit overrides
+    if "rate_limit" not in settings:
+        settings["rate_limit"] = {}
+    if os.getenv("RATE_LIMIT_ENABLED"):
+        settings["rate_limit"]["enabled"] = os.getenv("RATE_LIMIT_ENABLED").lower() in ("1", "true", "yes")
+    if os.getenv("RATE_LIMIT_PER_MINUTE"):
+        settings["rate_limit"]["limit"] = int(os.getenv("RATE_LIMIT_PER_MINUTE"))
+        settings["rate_limit"]["window_seconds"] = 60
+    if os.getenv("RATE_LIMIT_BACKEND"):
+        settings["rate_limit"]["backend"] = os.getenv("RATE_LIMIT_BACKEND")
+    if os.getenv("RATE_LIMIT_TRUST_FORWARDED"):
+        settings["rate_limit"]["trust_forwarded"] = os.getenv("RATE_LIMIT_TRUST_FORWARDED").lower() in ("1", "true", "yes")
+    if os.getenv("RATE_LIMIT_REDIS_URL"):
+        settings["rate_limit"]["redis_url"] = os.getenv("RATE_LIMIT_REDIS_URL")
+    
+    # Session store overrides
+    if "sessions" not in settings:
+        settings["sessions"] = {}
+    if os.getenv("SESSIONS_BACKEND"):
+        settings["sessions"]["backend"] = os.getenv("SESSIONS_BACKEND")
+    if os.getenv("SESSIONS_TTL_SECONDS"):
+        settings["sessions"]["ttl_seconds"] = float(os.getenv("SESSIONS_TTL_SECONDS"))
+    if os.getenv("SESSIONS_MAX_TURNS"):
+        settings["sessions"]["max_turns"] = int(os.getenv("SESSIONS_MAX_TURNS"))
+    if os.getenv("SESSIONS_SQLITE_PATH"):
+        settings["sessions"]["sqlite_path"] = os.getenv("SESSIONS_SQLITE_PATH")
+    if os.getenv("SESSIONS_REDIS_URL"):
+        settings["sessions"]["redis_url"] = os.getenv("SESSIONS_REDIS_URL")
+    
+    # Answer cache overrides
+    if "cache" not in settings:
+        settings["cache"] = {}
+    if os.getenv("ANSWER_CACHE_ENABLED"):
+        settings["cache"]["enabled"] = os.getenv("ANSWER_CACHE_ENABLED").lower() in ("1", "true", "yes")
+    if os.getenv("ANSWER_CACHE_TTL_SECONDS"):
+        settings["cache"]["ttl_seconds"] = float(os.getenv("ANSWER_CACHE_TTL_SECONDS"))
+    if os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD"):
+        settings["cache"]["similarity_threshold"] = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD"))
+    if os.getenv("ANSWER_CACHE_VERSION_FILE"):
+        settings["cache"]["version_file"] = os.getenv("ANSWER_CACHE_VERSION_FILE")
     
     return settings
\ No newline at end of file
@@ -4,8 +4,10 @@ from typing import Optional
 from qdrant_client import QdrantClient
 from embedding.sparse_embedder import SparseEmbedder
 from scoring.bm25 import BM25
+from scoring.bm25_snapshot import load_bm25_snapshot, load_sparse_embedder, save_bm25_snapshot, sparse_vectors_match
 from reranking.reranker import CrossEncoderReranker
 from reranking.models.cross_encoder import CrossEncoderModel
+from reranking.service import RerankingService
 from vectorstore.qdrant import get_qdrant_client
 from vectorstore.hybrid_index import init_sparse_embedder
 from core.settings_loader import load_settings
@@ -17,21 +19,60 @@ COLLECTION_NAME = settings["vector_database"]["collection_name"]
 RERANKER_CONFIG = settings.get("reranking", {})
 RERANKER_MODEL = RERANKER_CONFIG.get("model", "cross-encoder/ms-marco-MiniLM-L-6-v2")
 RERANKER_DEVICE = RERANKER_CONFIG.get("device", "cpu")
+RERANKER_MAX_LENGTH = RERANKER_CONFIG.get("max_length")
+RERANKER_TRUNCATION = RERANKER_CONFIG.get("truncation", "longest_first")
+RERANKER_BACKEND = RERANKER_CONFIG.get("backend", "torch")
 
 _sparse_embedder: Optional[SparseEmbedder] = None
 _bm25: Optional[BM25] = None
 _reranker: Optional[CrossEncoderReranker] = None
+_reranking_service: Optional[RerankingService] = None
+_sparse_search_ready = False # sparse vector trong Qdrant va _sparse_embedder cung vocabulary -> query duoc "sparse" named vector
 _initialized = False
 
+def _scroll_corpus(client: QdrantClient) -> tuple[list[str], list[str]]:
+    """Scroll toan bo collection, tra ve (texts, point ids) cua cac point co text"""
+    documents_texts = []
+    document_ids = []
+    offset = None
+    batch_size = 100
+    
+    while True:
+        result = client.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False  # Don't need vectors, only texts
+        )
+        
+        points, next_offset = result
+        
+        if not points:
+            break
+        
+        for point in points:
+            text = point.payload.get("text", "")
+            if text:
+                documents_texts.append(text)
+                document_ids.append(str(point.id))
+        
+        if next_offset is None:
+            break
+            
+        offset = next_offset
+    
+    return documents_texts, document_ids
+
 def initialize_rag_components():
     """
     Initialize all RAG components at startup:
-    1. Load corpus from Qdrant
-    2. Fit SparseEmbedder
-    3. Initialize BM25
+    1. Load BM25 snapshot (mmap), neu khong khop collection thi load corpus tu Qdrant
+    2. Load sparse model cua ingestion (fit lai neu collection khong co sparse model khop)
+    3. Initialize BM25 (va ghi snapshot cho lan start sau)
     4. Initialize Reranker
     """
-    global _sparse_embedder, _bm25, _reranker, _initialized
+    global _sparse_embedder, _bm25, _reranker, _reranking_service, _sparse_search_ready, _initialized
     
     if _initialized:
         logger.info("RAG components already initialized")
@@ -42,68 +83,73 @@ def initialize_rag_components():
         }
     
     try:
-        # Step 1: Load corpus from Qdrant
-        logger.info("Step 1: Loading corpus from Qdrant...")
         client: QdrantClient = get_qdrant_client()
         
         try:
-            # Scroll through all documents in collection
-            documents_texts = []
-            offset = None
-            batch_size = 100
-            
-            while True:
-                result = client.scroll(
-                    collection_name=COLLECTION_NAME,
-                    limit=batch_size,
-                    offset=offset,
-                    with_payload=True,
-                    with_vectors=False  # Don't need vectors, only texts
-                )
-                
-                points, next_offset = result
-                
-                if not points:
-                    break
+            _bm25 = load_bm25_snapshot(client)
+        except Exception as e:
+            logger.warning(f"Failed to load BM25 snapshot, rebuilding from Qdrant: {e}")
+            _bm25 = None
+        
+        if _bm25 is not None:
+            _sparse_embedder = _bm25.sparse_embedder
+            init_sparse_embedder(_sparse_embedder)
+            _sparse_search_ready = sparse_vectors_match(client, _sparse_embedder.version)
+            logger.info(f"Steps 1-3: BM25 snapshot loaded, vocabulary size: {len(_sparse_embedder.vocabulary)}")
+        else:
+            # Step 1: Load corpus from Qdrant
+            logger.info("Step 1: Loading corpus from Qdrant...")
+            try:
+                documents_texts, document_ids = _scroll_corpus(client)
                 
-                for point in points:
-                    text = point.payload.get("text", "")
-                    if text:
-                        documents_texts.append(text)
+                if not documents_texts:
+                    logger.warning("No documents found in Qdrant collection. Components will not be initialized.")
+                    return None
                 
-                if next_offset is None:
-                    break
-                    
-                offset = next_offset
+                logger.info(f"Loaded {len(documents_texts)} documents from corpus")
             
-            if not documents_texts:
-                logger.warning("No documents found in Qdrant collection. Components will not be initialized.")
+            except Exception as e:
+                logger.error(f"Failed to load corpus from Qdrant: {e}")
+                logger.warning("Continuing without BM25 and reranker initialization")
                 return None
             
-            logger.info(f"Loaded {len(documents_texts)} documents from corpus")
-        
-        except Exception as e:
-            logger.error(f"Failed to load corpus from Qdrant: {e}")
-            logger.warning("Continuing without BM25 and reranker initialization")
-            return None
-        
-        # Step 2: Initialize SparseEmbedder
-        logger.info("Step 2: Fitting SparseEmbedder with corpus...")
-        _sparse_embedder = SparseEmbedder()
-        _sparse_embedder.fit(documents_texts)
-        init_sparse_embedder(_sparse_embedder)
-        logger.info(f"SparseEmbedder fitted with vocabulary size: {len(_sparse_embedder.vocabulary)}")
-        
-        # Step 3: Initialize BM25
-        logger.info("Step 3: Initializing BM25 scorer...")
-        _bm25 = BM25(_sparse_embedder, k1=1.5, b=0.75)
-        _bm25.compute_average_document_length(documents_texts)
-        logger.info(f"BM25 initialized with avg doc length: {_bm25.average_document_length:.2f}")
+            # Step 2: Initialize SparseEmbedder
+            # Dung nguyen ven sparse model da encode sparse vector luc ingestion (cung term id + idf),
+            # chi fit lai khi collection khong duoc ingest bang sparse model da luu
+            try:
+                _sparse_embedder = load_sparse_embedder()
+            except Exception as e:
+                logger.warning(f"Failed to load persisted sparse model: {e}")
+                _sparse_embedder = None
+            _sparse_search_ready = _sparse_embedder is not None and sparse_vectors_match(client, _sparse_embedder.version)
+            
+            if _sparse_search_ready:
+                logger.info(f"Step 2: Using persisted sparse model {_sparse_embedder.version}")
+            else:
+                logger.warning("Step 2: No persisted sparse model matches the collection, fitting SparseEmbedder with corpus (stored sparse vectors may use other term ids)")
+                _sparse_embedder = SparseEmbedder()
+                _sparse_embedder.fit(documents_texts)
+            init_sparse_embedder(_sparse_embedder)
+            logger.info(f"SparseEmbedder ready with vocabulary size: {len(_sparse_embedder.vocabulary)}")
+            
+            # Step 3: Initialize BM25 (build inverted index 1 lan, request path chi con lookup postings)
+            logger.info("Step 3: Building BM25 index...")
+            _bm25 = BM25(_sparse_embedder, k1=1.5, b=0.75)
+            _bm25.build_index(documents_texts, document_ids)
+            logger.info(f"BM25 initialized with avg doc length: {_bm25.average_document_length:.2f}")
+            
+            try:
+                save_bm25_snapshot(_bm25, documents_texts) # lan start sau mmap snapshot thay vi scroll lai
+            except OSError as e:
+                logger.warning(f"Failed to save BM25 snapshot: {e}")
         
         # Step 4: Initialize Reranker
         logger.info("Step 4: Initializing CrossEncoder Reranker...")
-        cross_encoder = CrossEncoderModel(RERANKER_MODEL, device=RERANKER_DEVICE)
+        cross_encoder = CrossEncoderModel(
+            RERANKER_MODEL, device=RERANKER_DEVICE, max_length=RERANKER_MAX_LENGTH, truncation=RERANKER_TRUNCATION, backend=RERANKER_BACKEND
+        )
         _reranker = CrossEncoderReranker(cross_encoder)
+        _reranking_service = RerankingService(cross_encoder) # request path: score cache + micro-batching
         logger.info(f"Reranker initialized with model: {RERANKER_MODEL}")
         
         _initialized = True
@@ -127,6 +173,12 @@ def get_bm25() -> Optional[BM25]:
 def get_reranker() -> Optional[CrossEncoderReranker]:
     return _reranker
 
+def get_reranking_service() -> Optional[RerankingService]:
+    return _reranking_service
+
+def is_sparse_search_ready() -> bool:
+    return _sparse_search_ready
+
 def get_initialization_status() -> dict:
     return {
         "initialized": _initialized,
@@ -134,5 +186,7 @@ def get_initialization_status() -> dict:
         "bm25": _bm25 is not None,
         "reranker": _reranker is not None,
         "vocabulary_size": len(_sparse_embedder.vocabulary) if _sparse_embedder else 0,
+        "sparse_model_version": _sparse_embedder.version if _sparse_embedder else None,
+        "sparse_search_ready": _sparse_search_ready,
         "avg_doc_length": _bm25.average_document_length if _bm25 else 0.0
     }
@@ -1,6 +1,7 @@
 import logging
 from sentence_transformers import SentenceTransformer
 
+from core.inference import load_model
 from core.settings_loader import load_settings
 
 settings = load_settings()
@@ -8,14 +9,15 @@ logger = logging.getLogger("embedding")
 
 EMBEDDING_CONFIG = settings["embedding"]
 EMBEDDING_MODEL = EMBEDDING_CONFIG["model"]
+EMBEDDING_BACKEND = EMBEDDING_CONFIG.get("backend", "torch")
 
 _model = None
 
 def get_model() -> SentenceTransformer:
     global _model # ghi vao bien toan cuc
     if _model is None: # neu chua co model thi load, chi load 1 lan
-        logger.info(f"Loading embedding model: {EMBEDDING_MODEL}")
-        _model = SentenceTransformer(EMBEDDING_MODEL, device=EMBEDDING_CONFIG.get("device", "cpu"))
+        logger.info(f"Loading embedding model: {EMBEDDING_MODEL} (backend={EMBEDDING_BACKEND})")
+        _model = load_model(SentenceTransformer, EMBEDDING_MODEL, EMBEDDING_BACKEND, device=EMBEDDING_CONFIG.get("device", "cpu"))
     return _model
 
 def embed_texts(texts: list[str]) -> list[list[float]]:
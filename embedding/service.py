@@ -0,0 +1,70 @@
+import asyncio
+import logging
+
+from cache.lru import LRUCache
+from cache.semantic_cache import normalize_query
+from core.batching import MicroBatcher
+from core.metrics import CACHE_REQUESTS
+from core.settings_loader import load_settings
+from embedding.embedder import embed_texts
+
+settings = load_settings()
+logger = logging.getLogger("embedding")
+
+EMBEDDING_CONFIG = settings["embedding"]
+QUERY_CACHE_SIZE = EMBEDDING_CONFIG.get("query_cache_size", 2048)
+MAX_BATCH_SIZE = EMBEDDING_CONFIG.get("max_batch_size", 32)
+MAX_BATCH_WAIT_MS = EMBEDDING_CONFIG.get("max_batch_wait_ms", 5)
+
+class EmbeddingService:
+    """
+    Embed query cho request path:
+        - LRU cache normalized query -> vector (cau hoi lap lai khong can goi model)
+        - MicroBatcher gom cac query dong thoi thanh 1 lan encode (batch-of-N thay vi N lan batch-of-1)
+    """
+
+    def __init__(self, query_cache_size: int = QUERY_CACHE_SIZE, max_batch_size: int = MAX_BATCH_SIZE, max_batch_wait_ms: float = MAX_BATCH_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait_ms = max_batch_wait_ms
+        self.query_cache = LRUCache(max_entries=query_cache_size)
+        self._batcher: MicroBatcher | None = None
+
+    def _get_batcher(self) -> MicroBatcher:
+        # Batcher gan voi event loop hien tai
+        if self._batcher is None or self._batcher.loop is not asyncio.get_running_loop():
+            self._batcher = MicroBatcher(embed_texts, "embedding", self.max_batch_size, self.max_batch_wait_ms)
+        return self._batcher
+
+    async def embed_query(self, query: str) -> list[float]:
+        key = normalize_query(query)
+        vector = self.query_cache.get(key)
+        CACHE_REQUESTS.inc(cache="query_embedding", result="miss" if vector is None else "hit")
+        if vector is None:
+            vector = await self._get_batcher().submit(query.strip()) # embed cau goc, key chi dung de tra cache
+            self.query_cache.set(key, vector)
+        return vector
+
+    def embed_query_sync(self, query: str) -> list[float]:
+        """Cho code sync (CLI), dung chung cache nhung khong batch"""
+        key = normalize_query(query)
+        vector = self.query_cache.get(key)
+        CACHE_REQUESTS.inc(cache="query_embedding", result="miss" if vector is None else "hit")
+        if vector is None:
+            vector = embed_texts([query.strip()])[0]
+            self.query_cache.set(key, vector)
+        return vector
+
+    def stats(self) -> dict:
+        stats = {"query_cache": self.query_cache.stats()}
+        if self._batcher is not None:
+            stats["batching"] = self._batcher.stats()
+        return stats
+
+_service: EmbeddingService | None = None
+
+def get_embedding_service() -> EmbeddingService:
+    global _service
+    if _service is None:
+        logger.info(f"Creating embedding service: cache {QUERY_CACHE_SIZE} queries, batch <= {MAX_BATCH_SIZE} / {MAX_BATCH_WAIT_MS} ms")
+        _service = EmbeddingService()
+    return _service
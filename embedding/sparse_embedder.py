@@ -1,6 +1,7 @@
 import math
 import logging
 import re
+import uuid
 from collections import Counter
 
 logger = logging.getLogger("embedding")
@@ -21,6 +22,7 @@ class SparseEmbedder:
         self.vocabulary: dict[str, int] = {} # Tu dien de luu tru cac token va chi so tuong ung cua chung
         self.document_frequency: Counter = Counter() # Dem so luong van ban chua token do
         self.num_documents = 0 # Tong so van ban da duoc su dung de fit model
+        self.version: str | None = None # Id cua lan fit, ghi vao payload moi point de biet sparse vector trong Qdrant dung vocabulary nao
     
     def __update_vocabulary(self, tokens: list[str]): # Dùng để xây dựng vocabulary và document frequency
         """
@@ -72,6 +74,7 @@ class SparseEmbedder:
                 Cập nhật vocabulary và document frequency với tokens trên
         """
         self.num_documents = len(texts) # Cap nhat tong so van ban, tuc la tong cac chunk trong texts
+        self.version = uuid.uuid4().hex # moi lan fit la 1 vocabulary / idf moi
         for text in texts: 
             tokens = tokenize(text) # Tach van ban thanh cac token
             self.__update_vocabulary(tokens) # Cap nhat tu dien va dem tan so van ban
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark BM25 tren request path: score(query, text) cu vs inverted index.
+
+    python -m evaluation.bench_bm25 --documents 5000 --candidates 30 --queries 500
+"""
+import argparse
+import random
+import time
+
+from embedding.sparse_embedder import SparseEmbedder
+from scoring.bm25 import BM25
+
+SYLLABLES = [
+    "nha", "pho", "biet", "thu", "can", "ho", "noi", "that", "kien", "truc", "hien", "dai", "dong", "duong",
+    "phong", "cach", "du", "an", "thiet", "ke", "quan", "huyen", "sai", "gon", "ha", "noi", "go", "da",
+    "tran", "tuong", "san", "vuon", "ban", "cong", "cua", "so", "anh", "sang", "mau", "trang", "xam", "nau",
+]
+
+def make_corpus(num_documents: int, average_length: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    vocabulary = SYLLABLES + [f"{a}{b}" for a in SYLLABLES for b in SYLLABLES[:20]]
+    return [
+        " ".join(rng.choice(vocabulary) for _ in range(max(1, int(rng.gauss(average_length, average_length / 3)))))
+        for _ in range(num_documents)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 per-request cost before/after inverted index")
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--average-length", type=int, default=120)
+    parser.add_argument("--candidates", type=int, default=30, help="so candidate moi request (TOP_K * 3)")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.documents, args.average_length)
+    document_ids = [str(i) for i in range(len(corpus))]
+    rng = random.Random(7)
+    queries = [" ".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 8))) for _ in range(args.queries)]
+    candidate_sets = [rng.sample(range(len(corpus)), args.candidates) for _ in range(args.queries)]
+
+    sparse_embedder = SparseEmbedder()
+    sparse_embedder.fit(corpus)
+    bm25 = BM25(sparse_embedder)
+
+    start = time.perf_counter()
+    bm25.build_index(corpus, document_ids)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query, candidates in zip(queries, candidate_sets):
+        bm25.score_batch(query, [corpus[i] for i in candidates])
+    before = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    for query, candidates in zip(queries, candidate_sets):
+        bm25.score_indexed(query, [document_ids[i] for i in candidates])
+    after = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    for query in queries:
+        bm25.score_all(query)
+    full_corpus = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    for query in queries:
+        bm25.search(query, args.candidates)
+    search = (time.perf_counter() - start) / len(queries)
+
+    print(f"corpus: {args.documents} documents, avg {args.average_length} tokens, {args.candidates} candidates/request")
+    print(f"index build (startup, once): {build_seconds * 1000:.1f} ms")
+    print(f"score() per request (tokenize text):  {before * 1000:.3f} ms")
+    print(f"score_indexed() per request (postings): {after * 1000:.3f} ms  ({before / after:.1f}x)")
+    print(f"score_all() whole corpus per request: {full_corpus * 1000:.3f} ms")
+    print(f"search() CSR mat-vec + argpartition top-{args.candidates}: {search * 1000:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+split_paragraphs cu (cat theo ". " va so ky tu, slice chuoi lap lai) vs TokenChunker (so token, 1 lan tokenize):
+thoi gian, so chunk, so token lon nhat / chunk va so chunk vuot max sequence length cua model.
+
+Token duoc dem bang tokenizer cua embedding model neu load duoc (can mang / cache HF), nguoc lai xap xi theo tu:
+    python -m evaluation.bench_chunking --documents 2000 --sentences 40
+"""
+import argparse
+import random
+import time
+
+from evaluation.bench_bm25 import SYLLABLES
+from ingestion.helpers.split_paragraphs import TokenChunker, load_tokenizer
+
+def split_paragraphs_old(text, max_len=400):
+    """Ban cu cua ingestion.helpers.split_paragraphs (de so sanh)"""
+    sentences = text.split(". ")
+    out = []
+    buf = ""
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > max_len:
+            cut = sentence.rfind(". ", 0, max_len)
+            if cut == -1:
+                cut = max_len
+            chunk = sentence[:cut].strip()
+            if chunk:
+                out.append(chunk)
+            sentence = sentence[cut:].strip()
+        if len(buf) + len(sentence) + 2 <= max_len:
+            buf += sentence + ". "
+        else:
+            out.append(buf.strip())
+            buf = sentence + ". "
+    if buf:
+        out.append(buf.strip())
+    return out
+
+def make_documents(num_documents: int, sentences: int, seed: int = 2) -> list[str]:
+    rng = random.Random(seed)
+    sentence = lambda: " ".join(rng.choice(SYLLABLES) for _ in range(rng.randint(5, 40))).capitalize() + rng.choice(".!?…")
+    return [" ".join(sentence() for _ in range(sentences)) + ("\n" if rng.random() < 0.3 else "") for _ in range(num_documents)]
+
+def run(label: str, split, documents: list[str], chunker: TokenChunker):
+    start = time.perf_counter()
+    chunks = [chunk for document in documents for chunk in split(document)]
+    elapsed = time.perf_counter() - start
+    lengths = [chunker.count_tokens(chunk) for chunk in chunks]
+    over = sum(length > chunker.chunk_size for length in lengths)
+    print(f"{label:<34} {elapsed * 1000:>9.1f} ms  chunks={len(chunks):>6}  avg tokens={sum(lengths) / len(lengths):>6.1f}  max tokens={max(lengths):>5}  over limit={over}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Old character splitter vs token-aware chunker")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--sentences", type=int, default=40)
+    parser.add_argument("--long-text-chars", type=int, default=2_000_000, help="1 text khong co '. ' (truong hop xau cua ban cu)")
+    args = parser.parse_args()
+
+    chunker = TokenChunker(load_tokenizer())
+    print(f"tokenizer={type(chunker.tokenizer).__name__} chunk_size={chunker.chunk_size} overlap={chunker.chunk_overlap}")
+
+    documents = make_documents(args.documents, args.sentences)
+    run("old (chars, '. ')", split_paragraphs_old, documents, chunker)
+    run("token chunker", chunker.split, documents, chunker)
+
+    long_text = ("nhà phố " * (args.long_text_chars // 8))
+    run("old, 1 text without '. '", split_paragraphs_old, [long_text], chunker)
+    run("token chunker, 1 text without '. '", chunker.split, [long_text], chunker)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Throughput embedding query tren request path: embed_texts([query]) moi request (cu) vs EmbeddingService (micro-batching).
+
+Mac dinh dung 1 Transformer encoder khoi tao ngau nhien co kich thuoc giong multilingual-e5-small
+(12 layer, hidden 384, FFN 1536) de chay offline; --model de dung model that:
+    python -m evaluation.bench_embedding --concurrency 1 8 32 64 --requests 256
+    python -m evaluation.bench_embedding --model intfloat/multilingual-e5-small
+
+Query deu khac nhau nen LRU query cache khong anh huong ket qua (chi do batching).
+"""
+import argparse
+import asyncio
+import time
+import zlib
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import embedding.embedder as embedder
+from core.executors import run_blocking
+from embedding.embedder import embed_texts
+from embedding.service import EmbeddingService
+from evaluation.load_test import QUESTIONS, percentile
+
+class RandomEncoder:
+    """Transformer encoder ngau nhien, cung kich thuoc e5-small, tokenize gia bang hash tung tu"""
+
+    def __init__(self, layers: int = 12, hidden: int = 384, heads: int = 12, ffn: int = 1536, vocabulary: int = 30000, max_tokens: int = 512):
+        import torch
+        self.torch = torch
+        self.vocabulary = vocabulary
+        self.max_tokens = max_tokens
+        self.embeddings = torch.nn.Embedding(vocabulary, hidden)
+        layer = torch.nn.TransformerEncoderLayer(hidden, heads, ffn, batch_first=True)
+        self.encoder = torch.nn.TransformerEncoder(layer, layers).eval()
+
+    def encode(self, texts, normalize_embeddings=True, convert_to_tensor=False, **kwargs):
+        torch = self.torch
+        token_ids = [([zlib.crc32(word.encode()) % self.vocabulary for word in text.split()] * 2)[:self.max_tokens] for text in texts] # ~2 subword / tu
+        length = max(len(ids) for ids in token_ids)
+        padded = torch.zeros((len(texts), length), dtype=torch.long)
+        mask = torch.ones((len(texts), length), dtype=torch.bool)
+        for i, ids in enumerate(token_ids):
+            padded[i, :len(ids)] = torch.tensor(ids)
+            mask[i, :len(ids)] = False
+
+        with torch.inference_mode():
+            hidden = self.encoder(self.embeddings(padded), src_key_padding_mask=mask)
+            keep = (~mask).unsqueeze(-1).float()
+            pooled = (hidden * keep).sum(1) / keep.sum(1) # mean pooling giong e5
+            if normalize_embeddings:
+                pooled = torch.nn.functional.normalize(pooled, dim=-1)
+        return pooled.numpy()
+
+async def run_level(embed, queries: list[str], concurrency: int) -> dict:
+    latencies = []
+    iterator = iter(queries)
+
+    async def user():
+        for query in iterator:
+            start = time.perf_counter()
+            await embed(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "queries_per_second": len(queries) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+async def main_async(args):
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model, device="cpu")
+    else:
+        model = SimpleNamespace(encode=RandomEncoder().encode)
+
+    with patch.object(embedder, "_model", model):
+        await asyncio.to_thread(embed_texts, ["warm up"])
+
+        for concurrency in args.concurrency:
+            queries = [f"{QUESTIONS[i % len(QUESTIONS)]} {i}" for i in range(max(args.requests, concurrency))]
+
+            async def direct(query):
+                return await run_blocking("embedding", embed_texts, [query])
+            before = await run_level(direct, queries, concurrency)
+
+            service = EmbeddingService(query_cache_size=len(queries), max_batch_size=args.max_batch_size, max_batch_wait_ms=args.max_wait_ms)
+            after = await run_level(service.embed_query, queries, concurrency)
+            batching = service.stats()["batching"]
+
+            print(
+                f"users={concurrency:>3}  per-request qps={before['queries_per_second']:>7.1f} p50={before['p50_ms']:>7.1f} ms  |  "
+                f"batched qps={after['queries_per_second']:>7.1f} p50={after['p50_ms']:>7.1f} ms "
+                f"p99={after['p99_ms']:>7.1f} ms avg batch={batching['average_batch_size']:>5.1f}  "
+                f"({after['queries_per_second'] / before['queries_per_second']:.2f}x)"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="Query embedding throughput: per-request encode vs micro-batching")
+    parser.add_argument("--model", help="ten SentenceTransformer model (mac dinh: encoder ngau nhien kich thuoc e5-small)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
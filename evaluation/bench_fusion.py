@@ -0,0 +1,145 @@
+"""
+Hybrid retrieval: blend dense + BM25 trong Python (keyword_search local / qdrant, theo tung score_fusion) vs fuse tren
+Qdrant (RRF / DBSF, 1 query_points voi prefetch dense + sparse): latency / query, recall@k va MRR tren 1 bo query co nhan.
+recall@k voi k nho hon top_k cho biet co the giam so candidate dua vao CrossEncoder reranker ma khong mat recall.
+
+Bo query tong hop: moi query lay 1 so tu cua 1 chunk (nhan = chunk do), 1 phan query co them ma rieng cua chunk
+(vd. ma du an) ma dense model "khong hieu", 1 phan query viet lai bang tu dong nghia ("z" + tu) ma BM25 khong match
+nhung dense model hieu. Dense embedding gia lap bang tong vector ngau nhien cua cac tu + nhieu. Qdrant chay in-memory (local mode) nen latency
+khong dai dien cho server (khong co network, khong HNSW), chi de so sanh tuong doi:
+    python -m evaluation.bench_fusion --documents 3000 --queries 300 --dense-weight 0.4 --bm25-weight 0.6
+"""
+import argparse
+import random
+import time
+import uuid
+import zlib
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SparseVector
+
+from embedding.sparse_embedder import SparseEmbedder
+from evaluation.bench_bm25 import make_corpus
+from retrieval import hybrid_retriever
+from scoring.bm25 import BM25
+from vectorstore import qdrant
+from vectorstore.qdrant import COLLECTION_NAME, VECTOR_SIZE
+
+MODES = {
+    **{
+        f"blend local, {score_fusion}": {"FUSION": "none", "KEYWORD_SEARCH": "local", "SCORE_FUSION": score_fusion}
+        for score_fusion in ("weighted", "minmax", "zscore", "rrf")
+    },
+    "blend qdrant, zscore": {"FUSION": "none", "KEYWORD_SEARCH": "qdrant", "SCORE_FUSION": "zscore"},
+    "fusion=rrf": {"FUSION": "rrf"},
+    "fusion=dbsf": {"FUSION": "dbsf"},
+}
+
+POOL_SIZES = (1, 3, 5) # so candidate dua vao reranker (+ top_k)
+
+class HashingEncoder:
+    """Dense model gia lap: vector ngau nhien co dinh cho moi tu, embedding = tong + nhieu, chuan hoa"""
+
+    def __init__(self, noise: float, seed: int = 11):
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+
+    def _word(self, word: str) -> np.ndarray:
+        word = word.removeprefix("z") # tu dong nghia co cung nghia
+        return np.random.default_rng(zlib.crc32(word.encode())).standard_normal(VECTOR_SIZE)
+
+    def encode(self, text: str) -> list[float]:
+        words = text.split()
+        vector = sum(self._word(word) for word in words) / np.sqrt(len(words))
+        vector = vector + self.noise * self.rng.standard_normal(VECTOR_SIZE)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+def make_queries(corpus: list[str], num_queries: int, code_ratio: float, paraphrase_ratio: float, seed: int = 5) -> list[tuple[str, int]]:
+    rng = random.Random(seed)
+    queries = []
+    for label in rng.sample(range(len(corpus)), num_queries):
+        words = corpus[label].split()[:-1] # bo ma chunk
+        query = rng.sample(words, min(len(words), rng.randint(3, 6)))
+        kind = rng.random()
+        if kind < code_ratio:
+            query.append(f"nmk{label}")
+        elif kind < code_ratio + paraphrase_ratio:
+            query = [f"z{word}" if rng.random() < 0.8 else word for word in query]
+        queries.append((" ".join(query), label))
+    return queries
+
+def run(label: str, overrides: dict, queries: list[tuple[str, int]], ids: list[str], bm25: BM25, encoder: HashingEncoder):
+    query_vectors = {query: encoder.encode(query) for query, _ in queries}
+    embedding_service = SimpleNamespace(embed_query_sync=lambda query: query_vectors[query])
+    patchers = [patch.object(hybrid_retriever, name, value) for name, value in overrides.items()] + [
+        patch.object(hybrid_retriever, "get_embedding_service", return_value=embedding_service),
+        patch.object(hybrid_retriever, "route_types", return_value=None), # query tong hop khong co intent
+    ]
+    for patcher in patchers:
+        patcher.start()
+    try:
+        pool_sizes = sorted({k for k in POOL_SIZES if k < hybrid_retriever.TOP_K} | {hybrid_retriever.TOP_K})
+        hits = dict.fromkeys(pool_sizes, 0)
+        reciprocal_ranks = 0.0
+        start = time.perf_counter()
+        for query, document in queries:
+            result_ids = [result.id for result in hybrid_retriever.hybrid_retrieve(query, bm25)]
+            if ids[document] in result_ids:
+                rank = result_ids.index(ids[document]) + 1
+                reciprocal_ranks += 1 / rank
+                for k in pool_sizes:
+                    hits[k] += rank <= k
+        elapsed = time.perf_counter() - start
+    finally:
+        for patcher in patchers:
+            patcher.stop()
+    recalls = "  ".join(f"recall@{k}={hits[k] / len(queries):.3f}" for k in pool_sizes)
+    print(f"{label:<24} {elapsed / len(queries) * 1000:>8.2f} ms/query  {recalls}  MRR={reciprocal_ranks / len(queries):.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Python-side blend vs Qdrant server-side fusion (RRF / DBSF)")
+    parser.add_argument("--documents", type=int, default=3000)
+    parser.add_argument("--average-length", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--code-ratio", type=float, default=0.3, help="ti le query co ma rieng cua chunk")
+    parser.add_argument("--paraphrase-ratio", type=float, default=0.3, help="ti le query viet lai bang tu dong nghia")
+    parser.add_argument("--noise", type=float, default=1.0, help="nhieu cua dense embedding (cang lon dense cang kem)")
+    parser.add_argument("--dense-weight", type=float, default=hybrid_retriever.DENSE_WEIGHT)
+    parser.add_argument("--bm25-weight", type=float, default=hybrid_retriever.BM25_WEIGHT)
+    args = parser.parse_args()
+
+    corpus = [f"{text} nmk{i}" for i, text in enumerate(make_corpus(args.documents, args.average_length))]
+    ids = [str(uuid.uuid4()) for _ in corpus]
+    queries = make_queries(corpus, args.queries, args.code_ratio, args.paraphrase_ratio)
+
+    sparse_embedder = SparseEmbedder()
+    sparse_embedder.fit(corpus)
+    bm25 = BM25(sparse_embedder)
+    bm25.build_index(corpus, ids)
+
+    encoder = HashingEncoder(args.noise)
+    client = QdrantClient(":memory:")
+    qdrant.ensure_collection(client)
+    for start in range(0, len(corpus), 256):
+        client.upsert(COLLECTION_NAME, points=[
+            PointStruct(
+                id=ids[i],
+                vector={"dense": encoder.encode(corpus[i]), "sparse": SparseVector(**sparse_embedder.encode(corpus[i]))},
+                payload={"text": corpus[i], "type": "project"},
+            )
+            for i in range(start, min(start + 256, len(corpus)))
+        ])
+
+    print(f"documents={len(corpus)} queries={len(queries)} top_k={hybrid_retriever.TOP_K} bm25_candidates={hybrid_retriever.BM25_CANDIDATES} dense_weight={args.dense_weight} bm25_weight={args.bm25_weight}")
+    with patch.object(hybrid_retriever, "get_qdrant_client", return_value=client), \
+            patch.object(hybrid_retriever, "DENSE_WEIGHT", args.dense_weight), \
+            patch.object(hybrid_retriever, "BM25_WEIGHT", args.bm25_weight), \
+            patch.object(hybrid_retriever, "is_sparse_search_ready", return_value=True):
+        for label, overrides in MODES.items():
+            run(label, overrides, queries, ids, bm25, encoder)
+
+if __name__ == "__main__":
+    main()
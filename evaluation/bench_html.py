@@ -0,0 +1,49 @@
+"""
+Thoi gian chunk_news (HTML -> text + split paragraph) tren news gia: BeautifulSoup (cu) vs HTMLParser vs chay lai voi
+cache text theo hash HTML (bai viet khong doi khong parse lai):
+    python -m evaluation.bench_html --news 2000 --paragraphs 20
+"""
+import argparse
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from evaluation.bench_pipeline import write_processed_data
+
+def main():
+    parser = argparse.ArgumentParser(description="chunk_news: BeautifulSoup vs HTMLParser vs cached re-run")
+    parser.add_argument("--news", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=20, help="so block HTML moi bai viet")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_processed_data(directory, args.news, 0, args.paragraphs)
+        os.environ["DATA_PROCESSED_DIR"] = directory # truoc khi import chunker (settings doc luc import)
+        size_mb = os.path.getsize(os.path.join(directory, "news.json")) / 2**20
+
+        from ingestion.chunking.news import chunk_news
+        cache_path = os.path.join(directory, "html_text_cache.json")
+        print(f"{args.news} news, news.json {size_mb:.1f} MB")
+
+        results = {}
+        for label, extractor, path in (
+            ("bs4", "bs4", ""),
+            ("htmlparser", "htmlparser", ""),
+            ("htmlparser, cold cache", "htmlparser", cache_path),
+            ("htmlparser, warm cache", "htmlparser", cache_path),
+        ):
+            with patch("ingestion.helpers.html_to_text.HTML_EXTRACTOR", extractor), \
+                    patch("ingestion.helpers.html_to_text.HTML_TEXT_CACHE_PATH", path):
+                start = time.perf_counter()
+                chunks = chunk_news()
+                results[label] = (time.perf_counter() - start, [chunk["text"] for chunk in chunks])
+            print(f"{label:<24} {results[label][0]:>7.2f} s  {len(chunks)} chunks")
+
+        texts = [result[1] for result in results.values()]
+        print(f"same chunks as bs4: {all(text == texts[0] for text in texts)}")
+        print(f"speedup vs bs4: htmlparser {results['bs4'][0] / results['htmlparser'][0]:.1f}x, "
+              f"warm cache {results['bs4'][0] / results['htmlparser, warm cache'][0]:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+So sanh inference backend torch | onnx | onnx-int8 cho embedding (SentenceTransformer) va reranking (CrossEncoder):
+thoi gian load, latency p50 1 request, throughput, RSS. Moi backend chay trong process rieng de do RSS doc lap.
+
+Mac dinh dung model ngau nhien kich thuoc e5-small / MiniLM-L-6 (evaluation.random_models), khong can tai tu Hub:
+    python -m evaluation.bench_inference
+    python -m evaluation.bench_inference --embedding-model intfloat/multilingual-e5-small \
+        --reranker-model cross-encoder/ms-marco-MiniLM-L-6-v2
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from evaluation.bench_bm25 import make_corpus
+from evaluation.load_test import QUESTIONS
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def measure(kind: str, model_path: str, backend: str, cache_dir: str, requests: int, candidates: int) -> dict:
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+    from core.inference import load_model
+
+    start = time.perf_counter()
+    if kind == "embedding":
+        model = load_model(SentenceTransformer, model_path, backend, cache_dir=cache_dir)
+        run = lambda batch: model.encode(batch, normalize_embeddings=True)
+        requests_batches = [[f"{QUESTIONS[i % len(QUESTIONS)]} {i}"] for i in range(requests)]
+        throughput_batch = make_corpus(64, 60)
+    else:
+        model = load_model(CrossEncoder, model_path, backend, cache_dir=cache_dir, max_length=256)
+        corpus = make_corpus(candidates * 4, 60)
+        run = model.predict
+        requests_batches = [[(QUESTIONS[i % len(QUESTIONS)], corpus[(i + j) % len(corpus)]) for j in range(candidates)] for i in range(requests)]
+        throughput_batch = requests_batches[0] * 2
+    load_seconds = time.perf_counter() - start
+
+    run(requests_batches[0]) # warm up
+    latencies = []
+    for batch in requests_batches:
+        start = time.perf_counter()
+        run(batch)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(3):
+        run(throughput_batch)
+    items_per_second = 3 * len(throughput_batch) / (time.perf_counter() - start)
+
+    return {
+        "kind": kind,
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "items_per_second": round(items_per_second, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def run_worker(kind: str, model_path: str, backend: str, cache_dir: str, requests: int, candidates: int) -> dict:
+    command = [
+        sys.executable, "-m", "evaluation.bench_inference", "--worker", kind, "--model", model_path, "--backend", backend,
+        "--cache-dir", cache_dir, "--requests", str(requests), "--candidates", str(candidates),
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare torch / onnx / onnx-int8 inference backends")
+    parser.add_argument("--embedding-model")
+    parser.add_argument("--reranker-model")
+    parser.add_argument("--cache-dir", help="thu muc luu model ONNX (mac dinh: thu muc tam)")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=30, help="so cap (query, document) moi request reranking")
+    parser.add_argument("--worker", choices=["embedding", "reranking"], help=argparse.SUPPRESS)
+    parser.add_argument("--model", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.model, args.backend, args.cache_dir, args.requests, args.candidates)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = args.cache_dir or os.path.join(directory, "cache")
+        embedding_model, reranker_model = args.embedding_model, args.reranker_model
+        if not embedding_model or not reranker_model:
+            from evaluation.random_models import build_random_models
+            random_bi_encoder, _ = build_random_models(directory, "e5-small")
+            _, random_cross_encoder = build_random_models(directory, "minilm-l6")
+            embedding_model = embedding_model or random_bi_encoder
+            reranker_model = reranker_model or random_cross_encoder
+
+        for kind, model_path in (("embedding", embedding_model), ("reranking", reranker_model)):
+            unit = "queries/s" if kind == "embedding" else "pairs/s"
+            request = "1 query" if kind == "embedding" else f"{args.candidates} pairs"
+            for backend in BACKENDS[1:]: # export + quantize truoc, de load_seconds / RSS chi do ban da cache
+                run_worker(kind, model_path, backend, cache_dir, 1, 1)
+            for backend in BACKENDS:
+                result = run_worker(kind, model_path, backend, cache_dir, args.requests, args.candidates)
+                print(
+                    f"{kind:<10} {backend:<10} load={result['load_seconds']:>6.2f} s  p50({request})={result['p50_ms']:>8.1f} ms  "
+                    f"throughput={result['items_per_second']:>7.1f} {unit}  max_rss={result['max_rss_mb']:>7.1f} MB"
+                )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Chi phi 1 lan chay ingestion (upsert_chunks): lan dau, chay lai tren du lieu khong doi, chay lai khi 1 phan du lieu thay doi.
+Truoc khi co chunk_id co dinh, moi lan chay deu embed + upsert lai toan bo (= chi phi lan dau) va nhan doi point.
+
+Mac dinh dung Qdrant local mode + encoder ngau nhien kich thuoc e5-small (evaluation.bench_embedding.RandomEncoder);
+--url / --model de do voi Qdrant server va model that:
+    python -m evaluation.bench_ingestion --chunks 600 --changed-ratio 0.05
+    python -m evaluation.bench_ingestion --url http://localhost:6333 --model intfloat/multilingual-e5-small
+
+--memory: peak RSS cua lan chay dau theo kich thuoc corpus, upload streaming theo batch vs build toan bo point roi
+upsert 1 lan (nhu truoc). Qdrant duoc thay bang client bo qua du lieu (nhu server o xa) va vector gia de chi do phan ingestion:
+    python -m evaluation.bench_ingestion --memory 2000 8000 32000
+"""
+import argparse
+import functools
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+import embedding.embedder as embedder
+from evaluation.bench_bm25 import make_corpus
+from ingestion.helpers.make_metadata import assign_chunk_ids, make_metadata
+from scoring import bm25_snapshot
+from vectorstore import upsert
+
+def make_chunks(texts: list[str]) -> list[dict]:
+    chunks = []
+    for index, text in enumerate(texts):
+        base = {"type": "news", "news_item_id": index // 4, "source": "news.json", "language": "vi"}
+        chunks.append({"text": text, "metadata": make_metadata(base, chunk_type="content", part_index=index % 4)})
+    return assign_chunk_ids(chunks)
+
+class NullQdrantClient:
+    """Nhan moi request nhu Qdrant server nhung khong luu gi (bo nho khong tang theo so point da upload)"""
+
+    def get_collections(self):
+        return SimpleNamespace(collections=[SimpleNamespace(name=upsert.COLLECTION_NAME)])
+
+    def scroll(self, **kwargs):
+        return [], None
+
+    def get_collection(self, collection_name):
+        return SimpleNamespace(payload_schema={})
+
+    def count(self, **kwargs):
+        return SimpleNamespace(count=0)
+
+    def upsert(self, **kwargs):
+        pass
+
+    delete = update_vectors = set_payload = create_payload_index = upsert
+
+class HashEncoder:
+    """Vector gia (khong ton CPU) cho phep do bo nho cua ingestion"""
+
+    def encode(self, texts, **kwargs):
+        return np.stack([np.random.default_rng(zlib.crc32(text.encode())).random(384, dtype=np.float32) for text in texts])
+
+def measure_memory(num_chunks: int, average_length: int, whole_corpus: bool) -> dict:
+    embedder._model = HashEncoder()
+    chunks = make_chunks(make_corpus(num_chunks, average_length))
+    # whole corpus: 1 batch gom moi point, 1 lan upsert (nhu truoc khi co upload streaming)
+    overrides = {"BATCH_SIZE": num_chunks, "UPLOAD_PARALLELISM": 1} if whole_corpus else {"BATCH_SIZE": upsert.BATCH_SIZE}
+    with tempfile.TemporaryDirectory() as directory, \
+            patch("vectorstore.upsert.get_qdrant_client", return_value=NullQdrantClient()), \
+            patch("vectorstore.upsert.load_sparse_embedder", functools.partial(bm25_snapshot.load_sparse_embedder, directory)), \
+            patch("vectorstore.upsert.save_bm25_snapshot", functools.partial(bm25_snapshot.save_bm25_snapshot, directory=directory)), \
+            patch.multiple("vectorstore.upsert", **overrides):
+        before_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        start = time.perf_counter()
+        upsert.upsert_chunks(chunks)
+        elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"seconds": round(elapsed, 2), "peak_rss_mb": round(peak_mb, 1), "growth_mb": round(peak_mb - before_mb, 1)}
+
+def run_memory(sizes: list[int], average_length: int):
+    for num_chunks in sizes:
+        results = {}
+        for mode in ("streaming", "whole-corpus"):
+            command = [sys.executable, "-m", "evaluation.bench_ingestion", "--memory-worker", str(num_chunks), "--average-length", str(average_length)]
+            if mode == "whole-corpus":
+                command.append("--whole-corpus")
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"chunks={num_chunks:>6}  streaming: +{results['streaming']['growth_mb']:>7.1f} MB during upsert "
+            f"(peak {results['streaming']['peak_rss_mb']:.0f} MB, {results['streaming']['seconds']:.1f} s)  |  "
+            f"whole corpus: +{results['whole-corpus']['growth_mb']:>7.1f} MB (peak {results['whole-corpus']['peak_rss_mb']:.0f} MB, "
+            f"{results['whole-corpus']['seconds']:.1f} s)"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion cost: full run vs unchanged / partially changed re-run")
+    parser.add_argument("--url", help="Qdrant server (mac dinh: local mode in-memory)")
+    parser.add_argument("--model", help="embedding model (mac dinh: encoder ngau nhien kich thuoc e5-small)")
+    parser.add_argument("--chunks", type=int, default=600)
+    parser.add_argument("--average-length", type=int, default=60)
+    parser.add_argument("--changed-ratio", type=float, default=0.05)
+    parser.add_argument("--memory", type=int, nargs="+", help="so chunk cho moi lan do peak RSS")
+    parser.add_argument("--memory-worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--whole-corpus", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memory_worker:
+        print(json.dumps(measure_memory(args.memory_worker, args.average_length, args.whole_corpus)))
+        return
+    if args.memory:
+        run_memory(args.memory, args.average_length)
+        return
+
+    if not args.model:
+        from evaluation.bench_embedding import RandomEncoder
+        embedder._model = RandomEncoder()
+
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(":memory:")
+    texts = make_corpus(args.chunks, args.average_length)
+    rng = random.Random(5)
+    changed = list(texts)
+    for index in rng.sample(range(len(texts)), int(len(texts) * args.changed_ratio)):
+        changed[index] = changed[index] + " cap nhat"
+
+    embedded = []
+    embed_texts = embedder.embed_texts
+    def counting_embed_texts(batch):
+        embedded.extend(batch)
+        return embed_texts(batch)
+
+    with tempfile.TemporaryDirectory() as directory, \
+            patch("vectorstore.upsert.get_qdrant_client", return_value=client), \
+            patch("vectorstore.hybrid_index.embed_texts", side_effect=counting_embed_texts), \
+            patch("vectorstore.upsert.load_sparse_embedder", functools.partial(bm25_snapshot.load_sparse_embedder, directory)), \
+            patch("vectorstore.upsert.save_bm25_snapshot", functools.partial(bm25_snapshot.save_bm25_snapshot, directory=directory)):
+        if args.url and client.collection_exists(upsert.COLLECTION_NAME):
+            raise SystemExit(f"Collection '{upsert.COLLECTION_NAME}' already exists on {args.url}, refusing to modify it")
+
+        for name, run_texts in (("first run", texts), ("unchanged re-run", texts), (f"{args.changed_ratio:.0%} changed re-run", changed)):
+            embedded.clear()
+            start = time.perf_counter()
+            stats = upsert.upsert_chunks(make_chunks(run_texts))
+            elapsed = time.perf_counter() - start
+            print(f"{name:<22} {elapsed * 1000:>9.1f} ms  embedded={len(embedded):>5}  {stats}  points={client.count(upsert.COLLECTION_NAME).count}")
+
+        client.delete_collection(upsert.COLLECTION_NAME)
+
+if __name__ == "__main__":
+    main()
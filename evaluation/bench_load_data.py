@@ -0,0 +1,104 @@
+"""
+Chi phi tach file export thanh processed tables + chunker doc lai (thoi gian, peak RSS) tren export gia:
+    cu  : json.load ca file export -> json.dump(indent=4) tung bang -> chunker json.load lai tung file
+    moi : doc export streaming -> ghi jsonl compact tung record -> chunker doc tung record (load_table la generator)
+
+Moi mode chay trong 1 subprocess rieng de peak RSS khong lan nhau:
+    python -m evaluation.bench_load_data --records 100000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from evaluation.bench_bm25 import SYLLABLES
+
+TABLES = ("projects", "news", "architectureTypes", "interiorStyles", "newsCategories", "projectCategories", "companyInfo")
+WEIGHTS = (0.45, 0.45, 0.02, 0.02, 0.02, 0.02, 0.02)
+
+def write_export(path: str, num_records: int, seed: int = 3):
+    """Ghi export gia theo tung record (khong giu ca export trong bo nho cua process cha)"""
+    rng = random.Random(seed)
+    words = lambda count: " ".join(rng.choice(SYLLABLES) for _ in range(count))
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{"exportedAt": "2026-01-14T02:32:14", "tables": {')
+        for table_index, (table, weight) in enumerate(zip(TABLES, WEIGHTS)):
+            file.write(("," if table_index else "") + json.dumps(table) + ": [")
+            for i in range(max(1, int(num_records * weight))):
+                record = {"id": i, "slug": f"{table}-{i}", "title": words(8), "description": words(60)}
+                if table == "news":
+                    record["content"] = "".join(f"<p>{words(40)}</p>" for _ in range(4))
+                file.write(("," if i else "") + json.dumps(record, ensure_ascii=False))
+            file.write("]")
+        file.write("}}")
+
+def split_old(export_path: str, processed_dir: str):
+    with open(export_path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    for table_name, table_data in data["tables"].items():
+        with open(os.path.join(processed_dir, f"{table_name}.json"), "w", encoding="utf-8") as outfile:
+            json.dump(table_data, outfile, ensure_ascii=False, indent=4)
+
+def read_old(processed_dir: str):
+    for table_name in TABLES:
+        with open(os.path.join(processed_dir, f"{table_name}.json"), "r", encoding="utf-8") as file:
+            records = json.load(file)
+        del records
+
+def split_new(export_path: str, processed_dir: str):
+    from ingestion.load_data import load_data
+    load_data(export_path, "jsonl")
+
+def read_new(processed_dir: str):
+    from ingestion.helpers.load_table import load_table
+    for table_name in TABLES:
+        for record in load_table(table_name): # nhu chunker: xu ly tung record roi bo
+            pass
+
+def measure(mode: str, export_path: str) -> dict:
+    rss_mb = lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with tempfile.TemporaryDirectory() as processed_dir:
+        os.environ["DATA_PROCESSED_DIR"] = processed_dir
+        split, read = (split_old, read_old) if mode == "old" else (split_new, read_new)
+        before_mb = rss_mb()
+        start = time.perf_counter()
+        split(export_path, processed_dir)
+        split_seconds, split_mb = time.perf_counter() - start, rss_mb()
+        read(processed_dir)
+        elapsed, peak_mb = time.perf_counter() - start, rss_mb()
+        processed_mb = sum(os.path.getsize(os.path.join(processed_dir, name)) for name in os.listdir(processed_dir)) / 2**20
+    return {
+        "split_seconds": round(split_seconds, 2), "split_growth_mb": round(split_mb - before_mb, 1),
+        "seconds": round(elapsed, 2), "growth_mb": round(peak_mb - before_mb, 1), "processed_mb": round(processed_mb, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw export -> processed tables: json.load + indent=4 vs streaming + jsonl")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--worker", choices=("old", "new"), help=argparse.SUPPRESS)
+    parser.add_argument("--export", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.export)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        export_path = os.path.join(directory, "database_export_2026-01-14T02-32-14.json")
+        write_export(export_path, args.records)
+        print(f"export: {args.records} records, {os.path.getsize(export_path) / 2**20:.1f} MB")
+        for mode, label in (("old", "json.load + indent=4 json"), ("new", "streaming + jsonl")):
+            command = [sys.executable, "-m", "evaluation.bench_load_data", "--worker", mode, "--export", export_path]
+            result = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1])
+            print(
+                f"{label:<26} split {result['split_seconds']:>5.2f} s +{result['split_growth_mb']:>6.1f} MB  |  "
+                f"split + chunker read {result['seconds']:>5.2f} s +{result['growth_mb']:>6.1f} MB peak RSS  |  processed files {result['processed_mb']:.1f} MB"
+            )
+
+if __name__ == "__main__":
+    main()
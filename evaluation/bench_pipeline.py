@@ -0,0 +1,105 @@
+"""
+Wall-clock cua ingestion pipeline: chay tung chunker roi moi embed (cu, --sequential) vs chunker trong process pool
++ embedding / upload bat dau ngay khi co chunk.
+
+Tao du lieu processed gia (news co content HTML dai, projects, cac bang nho) trong thu muc tam, Qdrant local mode,
+encoder ngau nhien kich thuoc e5-small (--layers de giam chi phi embedding):
+    python -m evaluation.bench_pipeline --news 300 --projects 300 --workers 2
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from evaluation.bench_bm25 import SYLLABLES
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(SYLLABLES) for _ in range(count))
+
+def write_processed_data(directory: str, num_news: int, num_projects: int, paragraphs: int, seed: int = 11):
+    rng = random.Random(seed)
+    news = [
+        {
+            "id": i,
+            "title": _words(rng, 8),
+            "slug": f"tin-{i}",
+            "excerpt": _words(rng, 30),
+            "content": "".join(
+                f"<div class='block'><h2>{_words(rng, 6)}</h2><p>{_words(rng, 40)}. <strong>{_words(rng, 5)}</strong> {_words(rng, 30)}.</p>"
+                f"<ul>{''.join(f'<li>{_words(rng, 8)}</li>' for _ in range(3))}</ul></div>"
+                for _ in range(paragraphs)
+            ),
+        }
+        for i in range(num_news)
+    ]
+    projects = [
+        {
+            "id": i,
+            "title": _words(rng, 5),
+            "slug": f"du-an-{i}",
+            "investor": _words(rng, 3),
+            "location": _words(rng, 4),
+            "description": ". ".join(_words(rng, 25) for _ in range(paragraphs)),
+            "thumbnailUrl": f"https://example.com/{i}.jpg",
+            "completedDate": "2024-05-01",
+            "area": rng.randint(50, 500),
+            "category": {"name": _words(rng, 2)},
+            "interiorStyle": {"name": _words(rng, 2)},
+        }
+        for i in range(num_projects)
+    ]
+    small = [{"id": i, "name": _words(rng, 3), "slug": f"muc-{i}", "description": _words(rng, 40), "imageUrl": f"https://example.com/s{i}.jpg"} for i in range(20)]
+    company = [{"id": 1, "companyName": "NMK", "companySlogan": _words(rng, 6), "companyDescription": _words(rng, 120), "totalProjects": num_projects}]
+
+    for name, data in {
+        "news.json": news, "projects.json": projects, "architectureTypes.json": small, "interiorStyles.json": small,
+        "newsCategories.json": small, "projectCategories.json": small, "companyInfo.json": company,
+    }.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion wall-clock: sequential chunking + upsert vs parallel pipeline")
+    parser.add_argument("--news", type=int, default=300)
+    parser.add_argument("--projects", type=int, default=300)
+    parser.add_argument("--paragraphs", type=int, default=6, help="so doan moi news content / project description")
+    parser.add_argument("--workers", type=int, default=0, help="so process chunker (0: so CPU)")
+    parser.add_argument("--layers", type=int, default=12, help="so layer cua encoder ngau nhien")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp()
+    write_processed_data(data_dir, args.news, args.projects, args.paragraphs)
+    os.environ["DATA_PROCESSED_DIR"] = data_dir # truoc khi import chunker (settings doc luc import)
+
+    from qdrant_client import QdrantClient
+
+    import embedding.embedder as embedder
+    import ingestion.pipeline as pipeline
+    from evaluation.bench_embedding import RandomEncoder
+    from scoring import bm25_snapshot
+
+    embedder._model = RandomEncoder(layers=args.layers)
+    print(f"{os.cpu_count()} CPU, {args.news} news + {args.projects} projects, encoder {args.layers} layers", file=sys.stderr)
+
+    results = {}
+    for mode in ("sequential", "parallel"):
+        with tempfile.TemporaryDirectory() as snapshot_dir, \
+                patch("vectorstore.upsert.get_qdrant_client", return_value=QdrantClient(":memory:")), \
+                patch("vectorstore.upsert.load_sparse_embedder", functools.partial(bm25_snapshot.load_sparse_embedder, snapshot_dir)), \
+                patch("vectorstore.upsert.save_bm25_snapshot", functools.partial(bm25_snapshot.save_bm25_snapshot, directory=snapshot_dir)), \
+                patch("ingestion.pipeline.mark_index_updated"), \
+                patch("ingestion.helpers.html_to_text.HTML_TEXT_CACHE_PATH", ""), \
+                patch("ingestion.pipeline.CHUNKING_WORKERS", args.workers or None):
+            start = time.perf_counter()
+            stats = pipeline.run_ingestion_pipeline(parallel=mode == "parallel")
+            results[mode] = time.perf_counter() - start
+        print(f"{mode:<10} {results[mode]:>8.2f} s  {stats}")
+    print(f"speedup {results['sequential'] / results['parallel']:.2f}x")
+
+if __name__ == "__main__":
+    main()
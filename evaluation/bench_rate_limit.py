@@ -0,0 +1,118 @@
+"""
+Rate limit: list timestamp / IP (check_rate_limit cu trong api/routes/chat.py) vs sliding window counter
+(core/rate_limit.py, backend memory va sqlite) voi --ips IP khac nhau.
+
+Thoi gian gia lap (clock), moi IP gui --requests-per-ip request trong --minutes phut, xen ke giua cac IP.
+Do: thoi gian / lan kiem tra, bo nho Python (tracemalloc) cua cau truc sau traffic va sau khi tat ca IP idle.
+Them 1 IP "nong" voi limit lon (--hot-limit / phut): list cu phai duyet lai ca list moi request.
+    python -m evaluation.bench_rate_limit --ips 10000 --requests-per-ip 20 --hot-limit 5000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from core.rate_limit import InMemoryRateLimiter, SQLiteRateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class ListRateLimiter:
+    """Cach cu: list timestamp trong 60s gan nhat cua moi IP, dict khong bao gio xoa IP"""
+
+    def __init__(self, limit: int, clock):
+        self.limit = limit
+        self.clock = clock
+        self.storage: dict[str, list[float]] = {}
+
+    def hit(self, key: str) -> bool:
+        current_time = self.clock()
+        minute_ago = current_time - 60
+        if key not in self.storage:
+            self.storage[key] = []
+        self.storage[key] = [ts for ts in self.storage[key] if ts > minute_ago]
+        if len(self.storage[key]) >= self.limit:
+            return False
+        self.storage[key].append(current_time)
+        return True
+
+    def __len__(self) -> int:
+        return len(self.storage)
+
+def make_traffic(ips: int, requests_per_ip: int, minutes: float, seed: int = 3) -> list[tuple[float, str]]:
+    rng = random.Random(seed)
+    addresses = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(ips)]
+    traffic = [(rng.uniform(0, minutes * 60), address) for address in addresses for _ in range(requests_per_ip)]
+    return sorted(traffic)
+
+def replay(limiter, clock, traffic) -> int:
+    allowed = 0
+    for now, address in traffic:
+        clock.now = now
+        decision = limiter.hit(address)
+        allowed += getattr(decision, "allowed", decision)
+    return allowed
+
+def run(name: str, factory, traffic, hot_requests: int, hot_limit: int):
+    clock = FakeClock()
+    limiter = factory(clock, 60)
+    start = time.perf_counter()
+    allowed = replay(limiter, clock, traffic)
+    per_check_us = (time.perf_counter() - start) / len(traffic) * 1e6
+
+    # 1 IP gui hot_requests request trong 60s
+    hot = factory(clock, hot_limit)
+    start = time.perf_counter()
+    for i in range(hot_requests):
+        clock.now = traffic[-1][0] + i * 60 / hot_requests
+        hot.hit("192.168.0.1")
+    hot_us = (time.perf_counter() - start) / hot_requests * 1e6
+
+    # Bo nho: chay lai traffic voi tracemalloc (rieng, vi tracemalloc lam cham moi lan cap phat)
+    tracemalloc.start()
+    clock = FakeClock()
+    limiter = factory(clock, 60)
+    replay(limiter, clock, traffic)
+    traffic_memory = tracemalloc.get_traced_memory()[0]
+    # 10 phut sau: 1 request moi, cac IP cu da idle
+    clock.now += 600
+    limiter.hit("172.16.0.1")
+    idle_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    keys = limiter.stats()["keys"] if hasattr(limiter, "stats") else len(limiter)
+    print(
+        f"{name:<10} {per_check_us:>6.2f} us/check  hot IP {hot_us:>6.2f} us/check  allowed {allowed:>7}  "
+        f"memory {traffic_memory / 1024:>6.0f} KiB -> sau khi idle {idle_memory / 1024:>6.0f} KiB ({keys} IP)"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate limiter cost: per-IP timestamp list vs sliding window counter")
+    parser.add_argument("--ips", type=int, default=10000)
+    parser.add_argument("--requests-per-ip", type=int, default=20)
+    parser.add_argument("--minutes", type=float, default=5)
+    parser.add_argument("--hot-limit", type=int, default=5000, help="limit / phut cua IP nong")
+    args = parser.parse_args()
+
+    traffic = make_traffic(args.ips, args.requests_per_ip, args.minutes)
+    hot_requests = args.hot_limit
+    print(f"{args.ips} IPs x {args.requests_per_ip} requests trong {args.minutes:g} phut ({len(traffic)} checks), hot IP {hot_requests} requests / 60s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        limiters = {
+            "list (cu)": lambda clock, limit: ListRateLimiter(limit, clock),
+            "memory": lambda clock, limit: InMemoryRateLimiter(clock=clock, limit=limit, window_seconds=60),
+            "sqlite": lambda clock, limit: SQLiteRateLimiter(
+                os.path.join(directory, f"rate_limit_{limit}.sqlite3"), clock=clock, limit=limit, window_seconds=60,
+            ),
+        }
+        for name, factory in limiters.items():
+            run(name, factory, traffic, hot_requests, args.hot_limit)
+
+if __name__ == "__main__":
+    main()
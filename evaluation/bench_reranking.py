@@ -0,0 +1,106 @@
+"""
+Chi phi reranking tren request path: CrossEncoderReranker.rerank moi request (cu) vs RerankingService
+(score cache + micro-batching giua cac request).
+
+Mac dinh dung 1 Transformer encoder khoi tao ngau nhien kich thuoc ms-marco-MiniLM-L-6 (6 layer, hidden 384)
+de chay offline; --model de dung CrossEncoder that:
+    python -m evaluation.bench_reranking --concurrency 1 4 16 --requests 24 --repeat-ratio 0.5 --max-length 128
+    python -m evaluation.bench_reranking --model cross-encoder/ms-marco-MiniLM-L-6-v2 --max-length 256
+
+--repeat-ratio: ti le request lap lai cau hoi + candidate set da gap (traffic thuc te nhieu cau hoi giong nhau).
+"""
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from core.executors import run_blocking
+from core.schema import RetrievedDocument
+from evaluation.bench_bm25 import make_corpus
+from evaluation.bench_embedding import RandomEncoder
+from evaluation.load_test import QUESTIONS, percentile
+from reranking.reranker import CrossEncoderReranker
+from reranking.service import RerankingService
+
+class RandomCrossEncoder:
+    """score_batch gia: chay encoder ngau nhien tren chuoi 'query document' (cat o max_length token)"""
+
+    def __init__(self, max_length: int):
+        self.encoder = RandomEncoder(layers=6, max_tokens=max_length)
+
+    def score_batch(self, pairs):
+        return self.encoder.encode([f"{query} {text}" for query, text in pairs])[:, 0].tolist()
+
+def make_requests(num_requests: int, candidates: int, repeat_ratio: float, corpus: list[str], seed: int = 3):
+    """Moi request = (query, candidate ids); cac request lap lai dung lai query + candidate set cu"""
+    rng = random.Random(seed)
+    requests = []
+    for i in range(num_requests):
+        if requests and rng.random() < repeat_ratio:
+            requests.append(rng.choice(requests))
+        else:
+            requests.append((f"{QUESTIONS[i % len(QUESTIONS)]} {i}", rng.sample(range(len(corpus)), candidates)))
+    return requests
+
+async def run_level(rerank, requests, corpus: list[str], concurrency: int) -> dict:
+    latencies = []
+    iterator = iter(requests)
+
+    async def user():
+        for query, ids in iterator:
+            documents = [RetrievedDocument(id=str(i), score=0.0, text=corpus[i], metadata={}) for i in ids]
+            start = time.perf_counter()
+            await rerank(query, documents)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"requests_per_second": len(requests) / elapsed, "p50_ms": percentile(latencies, 50) * 1000}
+
+async def main_async(args):
+    if args.model:
+        from reranking.models.cross_encoder import CrossEncoderModel
+        model = CrossEncoderModel(args.model, max_length=args.max_length, truncation="only_second")
+    else:
+        model = SimpleNamespace(score_batch=RandomCrossEncoder(args.max_length).score_batch)
+
+    corpus = make_corpus(2000, args.document_length)
+    reranker = CrossEncoderReranker(model)
+    model.score_batch([("warm up", corpus[0])])
+
+    print(f"{args.candidates} candidates/request, documents ~{args.document_length} words, max_length {args.max_length}, repeat ratio {args.repeat_ratio}")
+    for concurrency in args.concurrency:
+        requests = make_requests(max(args.requests, concurrency), args.candidates, args.repeat_ratio, corpus)
+
+        async def per_request(query, documents):
+            return await run_blocking("reranking", reranker.rerank, query, documents, top_k=5)
+        before = await run_level(per_request, requests, corpus, concurrency)
+
+        service = RerankingService(model, max_batch_size=args.max_batch_size)
+        after = await run_level(lambda q, d: service.rerank(q, d, top_k=5), requests, corpus, concurrency)
+        stats = service.stats()
+
+        print(
+            f"users={concurrency:>3}  per-request rps={before['requests_per_second']:>6.2f} p50={before['p50_ms']:>8.1f} ms  |  "
+            f"service rps={after['requests_per_second']:>6.2f} p50={after['p50_ms']:>8.1f} ms  "
+            f"({after['requests_per_second'] / before['requests_per_second']:.2f}x)  "
+            f"pairs scored {stats['pairs_scored']}/{stats['pairs_total']}, avg batch {stats['batching']['average_batch_size']}, "
+            f"mean stage ms {stats['mean_timings_ms']}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Reranking cost: per-request predict vs cached + micro-batched service")
+    parser.add_argument("--model", help="ten CrossEncoder model (mac dinh: encoder ngau nhien kich thuoc MiniLM-L-6)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=96)
+    parser.add_argument("--candidates", type=int, default=30)
+    parser.add_argument("--document-length", type=int, default=120, help="so tu trung binh moi chunk")
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--repeat-ratio", type=float, default=0.5)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
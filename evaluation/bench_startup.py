@@ -0,0 +1,77 @@
+"""
+Cold-start cua BM25 / SparseEmbedder: scroll toan bo collection + fit + build_index (cu) vs mmap snapshot + kiem tra fingerprint.
+
+Mac dinh dung Qdrant local mode (in-process, khong co network round trip nen scroll con nhanh hon Qdrant server that);
+--url de do tren Qdrant server (tao collection tam, xoa sau khi do):
+    python -m evaluation.bench_startup --documents 5000 20000
+    python -m evaluation.bench_startup --url http://localhost:6333 --documents 20000
+"""
+import argparse
+import tempfile
+import time
+import uuid
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+import core.startup as startup
+from embedding.sparse_embedder import SparseEmbedder
+from evaluation.bench_bm25 import make_corpus
+from scoring.bm25 import BM25
+from scoring.bm25_snapshot import _collection_ids, load_bm25_snapshot, save_bm25_snapshot
+
+def scroll_and_build(client: QdrantClient, collection_name: str) -> tuple[BM25, list[str]]:
+    """Duong cu cua initialize_rag_components (Step 1-3)"""
+    startup.COLLECTION_NAME = collection_name
+    documents_texts, document_ids = startup._scroll_corpus(client)
+    sparse_embedder = SparseEmbedder()
+    sparse_embedder.fit(documents_texts)
+    bm25 = BM25(sparse_embedder, k1=1.5, b=0.75)
+    bm25.build_index(documents_texts, document_ids)
+    return bm25, documents_texts
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 cold start: scroll + fit vs mmap snapshot")
+    parser.add_argument("--url", help="Qdrant server (mac dinh: local mode in-memory)")
+    parser.add_argument("--documents", type=int, nargs="+", default=[2000, 10000])
+    parser.add_argument("--average-length", type=int, default=120)
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(":memory:")
+    for num_documents in args.documents:
+        collection_name = f"bench_startup_{uuid.uuid4().hex[:8]}"
+        client.create_collection(collection_name, vectors_config={"dense": VectorParams(size=4, distance=Distance.COSINE)})
+        corpus = make_corpus(num_documents, args.average_length)
+        for start in range(0, num_documents, 500):
+            client.upsert(collection_name, points=[
+                PointStruct(id=str(uuid.uuid4()), vector={"dense": [1.0, 0.0, 0.0, 0.0]}, payload={"text": text})
+                for text in corpus[start:start + 500]
+            ])
+
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            bm25, documents_texts = scroll_and_build(client, collection_name)
+            scroll_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            save_bm25_snapshot(bm25, documents_texts, directory, collection_name)
+            save_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            loaded = load_bm25_snapshot(client, directory, collection_name)
+            load_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _collection_ids(client, collection_name) # phan validate: scroll toan bo point id
+            ids_seconds = time.perf_counter() - start
+            assert loaded.search("nha pho hien dai", 10) == bm25.search("nha pho hien dai", 10)
+
+        client.delete_collection(collection_name)
+        print(
+            f"documents={num_documents:>6}  scroll+fit+build={scroll_seconds * 1000:>8.1f} ms  "
+            f"snapshot load+validate={load_seconds * 1000:>7.1f} ms (id scroll {ids_seconds * 1000:.1f} ms)  "
+            f"({scroll_seconds / load_seconds:.1f}x)  save={save_seconds * 1000:.1f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
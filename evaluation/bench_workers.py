@@ -0,0 +1,229 @@
+"""
+api.server voi 1, 2, 4 worker: bo nho moi worker (RSS, private, PSS) va throughput tong, preload (load 1 lan roi fork,
+copy-on-write) vs moi worker tu load model.
+
+Moi request chay phan CPU-bound cua /api/chat: embed query (EmbeddingService) -> BM25 search tren corpus tong hop ->
+rerank 30 candidate (RerankingService), khong co Qdrant / LLM. Model la BERT khoi tao ngau nhien kich thuoc
+e5-small / MiniLM-L-6 (evaluation.random_models), --vocabulary-size tu dong de embedding matrix gan voi model that
+(multilingual-e5 ~250k token). Cau hoi khong lap lai nen khong trung query / score cache.
+    python -m evaluation.bench_workers --workers 1 2 4 --duration 20 --concurrency 8
+
+PSS (proportional set size) chia trang dung chung cho cac process dung no: tong PSS la bo nho that ca server chiem.
+Throughput chi tang theo so worker khi may co du core (os.cpu_count() duoc in ra).
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import tempfile
+import threading
+import time
+import traceback
+
+from evaluation.bench_bm25 import SYLLABLES, make_corpus
+from evaluation.load_test import percentile
+
+_components: dict = {}
+
+def build_models(directory: str, vocabulary_size: int) -> tuple[str, str]:
+    """Build model trong process con: process cha khong chay torch truoc khi fork worker"""
+    paths = os.path.join(directory, "paths.json")
+    pid = os.fork()
+    if pid == 0:
+        try:
+            from evaluation.random_models import build_random_models
+            bi_encoder, _ = build_random_models(directory, "e5-small", words=[f"w{i}" for i in range(vocabulary_size)])
+            _, cross_encoder = build_random_models(directory, "minilm-l6", words=[f"w{i}" for i in range(vocabulary_size)])
+            with open(paths, "w") as file:
+                json.dump([bi_encoder, cross_encoder], file)
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    with open(paths) as file:
+        return tuple(json.load(file))
+
+def load_components(bi_encoder: str, cross_encoder: str, corpus: list[str]):
+    """Tuong duong api.server.preload: embedding model, CrossEncoder, BM25 index (khong chay inference)"""
+    from sentence_transformers import SentenceTransformer
+
+    import embedding.embedder as embedder
+    from core.inference import load_model
+    from embedding.sparse_embedder import SparseEmbedder
+    from reranking.models.cross_encoder import CrossEncoderModel
+    from reranking.service import RerankingService
+    from scoring.bm25 import BM25
+
+    embedder._model = load_model(SentenceTransformer, bi_encoder)
+    sparse_embedder = SparseEmbedder()
+    sparse_embedder.fit(corpus)
+    bm25 = BM25(sparse_embedder)
+    bm25.build_index(corpus, [str(i) for i in range(len(corpus))])
+    _components.update(
+        bm25=bm25,
+        reranking_service=RerankingService(CrossEncoderModel(cross_encoder, max_length=256, truncation="only_second")),
+        corpus=corpus,
+    )
+
+def create_app():
+    from fastapi import FastAPI
+
+    from core.schema import RetrievedDocument
+    from embedding.service import get_embedding_service
+
+    app = FastAPI()
+
+    @app.post("/bench")
+    async def bench(body: dict):
+        query = body["query"]
+        await get_embedding_service().embed_query(query)
+        candidates = _components["bm25"].search(query, 30)
+        documents = [
+            RetrievedDocument(id=document_id, score=score, text=_components["corpus"][int(document_id)], metadata={})
+            for document_id, score in candidates
+        ]
+        await _components["reranking_service"].rerank(query, documents, top_k=5)
+        return {"pid": os.getpid()}
+
+    return app
+
+def memory(pid: int) -> dict[str, int]:
+    """KiB tu /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "private": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+def worker_pids(supervisor: int) -> list[int]:
+    with open(f"/proc/{supervisor}/task/{supervisor}/children") as file:
+        return [int(pid) for pid in file.read().split()]
+
+class Queries:
+    """Cau hoi khong lap lai (thread-safe)"""
+
+    def __init__(self, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def next(self) -> str:
+        with self.lock:
+            self.counter += 1
+            return " ".join(self.rng.sample(SYLLABLES, 6) + [f"q{self.counter}"])
+
+def post(connection: http.client.HTTPConnection, query: str) -> int:
+    connection.request("POST", "/bench", json.dumps({"query": query}), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    return json.loads(response.read())["pid"]
+
+def wait_ready(port: int, workers: int, queries: Queries, timeout: float = 300):
+    """Gui request cho toi khi moi worker da tra loi it nhat 1 lan (model da load, batcher da tao)"""
+    seen: set[int] = set()
+    deadline = time.monotonic() + timeout
+    while len(seen) < workers:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Only {len(seen)}/{workers} workers answered")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            seen.add(post(connection, queries.next())) # connection moi -> kernel co the chia cho worker khac
+            connection.close()
+        except (ConnectionError, OSError):
+            time.sleep(0.5)
+
+def load(port: int, concurrency: int, duration: float, queries: Queries) -> tuple[int, list[float]]:
+    latencies: list[float] = []
+    lock = threading.Lock()
+    end = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        local = []
+        while time.monotonic() < end:
+            start = time.perf_counter()
+            post(connection, queries.next())
+            local.append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), latencies
+
+def run(workers: int, preload: bool, models: tuple[str, str], corpus: list[str], args) -> dict:
+    from api.server import bind_socket, run_workers
+
+    sock = bind_socket("127.0.0.1", 0)
+    port = sock.getsockname()[1]
+    supervisor = os.fork()
+    if supervisor == 0:
+        code = 0
+        try:
+            if preload:
+                load_components(*models, corpus)
+            run_workers(create_app(), sock, workers, post_fork=None if preload else lambda: load_components(*models, corpus))
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    sock.close()
+
+    try:
+        queries = Queries()
+        wait_ready(port, workers, queries)
+        requests, latencies = load(port, args.concurrency, args.duration, queries)
+        pids = worker_pids(supervisor)
+        per_worker = [memory(pid) for pid in pids]
+        parent = memory(supervisor)
+    finally:
+        os.kill(supervisor, signal.SIGTERM)
+        os.waitpid(supervisor, 0)
+
+    return {
+        "workers": workers,
+        "preload": preload,
+        "requests_per_second": requests / args.duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "worker_rss_mib": sum(item["rss"] for item in per_worker) / len(per_worker) / 1024,
+        "worker_private_mib": sum(item["private"] for item in per_worker) / len(per_worker) / 1024,
+        "total_pss_mib": (sum(item["pss"] for item in per_worker) + parent["pss"]) / 1024,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefork server: memory per worker and throughput, preload vs per-worker load")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=20, help="giay do throughput moi cau hinh")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--vocabulary-size", type=int, default=120000, help="so token cua tokenizer model ngau nhien")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.documents, 120)
+    with tempfile.TemporaryDirectory() as directory:
+        models = build_models(directory, args.vocabulary_size)
+        print(f"{os.cpu_count()} CPU, {args.documents} documents, vocabulary {args.vocabulary_size}, concurrency {args.concurrency}, {args.duration:g}s / run")
+        for workers in args.workers:
+            for preload in (True, False):
+                result = run(workers, preload, models, corpus, args)
+                print(
+                    f"workers={workers} {'preload ' if preload else 'per-worker'}  "
+                    f"rps={result['requests_per_second']:>6.1f} p50={result['p50_ms']:>7.1f} ms p95={result['p95_ms']:>7.1f} ms  |  "
+                    f"worker RSS {result['worker_rss_mib']:>6.0f} MiB, private {result['worker_private_mib']:>6.0f} MiB  "
+                    f"total PSS {result['total_pss_mib']:>6.0f} MiB"
+                )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Load test cho /api/chat: p50/p99 latency va requests/sec o nhieu muc concurrency.
+
+Chay voi server that:
+    python -m evaluation.load_test --url http://localhost:8000 --concurrency 1 8 32 --requests 200
+
+--stream: goi /api/chat/stream (SSE) va do them time-to-first-token phia client.
+
+Chay offline (--simulate): app chay in-process (uvicorn tren 1 port local, trong thread rieng), Qdrant / embedding /
+reranker / Ollama duoc thay bang backend gia co latency co dinh. Model inference gia dung time.sleep (nha GIL giong torch),
+I/O gia cua client sync cung block, client async thi dung asyncio.sleep.
+    python -m evaluation.load_test --simulate --concurrency 1 8 32 --requests 64
+
+Answer cache bi tat trong --simulate (5 cau hoi lap lai se hit cache gan nhu 100%), bat lai bang --answer-cache.
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+
+QUESTIONS = [
+    "NMK có những phong cách nội thất nào?",
+    "Cho mình xem các dự án biệt thự hiện đại",
+    "Địa chỉ và hotline của công ty là gì?",
+    "Dự án nhà phố quận 7 do ai làm chủ đầu tư?",
+    "Phong cách Japandi là gì?",
+]
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+async def stream_request(client: httpx.AsyncClient, question: str) -> tuple[bool, float | None]:
+    """Doc SSE tu /api/chat/stream, tra ve (thanh cong, thoi diem nhan token dau tien)"""
+    first_token_at = None
+    async with client.stream("POST", "/api/chat/stream", json={"query": question}) as response:
+        if response.status_code != 200:
+            return False, None
+        async for line in response.aiter_lines():
+            if line == "event: token" and first_token_at is None:
+                first_token_at = time.perf_counter()
+            elif line == "event: error":
+                return False, first_token_at
+    return True, first_token_at
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, total_requests: int, stream: bool = False) -> dict:
+    latencies: list[float] = []
+    first_token_latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total_requests))
+
+    async def user():
+        nonlocal errors
+        for i in counter:
+            question = QUESTIONS[i % len(QUESTIONS)]
+            start = time.perf_counter()
+            try:
+                if stream:
+                    ok, first_token_at = await stream_request(client, question)
+                    if first_token_at is not None:
+                        first_token_latencies.append(first_token_at - start)
+                else:
+                    response = await client.post("/api/chat", json={"query": question})
+                    ok = response.status_code == 200
+                if not ok:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "requests_per_second": round(total_requests / elapsed, 2),
+    }
+    if first_token_latencies:
+        result["ttft_p50_ms"] = round(percentile(first_token_latencies, 50) * 1000, 1)
+        result["ttft_p99_ms"] = round(percentile(first_token_latencies, 99) * 1000, 1)
+    return result
+
+class SimulatedBackends:
+    """Backend gia cho --simulate, latency tinh bang ms"""
+
+    def __init__(
+        self, embed_ms: float, qdrant_ms: float, rerank_ms: float, llm_ms: float,
+        corpus_size: int = 500, llm_tokens: int = 40, answer_cache: bool = False,
+    ):
+        self.embed_ms = embed_ms
+        self.qdrant_ms = qdrant_ms
+        self.rerank_ms = rerank_ms
+        self.llm_ms = llm_ms
+        self.llm_tokens = llm_tokens
+        self.answer_cache = answer_cache
+        rng = random.Random(0)
+        words = "nha pho biet thu noi that phong cach du an hien dai japandi indochine quan chu dau tu dia chi hotline".split()
+        self.ids = [str(uuid.uuid4()) for _ in range(corpus_size)]
+        self.texts = [" ".join(rng.choice(words) for _ in range(40)) for _ in range(corpus_size)]
+
+    # --- embedding (CPU-bound) ---
+    def encode(self, texts, **kwargs):
+        time.sleep(self.embed_ms / 1000)
+        vectors = np.random.default_rng().normal(size=(len(texts), 384)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    # --- qdrant ---
+    def _points(self, limit: int):
+        from qdrant_client.models import ScoredPoint
+        return SimpleNamespace(points=[
+            ScoredPoint(id=point_id, version=0, score=0.8 - i * 0.01, payload={"text": self.texts[i], "type": "project"})
+            for i, point_id in enumerate(self.ids[:limit])
+        ])
+
+    def _records(self, ids):
+        from qdrant_client.models import Record
+        position = {point_id: i for i, point_id in enumerate(self.ids)}
+        return [
+            Record(id=point_id, payload={"text": self.texts[position[point_id]]}, vector={"dense": [0.01] * 384})
+            for point_id in ids if point_id in position
+        ]
+
+    def sync_qdrant(self):
+        backends = self
+
+        class Client:
+            def query_points(self, limit=10, **kwargs):
+                time.sleep(backends.qdrant_ms / 1000)
+                return backends._points(limit)
+
+            def retrieve(self, ids, **kwargs):
+                time.sleep(backends.qdrant_ms / 1000)
+                return backends._records(ids)
+
+        return Client()
+
+    def async_qdrant(self):
+        backends = self
+
+        class Client:
+            async def query_points(self, limit=10, **kwargs):
+                await asyncio.sleep(backends.qdrant_ms / 1000)
+                return backends._points(limit)
+
+            async def retrieve(self, ids, **kwargs):
+                await asyncio.sleep(backends.qdrant_ms / 1000)
+                return backends._records(ids)
+
+        return Client()
+
+    # --- reranker (CPU-bound) ---
+    def score_batch(self, pairs):
+        # rerank_ms cho 30 cap (TOP_K * 3), chi phi tuyen tinh theo so cap -> batching khong duoc loi gia
+        time.sleep(self.rerank_ms / 1000 * len(pairs) / 30)
+        return [random.random() for _ in pairs]
+
+    # --- ollama ---
+    def ollama_clients(self):
+        backends = self
+        response = {"message": {"content": "Câu trả lời mô phỏng."}}
+
+        class Client:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def chat(self, **kwargs):
+                time.sleep(backends.llm_ms / 1000)
+                return response
+
+        class AsyncClient(Client):
+            async def chat(self, stream=False, **kwargs):
+                if stream:
+                    return self._stream()
+                await asyncio.sleep(backends.llm_ms / 1000)
+                return response
+
+            async def _stream(self):
+                # llm_ms duoc chia deu cho cac token
+                for i in range(backends.llm_tokens):
+                    await asyncio.sleep(backends.llm_ms / 1000 / backends.llm_tokens)
+                    yield {"message": {"content": f"tok{i} "}, "done": i == backends.llm_tokens - 1}
+
+        return Client, AsyncClient
+
+    def install(self, stack: ExitStack):
+        """Patch cac module cua app de dung backend gia, tra ve ASGI app chi gom chat router"""
+        import ollama
+        from fastapi import FastAPI
+
+        import core.startup as startup
+        import embedding.embedder as embedder
+        import llm.generator as generator
+        import retrieval.hybrid_retriever as hybrid_retriever
+        import api.routes.chat as chat
+        from embedding.sparse_embedder import SparseEmbedder
+        from scoring.bm25 import BM25
+        from reranking.reranker import CrossEncoderReranker
+
+        sparse_embedder = SparseEmbedder()
+        sparse_embedder.fit(self.texts)
+        bm25 = BM25(sparse_embedder)
+        if hasattr(bm25, "build_index"):
+            bm25.build_index(self.texts, self.ids)
+        else:
+            bm25.compute_average_document_length(self.texts)
+
+        sync_client, async_client = self.ollama_clients()
+        model = SimpleNamespace(encode=self.encode)
+        qdrant_sync, qdrant_async = self.sync_qdrant(), self.async_qdrant()
+
+        stack.enter_context(patch.object(embedder, "_model", model))
+        stack.enter_context(patch.object(hybrid_retriever, "get_qdrant_client", lambda: qdrant_sync))
+        stack.enter_context(patch.object(hybrid_retriever, "get_async_qdrant_client", lambda: qdrant_async, create=True))
+        stack.enter_context(patch.object(ollama, "Client", sync_client))
+        stack.enter_context(patch.object(ollama, "AsyncClient", async_client))
+        stack.enter_context(patch.object(generator, "_async_client", None, create=True))
+        stack.enter_context(patch.object(startup, "_bm25", bm25))
+        stack.enter_context(patch.object(startup, "_reranker", CrossEncoderReranker(SimpleNamespace(score_batch=self.score_batch))))
+        if hasattr(startup, "_reranking_service"):
+            from reranking.service import RerankingService
+            # cache_size=0: moi request deu chay model gia, chi do batching
+            reranking_service = RerankingService(SimpleNamespace(score_batch=self.score_batch), cache_size=0)
+            stack.enter_context(patch.object(startup, "_reranking_service", reranking_service))
+        stack.enter_context(patch.object(chat, "RATE_LIMIT_PER_MINUTE", 10 ** 9))
+        if hasattr(chat, "get_answer_cache"):
+            if self.answer_cache:
+                from cache.semantic_cache import SemanticAnswerCache
+                answer_cache = SemanticAnswerCache(version_file=None)
+                stack.enter_context(patch.object(chat, "get_answer_cache", lambda: answer_cache))
+            else:
+                stack.enter_context(patch.object(chat, "get_answer_cache", lambda: None))
+
+        app = FastAPI()
+        app.include_router(chat.router, prefix="/api")
+        return app
+
+def serve_in_thread(app, stack: ExitStack) -> str:
+    """Chay uvicorn trong thread rieng (khong dung ASGITransport vi no buffer ca response, khong do duoc streaming)"""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    stack.callback(stop)
+    return f"http://127.0.0.1:{port}"
+
+async def main_async(args):
+    results = []
+    with ExitStack() as stack:
+        url = args.url
+        if args.simulate:
+            backends = SimulatedBackends(args.embed_ms, args.qdrant_ms, args.rerank_ms, args.llm_ms, answer_cache=args.answer_cache)
+            url = serve_in_thread(backends.install(stack), stack)
+
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        client = httpx.AsyncClient(base_url=url, timeout=600, limits=limits)
+
+        async with client:
+            for concurrency in args.concurrency:
+                result = await run_level(client, concurrency, max(args.requests, concurrency), stream=args.stream)
+                results.append(result)
+                ttft = f"  ttft_p50={result['ttft_p50_ms']:>7.1f} ms" if "ttft_p50_ms" in result else ""
+                print(
+                    f"users={result['concurrency']:>3}  p50={result['p50_ms']:>8.1f} ms  p99={result['p99_ms']:>8.1f} ms  "
+                    f"rps={result['requests_per_second']:>7.2f}  errors={result['errors']}{ttft}"
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"simulate": args.simulate, "stream": args.stream, "results": results}, file, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/chat")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--simulate", action="store_true", help="chay in-process voi backend gia")
+    parser.add_argument("--stream", action="store_true", help="goi /api/chat/stream va do time-to-first-token")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="so request moi muc concurrency")
+    parser.add_argument("--embed-ms", type=float, default=15)
+    parser.add_argument("--qdrant-ms", type=float, default=10)
+    parser.add_argument("--rerank-ms", type=float, default=40, help="cho 30 cap (query, document)")
+    parser.add_argument("--llm-ms", type=float, default=400)
+    parser.add_argument("--answer-cache", action="store_true", help="bat answer cache trong --simulate")
+    parser.add_argument("--output", help="ghi ket qua ra file JSON")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Danh gia retrieval tren 1 bo query co nhan: chay tung cau hoi qua cac stage
+    dense    : retrieval.retriever.retrieve (chi dense search)
+    hybrid   : retrieval.hybrid_retriever.hybrid_retrieve (dense + BM25, fusion theo settings)
+    rerank   : CrossEncoder reranker tren ket qua hybrid (cat con reranking.top_k)
+    generate : (--generate) llm.generator.generate_answer tren context sau rerank, chi do latency
+va bao cao recall@k, MRR, nDCG@k, latency p50 / p95 / p99 va throughput cua tung stage, ghi ra JSON de diff giua
+cac lan chay (--compare baseline.json in ra chenh lech).
+
+Bo query: JSON Lines, moi dong {"question": "...", "relevant": ["<point id hoac slug>", ...]}. Slug duoc doi ra
+point id bang cach scroll collection (project_slug, news_item_slug, ...), 1 slug co the ung voi nhieu chunk.
+
+Chay voi Qdrant / embedding / reranker / Ollama that theo config/settings.yaml:
+    python -m evaluation.rag_eval --queries data/eval_queries.jsonl --output eval.json
+Chay offline (--offline): corpus + bo query tong hop (evaluation.bench_fusion), Qdrant in-memory, dense model gia
+(HashingEncoder), reranker gia cham diem theo so tu chung, Ollama gia co latency co dinh:
+    python -m evaluation.rag_eval --offline --generate --output eval.json
+    python -m evaluation.rag_eval --offline --compare eval.json
+"""
+import argparse
+import json
+import math
+import time
+import uuid
+from contextlib import ExitStack
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+from core.settings_loader import load_settings
+from evaluation.load_test import percentile
+
+settings = load_settings()
+
+STAGES = ("dense", "hybrid", "rerank", "generate")
+SLUG_FIELDS = (
+    "project_slug", "project_category_slug", "news_item_slug", "news_category_slug", "interior_slug", "architecture_type_slug",
+)
+
+def load_queries(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def resolve_labels(client, queries: list[dict], collection_name: str) -> list[set[str]]:
+    """Doi nhan (point id hoac slug) cua tung query thanh tap point id"""
+    slugs: dict[str, set[str]] = {}
+    offset = None
+    while True:
+        records, offset = client.scroll(collection_name, limit=1000, offset=offset, with_payload=list(SLUG_FIELDS), with_vectors=False)
+        for record in records:
+            for field in SLUG_FIELDS:
+                if (record.payload or {}).get(field):
+                    slugs.setdefault(record.payload[field], set()).add(str(record.id))
+        if offset is None:
+            break
+    return [
+        set().union(*(slugs.get(label, {label}) for label in query["relevant"])) if query["relevant"] else set()
+        for query in queries
+    ]
+
+def ranking_metrics(result_ids: list[str], relevant: set[str], ks: list[int]) -> dict:
+    """recall@k, nDCG@k (relevance nhi phan) va reciprocal rank cua 1 query"""
+    hits = [point_id in relevant for point_id in result_ids]
+    metrics = {}
+    for k in ks:
+        metrics[f"recall@{k}"] = sum(hits[:k]) / len(relevant) if relevant else 0.0
+        dcg = sum(1 / math.log2(rank + 2) for rank, hit in enumerate(hits[:k]) if hit)
+        ideal = sum(1 / math.log2(rank + 2) for rank in range(min(len(relevant), k)))
+        metrics[f"ndcg@{k}"] = dcg / ideal if ideal else 0.0
+    metrics["mrr"] = next((1 / (rank + 1) for rank, hit in enumerate(hits) if hit), 0.0)
+    return metrics
+
+def summarize(latencies: list[float], per_query: list[dict]) -> dict:
+    summary = {key: sum(metrics[key] for metrics in per_query) / len(per_query) for key in (per_query[0] if per_query else {})}
+    summary["latency_ms"] = {
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "mean": sum(latencies) / len(latencies) * 1000,
+    }
+    summary["queries_per_second"] = len(latencies) / sum(latencies) if sum(latencies) else 0.0
+    return summary
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def evaluate(queries: list[dict], labels: list[set[str]], bm25, reranker, stages: list[str], ks: list[int]) -> dict:
+    from api.routes.chat import RERRANKING_TOP_K, build_context
+    from llm.generator import generate_answer, is_fallback_answer
+    from retrieval.hybrid_retriever import hybrid_retrieve
+    from retrieval.retriever import retrieve
+
+    latencies = {stage: [] for stage in stages}
+    per_query = {stage: [] for stage in stages if stage != "generate"}
+    fallback_answers = 0
+
+    for query, relevant in zip(queries, labels):
+        question = query["question"]
+        if "dense" in stages:
+            documents, elapsed = timed(retrieve, question)
+            latencies["dense"].append(elapsed)
+            per_query["dense"].append(ranking_metrics([document.id for document in documents], relevant, ks))
+
+        documents, elapsed = timed(hybrid_retrieve, question, bm25)
+        if "hybrid" in stages:
+            latencies["hybrid"].append(elapsed)
+            per_query["hybrid"].append(ranking_metrics([document.id for document in documents], relevant, ks))
+
+        if reranker is not None and ("rerank" in stages or "generate" in stages):
+            documents, elapsed = timed(reranker.rerank, question, list(documents), top_k=RERRANKING_TOP_K)
+            if "rerank" in stages:
+                latencies["rerank"].append(elapsed)
+                per_query["rerank"].append(ranking_metrics([document.id for document in documents], relevant, ks))
+        else:
+            documents = documents[:RERRANKING_TOP_K]
+
+        if "generate" in stages:
+            answer, elapsed = timed(generate_answer, build_context(documents), question)
+            latencies["generate"].append(elapsed)
+            fallback_answers += is_fallback_answer(answer)
+
+    results = {stage: summarize(latencies[stage], per_query.get(stage, [])) for stage in stages if latencies[stage]}
+    if "generate" in results:
+        results["generate"]["fallback_rate"] = fallback_answers / len(queries)
+    return results
+
+def config_snapshot() -> dict:
+    import retrieval.hybrid_retriever as hybrid_retriever
+    return {
+        "top_k": hybrid_retriever.TOP_K,
+        "score_fusion": hybrid_retriever.SCORE_FUSION,
+        "fusion": hybrid_retriever.FUSION,
+        "keyword_search": hybrid_retriever.KEYWORD_SEARCH,
+        "dense_weight": hybrid_retriever.DENSE_WEIGHT,
+        "bm25_weight": hybrid_retriever.BM25_WEIGHT,
+        "query_router": settings["retrieval"].get("query_router", True),
+        "reranking_top_k": settings.get("reranking", {}).get("top_k", 5),
+        "embedding_model": settings["embedding"]["model"],
+    }
+
+class OfflineBackends:
+    """Qdrant in-memory + dense model / reranker / Ollama gia tren corpus tong hop co nhan (giong bench_fusion)"""
+
+    def __init__(self, num_documents: int, num_queries: int, noise: float, rerank_ms: float, llm_ms: float):
+        from evaluation.bench_bm25 import make_corpus
+        from evaluation.bench_fusion import HashingEncoder, make_queries
+
+        self.corpus = [f"{text} nmk{i}" for i, text in enumerate(make_corpus(num_documents, 60))]
+        self.ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, f"rag-eval-{i}")) for i in range(len(self.corpus))]
+        self.queries = [
+            {"question": question, "relevant": [self.ids[label]]}
+            for question, label in make_queries(self.corpus, num_queries, code_ratio=0.3, paraphrase_ratio=0.3)
+        ]
+        self.encode_text = lru_cache(maxsize=None)(HashingEncoder(noise).encode) # cung text -> cung vector
+        self.rerank_ms = rerank_ms
+        self.llm_ms = llm_ms
+
+    def encode(self, texts, **kwargs):
+        return np.asarray([self.encode_text(text) for text in texts], dtype=np.float32)
+
+    def score_batch(self, pairs):
+        """Reranker gia: ti le tu cua query co trong document"""
+        from embedding.sparse_embedder import tokenize
+        time.sleep(self.rerank_ms / 1000 * len(pairs) / 30) # rerank_ms cho 30 cap (TOP_K * 3)
+        scores = []
+        for query, text in pairs:
+            query_tokens = set(tokenize(query))
+            scores.append(len(query_tokens & set(tokenize(text))) / (len(query_tokens) or 1))
+        return scores
+
+    def ollama_client(self):
+        backends = self
+
+        class Client:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def chat(self, **kwargs):
+                time.sleep(backends.llm_ms / 1000)
+                return {"message": {"content": "Câu trả lời mô phỏng."}}
+
+        return Client
+
+    def install(self, stack: ExitStack):
+        """Patch cac module cua app, tra ve (client qdrant, bm25, reranker)"""
+        import ollama
+        from qdrant_client import QdrantClient
+        from qdrant_client.models import PointStruct, SparseVector
+
+        import embedding.embedder as embedder
+        import llm.generator as generator
+        import retrieval.hybrid_retriever as hybrid_retriever
+        import retrieval.retriever as retriever
+        from embedding.sparse_embedder import SparseEmbedder
+        from reranking.reranker import CrossEncoderReranker
+        from scoring.bm25 import BM25
+        from vectorstore import qdrant
+        from vectorstore.qdrant import COLLECTION_NAME
+
+        sparse_embedder = SparseEmbedder()
+        sparse_embedder.fit(self.corpus)
+        bm25 = BM25(sparse_embedder)
+        bm25.build_index(self.corpus, self.ids)
+
+        client = QdrantClient(":memory:")
+        qdrant.ensure_collection(client)
+        for start in range(0, len(self.corpus), 256):
+            client.upsert(COLLECTION_NAME, points=[
+                PointStruct(
+                    id=self.ids[i],
+                    vector={"dense": self.encode_text(self.corpus[i]), "sparse": SparseVector(**sparse_embedder.encode(self.corpus[i]))},
+                    payload={"text": self.corpus[i], "type": "project"},
+                )
+                for i in range(start, min(start + 256, len(self.corpus)))
+            ])
+
+        stack.enter_context(patch.object(embedder, "_model", SimpleNamespace(encode=self.encode)))
+        stack.enter_context(patch.object(retriever, "get_qdrant_client", lambda: client))
+        stack.enter_context(patch.object(hybrid_retriever, "get_qdrant_client", lambda: client))
+        stack.enter_context(patch.object(hybrid_retriever, "is_sparse_search_ready", lambda: True))
+        stack.enter_context(patch.object(hybrid_retriever, "route_types", lambda query: None)) # query tong hop khong co intent
+        stack.enter_context(patch.object(ollama, "Client", self.ollama_client()))
+        stack.enter_context(patch.object(generator, "MODEL_PROVIDER", "ollama"))
+        return client, bm25, CrossEncoderReranker(SimpleNamespace(score_batch=self.score_batch))
+
+def live_backends():
+    from core.startup import get_bm25, get_reranker, initialize_rag_components
+    from vectorstore.qdrant import get_qdrant_client
+
+    initialize_rag_components()
+    if get_bm25() is None:
+        raise SystemExit("RAG components could not be initialized (is Qdrant running and the collection ingested?)")
+    return get_qdrant_client(), get_bm25(), get_reranker()
+
+def print_results(results: dict, baseline: dict | None = None):
+    for stage, metrics in results["stages"].items():
+        base = (baseline or {}).get("stages", {}).get(stage, {})
+        parts = []
+        for key, value in metrics.items():
+            if key == "latency_ms":
+                parts.extend(f"{name}={ms:.1f}ms" + (f" ({ms - base[key][name]:+.1f})" if key in base else "") for name, ms in value.items() if name != "mean")
+            elif key in base:
+                parts.append(f"{key}={value:.3f} ({value - base[key]:+.3f})")
+            else:
+                parts.append(f"{key}={value:.3f}")
+        print(f"{stage:<9} " + "  ".join(parts))
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality + per-stage latency on a labelled query set")
+    parser.add_argument("--queries", help="JSON Lines {question, relevant}, bat buoc neu khong --offline")
+    parser.add_argument("--offline", action="store_true", help="corpus + query tong hop, Qdrant in-memory, model / Ollama gia")
+    parser.add_argument("--stages", nargs="+", choices=STAGES[:3], default=list(STAGES[:3]))
+    parser.add_argument("--generate", action="store_true", help="do them latency sinh cau tra loi (Ollama)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--limit", type=int, help="chi chay N query dau")
+    parser.add_argument("--documents", type=int, default=2000, help="--offline: so chunk")
+    parser.add_argument("--num-queries", type=int, default=200, help="--offline: so query")
+    parser.add_argument("--noise", type=float, default=1.0, help="--offline: nhieu cua dense model gia")
+    parser.add_argument("--rerank-ms", type=float, default=0.0, help="--offline: latency reranker gia cho 30 cap")
+    parser.add_argument("--llm-ms", type=float, default=50.0, help="--offline: latency Ollama gia")
+    parser.add_argument("--output", help="ghi ket qua ra file JSON")
+    parser.add_argument("--compare", help="file JSON cua lan chay truoc, in chenh lech")
+    args = parser.parse_args()
+    if not args.offline and not args.queries:
+        parser.error("--queries is required unless --offline")
+
+    from vectorstore.qdrant import COLLECTION_NAME
+
+    stages = args.stages + (["generate"] if args.generate else [])
+    with ExitStack() as stack:
+        if args.offline:
+            backends = OfflineBackends(args.documents, args.num_queries, args.noise, args.rerank_ms, args.llm_ms)
+            client, bm25, reranker = backends.install(stack)
+            queries = backends.queries
+        else:
+            client, bm25, reranker = live_backends()
+            queries = load_queries(args.queries)
+        queries = queries[:args.limit] if args.limit else queries
+        labels = resolve_labels(client, queries, COLLECTION_NAME)
+        stage_results = evaluate(queries, labels, bm25, reranker, stages, args.k)
+
+    results = {
+        "mode": "offline" if args.offline else "live",
+        "num_queries": len(queries),
+        "config": config_snapshot(),
+        "stages": stage_results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Tao model BERT khoi tao ngau nhien (kien truc giong model that) luu tren dia, de chay benchmark / test backend
+ma khong can tai model tu HuggingFace Hub.
+
+    python -m evaluation.random_models --output models/random --size e5-small
+"""
+import argparse
+import os
+
+SIZES = {
+    # ten: (layers, hidden, heads, intermediate)
+    "tiny": (2, 32, 2, 64),
+    "minilm-l6": (6, 384, 12, 1536),  # ~ cross-encoder/ms-marco-MiniLM-L-6-v2
+    "e5-small": (12, 384, 12, 1536),  # ~ intfloat/multilingual-e5-small
+}
+
+def _tokenizer(words: list[str]):
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    vocabulary = {word: i for i, word in enumerate(["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + sorted(set(words)))}
+    tokenizer = Tokenizer(models.WordLevel(vocabulary, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B [SEP]",
+        special_tokens=[("[CLS]", 2), ("[SEP]", 3)],
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]", cls_token="[CLS]", sep_token="[SEP]",
+    ), len(vocabulary)
+
+def build_random_models(
+    output_dir: str, size: str = "tiny", words: list[str] | None = None, seed: int = 0, initializer_range: float = 0.02,
+) -> tuple[str, str]:
+    """
+    Tra ve (duong dan bi-encoder cho SentenceTransformer, duong dan cross-encoder cho CrossEncoder).
+    initializer_range lon hon -> output cua model ngau nhien phan tan hon (co ich khi so sanh sai so giua cac backend).
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertForSequenceClassification
+
+    from evaluation.bench_bm25 import SYLLABLES
+
+    torch.manual_seed(seed)
+    layers, hidden, heads, intermediate = SIZES[size]
+    tokenizer, vocabulary_size = _tokenizer((words or []) + SYLLABLES)
+    config = BertConfig(
+        vocab_size=vocabulary_size, hidden_size=hidden, num_hidden_layers=layers, num_attention_heads=heads,
+        intermediate_size=intermediate, max_position_embeddings=512, num_labels=1, initializer_range=initializer_range,
+    )
+
+    cross_encoder_dir = os.path.join(output_dir, f"{size}-cross-encoder")
+    BertForSequenceClassification(config).save_pretrained(cross_encoder_dir)
+    tokenizer.save_pretrained(cross_encoder_dir)
+
+    # Bi-encoder: BERT + mean pooling giong e5
+    bert_dir = os.path.join(output_dir, f"{size}-bert")
+    BertForSequenceClassification(config).bert.save_pretrained(bert_dir)
+    tokenizer.save_pretrained(bert_dir)
+    transformer = models.Transformer(bert_dir, max_seq_length=512)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    bi_encoder_dir = os.path.join(output_dir, f"{size}-bi-encoder")
+    SentenceTransformer(modules=[transformer, pooling], device="cpu").save_pretrained(bi_encoder_dir)
+
+    return bi_encoder_dir, cross_encoder_dir
+
+def main():
+    parser = argparse.ArgumentParser(description="Build random-weight BERT bi-encoder / cross-encoder on disk")
+    parser.add_argument("--output", default="models/random")
+    parser.add_argument("--size", choices=sorted(SIZES), default="e5-small")
+    args = parser.parse_args()
+    print(build_random_models(args.output, args.size))
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,16 @@
-import json
 import logging
-from pathlib import Path
 from datetime import datetime
 
 from core.settings_loader import load_settings
+from ingestion.helpers.load_table import load_table
 from ingestion.helpers.make_metadata import make_metadata
 
 settings = load_settings()
 logger = logging.getLogger("ingestion")
 
 def chunk_interior_styles():
-    file_path = Path(settings["data"]["processed_dir"]) / "interiorStyles.json"
-    
-    if not file_path.exists():
-        logger.error(f"File not found: {file_path}")
-        return []
-    
-    try: 
-        with open(file_path, 'r', encoding='utf-8') as file:
-            interior_styles = json.load(file)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON format {e}")
-        return []
-    except Exception as e:
-        logger.error(f"Failed to load {e}")
-        return []
-    
-    # Chuyen tu dict sang list neu can thiet
-    if isinstance(interior_styles, dict):
-        interior_styles = [interior_styles]
-        
-    # kiem tra xem co phai list khong
-    if not isinstance(interior_styles, list):
-        logger.error("Interior styles data is not a list")
-        return []
-    
-    if not interior_styles:
-        logger.warning("No interior styles found in the file")
+    interior_styles = load_table("interiorStyles")
+    if interior_styles is None:
         return []
     
     chunks = []
@@ -1,46 +1,17 @@
-import json
 import logging
-from pathlib import Path
 
 from datetime import datetime
 
 from core.settings_loader import load_settings
+from ingestion.helpers.load_table import load_table
 from ingestion.helpers.make_metadata import make_metadata
 
 settings = load_settings()
 logger = logging.getLogger("ingestion")
 
 def chunk_architecture_types():
-    # Khai bao file path
-    file_path = Path(settings["data"]["processed_dir"]) / "architectureTypes.json"
-    
-    # Kiem tra file ton tai
-    if not file_path.exists():
-        logger.error(f"File not found: {file_path}")
-        return []
-    
-    # Doc du lieu tu file JSON,
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            architecture_types = json.load(f)
-    # neu file json khong hop le thi log loi
-    except json.JSONDecodeError as e: # bat loi khi doc file json
-        logger.error(f"Invalid JSON format {e}")
-        return []
-    # neu khong co du lieu thi log loi
-    except Exception as e:
-        logger.error(f"Failed to load {e}")
-        return []
-    
-    if isinstance(architecture_types, dict): # neu du lieu la dict thi chuyen thanh list chua dict. Vi du: { "name": "Modern" } => [ { "name": "Modern" } ]
-        architecture_types = [architecture_types]
-    
-    if not isinstance(architecture_types, list): # kiem tra kieu du lieu co phai la list khong. Vi du: [ { "name": "Modern" }, { "name": "Contemporary" } ]
-        logger.error("Architecture types data is not a list")
-        return []
-
-    if not architecture_types: # kiem tra danh sach co rong khong. VI du: []
-        logger.warning("No architecture types found in the data")
+    architecture_types = load_table("architectureTypes")
+    if architecture_types is None:
         return []
     
     chunks = [] # danh sach luu cac doan van ban
@@ -1,46 +1,16 @@
-import json
 import logging
-from pathlib import Path
 from datetime import datetime
 
 from core.settings_loader import load_settings
+from ingestion.helpers.load_table import load_table
 from ingestion.helpers.make_metadata import make_metadata
 
 settings = load_settings()
 logger = logging.getLogger("ingestion")
 
 def chunk_company_info():
-    # khai bao file path
-    file_path = Path(settings["data"]["processed_dir"]) / "companyInfo.json"
-    
-    if not file_path.exists():
-        logger.error(f"File not found: {file_path}")
-        return []
-    
-    # doc du lieu tu file json
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            company_info = json.load(f)
-    # neu file json khong hop le thi log loi. Vi du: , cuois cau, thieu ngoac,....
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON format {e}")
-        return []
-    # neu khong co du lieu thi log loi
-    except Exception as e:
-        logger.error(f"Failed to load {e}")
-        return []
-    
-    # neu du lieu la dict thi chuyen thanh list chua dict. Vi du: { "companyName": "Company A", "description": "..." } => [ { "companyName": "Company A", "description": "..." } ]
-    if isinstance(company_info, dict):
-        company_info = [company_info]
-        
-    # kiem tra kieu du lieu co phai la list khong. Vi du: [ { "name": "Company A", "description": "..." }, { "name": "Company B", "description": "..." } ]
-    if not isinstance(company_info, list):
-        logger.error("Company info data is not a list")
-        return []
-    
-    if not company_info: # kiem tra danh sach co rong khong. Vi du: []
-        logger.warning("No company info found in the data")
+    company_info = load_table("companyInfo")
+    if company_info is None:
         return []
     
     chunks = [] # danh sach luu cac doan van ban
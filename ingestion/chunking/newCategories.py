@@ -1,40 +1,16 @@
-import json
 import logging
-from pathlib import Path
 from datetime import datetime
 
 from core.settings_loader import load_settings
+from ingestion.helpers.load_table import load_table
 from ingestion.helpers.make_metadata import make_metadata
 
 settings = load_settings()
 logger = logging.getLogger("ingestion")
 
 def chunk_news_categories():
-    file_path = Path(settings["data"]["processed_dir"]) / "newsCategories.json"
-    
-    if not file_path.exists():
-        logger.error(f"File not found: {file_path}")
-        return []
-    
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            news_categories = json.load(f)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON format {e}")
-        return []
-    except Exception as e:
-        logger.error(f"Failed to load {e}")
-        return []
-    
-    if isinstance(news_categories, dict):
-        news_categories = [news_categories]
-        
-    if not isinstance(news_categories, list):
-        logger.error("News categories data is not a list or dict")
-        return []
-    
-    if not news_categories:
-        logger.warning("No news categories found in the file")
+    news_categories = load_table("newsCategories")
+    if news_categories is None:
         return []
     
     chunks = []
@@ -1,52 +1,22 @@
-import json
 import logging
-from pathlib import Path
-from bs4 import BeautifulSoup
 from datetime import datetime
 
 from core.settings_loader import load_settings
+from ingestion.helpers.html_to_text import HtmlTextCache
+from ingestion.helpers.load_table import load_table
 from ingestion.helpers.make_metadata import make_metadata
 from ingestion.helpers.split_paragraphs import split_paragraphs
 
 settings = load_settings()
 logger = logging.getLogger("ingestion")
 
-def html_to_text(html: str) -> str:  # Hàm nhận vào chuỗi HTML và trả về text thuần (không có tag)
-    soup = BeautifulSoup(html, "html.parser")  # Parse chuỗi HTML bằng parser mặc định của Python
-    return soup.get_text(separator=" ", strip=True)  
-    # Lấy toàn bộ text trong HTML
-    # separator=" " : chèn dấu cách giữa các đoạn text để tránh dính chữ
-    # strip=True     : loại bỏ khoảng trắng dư ở đầu và cuối chuỗi
-
 def chunk_news():
-    file_path = Path(settings["data"]["processed_dir"]) / "news.json"
-    
-    if not file_path.exists():
-        logger.error(f"File not found: {file_path}")
-        return []
-    
-    try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            news = json.load(file)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON format {e}")
-        return []
-    except Exception as e:
-        logger.error(f"Failed to load {e}")
-        return []
-    
-    if isinstance(news, dict):
-        news = [news]
-        
-    if not isinstance(news, list):
-        logger.error("News categories data is not a list")
-        return []
-    
-    if not news:
-        logger.warning("No news found in the file")
+    news = load_table("news")
+    if news is None:
         return []
     
     chunks = []
+    html_cache = HtmlTextCache() # text da extract cua cac lan chay truoc, theo hash HTML
     
     for idx, news_item in enumerate(news):
         if not isinstance(news_item, dict):
@@ -58,8 +28,8 @@ def chunk_news():
         news_item_slug = news_item.get("slug", "")
         news_item_excerpt = news_item.get("excerpt", "")
         news_item_content = news_item.get("content", "")
-        news_item_content = html_to_text(news_item_content)
-        news_item_content_split = split_paragraphs(news_item_content)
+        news_item_content = html_cache.html_to_text(news_item_content)
+        news_item_content_split = split_paragraphs(news_item_content, prefix=f"Nội dung tin tức {news_item_title}: ")
         
         base_metadata = {
             "type": "news",
@@ -94,5 +64,5 @@ def chunk_news():
                 "part_index": i
             })
                 
- 
+    html_cache.save()
     return chunks
\ No newline at end of file
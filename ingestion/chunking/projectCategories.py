@@ -1,40 +1,16 @@
-import json
 import logging
-from pathlib import Path
 from datetime import datetime
 
 from core.settings_loader import load_settings
+from ingestion.helpers.load_table import load_table
 from ingestion.helpers.make_metadata import make_metadata
 
 settings = load_settings()
 logger = logging.getLogger("ingestion")
 
 def chunk_project_categories():
-    file_path = Path(settings["data"]["processed_dir"]) / "projectCategories.json"
-    
-    if not file_path.exists():
-        logger.error(f"File not found: {file_path}")
-        return []
-    
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            project_categories = json.load(f)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON format {e}")
-        return []
-    except Exception as e:
-        logger.error(f"Failed to load {e}")
-        return []
-    
-    if isinstance(project_categories, dict):
-        project_categories = [project_categories]
-        
-    if not isinstance(project_categories, list):
-        logger.error("Project categories data is not a list")
-        return []
-    
-    if not project_categories:
-        logger.warning("No project categories found in the file")
+    project_categories = load_table("projectCategories")
+    if project_categories is None:
         return []
     
     chunks = []
@@ -1,9 +1,8 @@
-import json
 import logging
-from pathlib import Path
 from datetime import datetime
 
 from core.settings_loader import load_settings
+from ingestion.helpers.load_table import load_table
 from ingestion.helpers.make_metadata import make_metadata
 from ingestion.helpers.split_paragraphs import split_paragraphs
 
@@ -11,31 +10,8 @@ settings = load_settings()
 logger = logging.getLogger("ingestion")
 
 def chunk_projects():
-    file_path = Path(settings["data"]["processed_dir"]) / "projects.json"
-    
-    if not file_path.exists():
-        logger.error(f"File not found: {file_path}")
-        return []
-    
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            projects = json.load(f)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON format {e}")
-        return []
-    except Exception as e:
-        logger.error(f"Failed to load {e}")
-        return []   
-    
-    if isinstance(projects, dict):
-        projects = [projects]
-        
-    if not isinstance(projects, list):
-        logger.error("Projects data is not a list")
-        return []
-    
-    if not projects:
-        logger.warning("No projects found in the file")
+    projects = load_table("projects")
+    if projects is None:
         return []
     
     chunks = []
@@ -84,7 +60,7 @@ def chunk_projects():
             })
         
         # 2/ Description chunk
-        for i, part in enumerate(split_paragraphs(project_description)):
+        for i, part in enumerate(split_paragraphs(project_description, prefix=f"Mô tả dự án {project_name}: ")):
             chunks.append({
                 "text": f"Mô tả dự án {project_name}: {part}",
                 "metadata": make_metadata(
@@ -0,0 +1,151 @@
+"""
+HTML -> text thuan cho content cua news, cung ket qua voi BeautifulSoup(html, "html.parser").get_text(separator=" ", strip=True):
+moi text node duoc strip, bo node rong, noi bang 1 dau cach (bo qua script / style / template, comment, doctype).
+
+Extractor:
+    htmlparser : html.parser.HTMLParser chi gom text node, khong dung cay DOM (mac dinh, nhanh nhat)
+    bs4        : BeautifulSoup nhu truoc
+
+Text da extract duoc cache theo hash cua HTML trong 1 file JSON, chay ingestion lai khong parse lai bai viet khong doi.
+"""
+import hashlib
+import json
+import logging
+import os
+from html import unescape
+from html.entities import html5
+from html.parser import HTMLParser
+
+from core.settings_loader import load_settings
+
+settings = load_settings()
+logger = logging.getLogger("ingestion")
+
+HTML_EXTRACTOR = settings.get("ingestion", {}).get("html_extractor", "htmlparser")
+HTML_TEXT_CACHE_PATH = settings.get("ingestion", {}).get("html_text_cache", "data/html_text_cache.json")
+
+SKIPPED_TAGS = {"script", "style", "template"} # BeautifulSoup khong dua text cua cac tag nay vao get_text
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem", "meta", "param", "source",
+    "track", "wbr", "basefont", "bgsound", "command", "frame", "image", "isindex", "nextid", "spacer",
+}
+
+class _TextExtractor(HTMLParser):
+    """Gom text node cua HTML theo thu tu, text node bi ngat boi moi tag / comment / declaration"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False) # tu xu ly entity de giong BeautifulSoup (vd "&unknown;" -> "&unknown")
+        self.parts = []
+        self.current = []
+        self.skipped_depth = 0
+        self.closed_void_tags = [] # <br> da tu dong, </br> sau do bi BeautifulSoup bo qua (khong ngat text node)
+
+    def _flush(self):
+        if self.current:
+            text = "".join(self.current).strip()
+            if text and not self.skipped_depth:
+                self.parts.append(text)
+            self.current = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in SKIPPED_TAGS:
+            self.skipped_depth += 1
+        elif tag in VOID_TAGS:
+            self.closed_void_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self.closed_void_tags:
+            self.closed_void_tags.remove(tag)
+            return
+        self._flush()
+        if tag in SKIPPED_TAGS and self.skipped_depth:
+            self.skipped_depth -= 1
+
+    def handle_data(self, data):
+        self.current.append(data)
+
+    def handle_entityref(self, name):
+        self.current.append(html5.get(f"{name};") or html5.get(name) or f"&{name}")
+
+    def handle_charref(self, name):
+        self.current.append(unescape(f"&#{name};")) # &#150; -> windows-1252 nhu BeautifulSoup
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith("CDATA["): # CDATA duoc BeautifulSoup giu lai nhu text
+            self.current.append(data[len("CDATA["):])
+            self._flush()
+
+    def handle_comment(self, data):
+        self._flush()
+
+    handle_decl = handle_pi = handle_comment
+
+    def text(self) -> str:
+        self.close()
+        self._flush()
+        return " ".join(self.parts)
+
+def _htmlparser_to_text(html: str) -> str:
+    if "<" not in html and "&" not in html: # text thuan, khong can parse
+        return html.strip()
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    return extractor.text()
+
+def _bs4_to_text(html: str) -> str:
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "html.parser").get_text(separator=" ", strip=True)
+
+EXTRACTORS = {
+    "htmlparser": _htmlparser_to_text,
+    "bs4": _bs4_to_text,
+}
+
+class HtmlTextCache:
+    """Cache text da extract theo sha1(extractor + HTML), luu ra file JSON giua cac lan chay ingestion"""
+
+    def __init__(self, path: str | None = None, extractor: str | None = None):
+        path = HTML_TEXT_CACHE_PATH if path is None else path # "" -> khong doc / ghi file
+        extractor = extractor or HTML_EXTRACTOR
+        if extractor not in EXTRACTORS:
+            raise ValueError(f"Unknown HTML extractor '{extractor}', expected one of {sorted(EXTRACTORS)}")
+        self.path = path
+        self.extractor = extractor
+        self.entries = {}
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    self.entries = json.load(file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable HTML text cache {path}: {e}")
+
+    def html_to_text(self, html: str) -> str:
+        if not html:
+            return ""
+        key = hashlib.sha1(f"{self.extractor}\0{html}".encode("utf-8")).hexdigest()
+        text = self.entries.get(key)
+        if text is None:
+            self.misses += 1
+            text = EXTRACTORS[self.extractor](html)
+        else:
+            self.hits += 1
+        self.used[key] = text
+        return text
+
+    def save(self):
+        """Ghi lai chi cac entry dung trong lan chay nay (bai viet da xoa / da sua khong con trong cache)"""
+        logger.info(f"HTML text cache: {self.hits} hits, {self.misses} parsed")
+        if not self.path or (not self.misses and len(self.used) == len(self.entries)):
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(self.used, file, ensure_ascii=False)
+        os.replace(f"{self.path}.tmp", self.path)
@@ -0,0 +1,126 @@
+"""
+Doc JSON lon theo kieu streaming (khong json.load ca file): chi giu 1 record trong bo nho tai moi thoi diem.
+
+    {"exportedAt": "...", "tables": {"projects": [{...}, {...}], "news": [...]}}
+    -> iter_export_tables(path) yield ("projects", <iterator record>), ("news", <iterator record>), ...
+"""
+import json
+from typing import IO, Iterator
+
+READ_SIZE = 1 << 16 # 64 KB moi lan doc file
+
+class JsonStream:
+    """Buffer tren file text + json.JSONDecoder.raw_decode de decode tung gia tri JSON ma khong doc het file"""
+
+    def __init__(self, file: IO[str], read_size: int = READ_SIZE):
+        self.file = file
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Doc them read_size ky tu vao buffer (bo phan da decode), False neu het file"""
+        if self.eof:
+            return False
+        data = self.file.read(self.read_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """Ky tu tiep theo khac khoang trang ("" neu het file)"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found or 'EOF'}'")
+        self.position += 1
+
+    def decode(self):
+        """Decode 1 gia tri JSON day du tai vi tri hien tai (doc them file neu gia tri chua nam tron trong buffer)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # so o cuoi buffer co the bi cat ("12" cua "123") -> chi chap nhan khi con ky tu phia sau hoac het file
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def iter_array(self) -> Iterator:
+        """Yield tung phan tu cua array tai vi tri hien tai"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == ",":
+                self.position += 1
+                continue
+            self.expect("]")
+            return
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield tung key cua object tai vi tri hien tai, caller phai doc (hoac skip) gia tri truoc khi lay key tiep theo"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.position += 1
+                continue
+            self.expect("}")
+            return
+
+    def iter_records(self) -> Iterator:
+        """Record cua 1 bang: array -> tung phan tu, object / gia tri khac -> 1 record"""
+        if self.peek() == "[":
+            yield from self.iter_array()
+        else:
+            yield self.decode()
+
+def iter_export_tables(path, tables_key: str = "tables") -> Iterator[tuple[str, Iterator]]:
+    """
+    Yield (ten bang, iterator record) cua file export theo thu tu trong file.
+    Iterator record phai duoc doc het (hoac bo qua) truoc khi lay bang tiep theo.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        stream = JsonStream(file)
+        for key in stream.iter_object():
+            if key != tables_key:
+                stream.decode() # metadata cua export (exportedAt, version, ...)
+                continue
+            for table_name in stream.iter_object():
+                records = stream.iter_records()
+                yield table_name, records
+                for _ in records: # caller bo qua bang -> van phai doc qua de toi bang tiep theo
+                    pass
+
+def iter_json_records(path) -> Iterator:
+    """Record cua file .jsonl (1 record / dong) hoac .json (array hoac 1 object), doc streaming"""
+    with open(path, "r", encoding="utf-8") as file:
+        if str(path).endswith(".jsonl"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from JsonStream(file).iter_records()
@@ -0,0 +1,42 @@
+import json
+import logging
+from pathlib import Path
+from typing import Iterator
+
+from core.settings_loader import load_settings
+from ingestion.helpers.json_stream import iter_json_records
+
+settings = load_settings()
+logger = logging.getLogger("ingestion")
+
+def load_table(table_name: str) -> Iterator[dict] | None:
+    """
+    Record cua 1 bang trong processed_dir: <table>.jsonl (1 record / dong) hoac <table>.json (array hoac 1 object).
+    Tra ve generator doc tung record (chunker xu ly xong record nao bo record do, khong giu ca bang trong bo nho),
+    None neu khong co file (da log).
+    """
+    processed_dir = Path(settings["data"]["processed_dir"])
+    file_path = next((path for path in (processed_dir / f"{table_name}.jsonl", processed_dir / f"{table_name}.json") if path.exists()), None)
+
+    if file_path is None:
+        logger.error(f"File not found: {processed_dir / table_name}.jsonl|.json")
+        return None
+
+    return _iter_table(file_path)
+
+def _iter_table(file_path: Path) -> Iterator[dict]:
+    """File loi giua chung thi log va dung o record loi (cac record truoc do da duoc chunk)"""
+    count = 0
+    try:
+        for record in iter_json_records(file_path):
+            count += 1
+            yield record
+    except (json.JSONDecodeError, ValueError) as e: # bat loi khi doc file json
+        logger.error(f"Invalid JSON format in {file_path} after {count} records: {e}")
+        return
+    except Exception as e:
+        logger.error(f"Failed to load {file_path} after {count} records: {e}")
+        return
+
+    if count == 0:
+        logger.warning(f"No records found in {file_path}")
@@ -1,8 +1,40 @@
+import hashlib
+import json
 import uuid
 
+CHUNK_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "nmk-chatbot/chunks")
+VOLATILE_FIELDS = ("created_at", "chunk_id", "content_hash") # thay doi moi lan chay, khong tinh vao content hash
+
 def make_metadata(base, **extra):
     return {
         **base,
-        "chunk_id": str(uuid.uuid4()),
         **extra
-    }
\ No newline at end of file
+    }
+
+def content_hash(text: str, metadata: dict) -> str:
+    """Hash noi dung chunk: text + metadata (tru cac field thay doi moi lan chay ingestion)"""
+    stable_metadata = {key: value for key, value in metadata.items() if key not in VOLATILE_FIELDS}
+    content = json.dumps({"text": text, "metadata": stable_metadata}, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def record_id(metadata: dict):
+    """Id cua record nguon (project_id, news_item_id, ...): field *_id dau tien cua base metadata"""
+    return next((value for key, value in metadata.items() if key.endswith("_id") and key not in VOLATILE_FIELDS), None)
+
+def assign_chunk_ids(chunks: list[dict]) -> list[dict]:
+    """
+    Gan chunk_id co dinh (uuid5) cho moi chunk tu source, record id, chunk_type, part_index va content hash.
+    Chay lai ingestion tren cung du lieu -> cung chunk_id, chunk thay doi noi dung -> chunk_id moi.
+    """
+    for chunk in chunks:
+        metadata = chunk.setdefault("metadata", {})
+        metadata["content_hash"] = content_hash(chunk["text"], metadata)
+        key = "|".join(str(part) for part in (
+            metadata.get("source"),
+            record_id(metadata),
+            metadata.get("chunk_type"),
+            metadata.get("part_index"),
+            metadata["content_hash"],
+        ))
+        metadata["chunk_id"] = str(uuid.uuid5(CHUNK_ID_NAMESPACE, key))
+    return chunks
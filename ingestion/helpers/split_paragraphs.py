@@ -1,45 +1,132 @@
+"""
+Chia text dai thanh chunk theo so token cua tokenizer embedding model (chunking.chunk_size / chunk_overlap).
+
+Text duoc tokenize 1 lan (offset mapping), ranh gioi cau (. ! ? … va xuong dong) duoc doi sang vi tri token,
+moi chunk la 1 khoang token [start, end) cat o ranh gioi cau gan nhat trong chunk_size (cau dai hon chunk_size
+thi cat cung theo token). Chunk sau bat dau lai tu ranh gioi cau trong chunk_overlap token cuoi cua chunk truoc.
+Khong cat / noi chuoi lap lai -> thoi gian tuyen tinh theo do dai text.
+"""
 import logging
+import re
+from bisect import bisect_left, bisect_right
+
+from core.settings_loader import load_settings
 
+settings = load_settings()
 logger = logging.getLogger("ingestion")
 
-def split_paragraphs(text, max_len=400):
-    if not text:
-        logger.warning("Empty text provided to split_paragraphs")
-        return []
+CHUNKING_CONFIG = settings.get("chunking", {})
+CHUNK_SIZE = CHUNKING_CONFIG.get("chunk_size", 512)
+CHUNK_OVERLAP = CHUNKING_CONFIG.get("chunk_overlap", 50)
+TOKENIZER_NAME = CHUNKING_CONFIG.get("tokenizer") or settings["embedding"]["model"] # mac dinh: tokenizer cua embedding model
+
+# ranh gioi cau: sau . ! ? … (kem dau dong ngoac / nhay) va khoang trang, hoac xuong dong
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+|\n\s*")
+WORD_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+class RegexTokenizer:
+    """Tokenizer du phong khi khong load duoc tokenizer cua model: moi tu / dau cau la 1 token (so token xap xi)"""
+
+    model_max_length = None
+
+    def __call__(self, text: str, add_special_tokens: bool = False, return_offsets_mapping: bool = True) -> dict:
+        return {"offset_mapping": [match.span() for match in WORD_TOKEN.finditer(text)]}
 
-    sentences = text.split(". ")
-    out = []
-    buf = ""
+    def num_special_tokens_to_add(self) -> int:
+        return 0
 
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
+def load_tokenizer(name: str = TOKENIZER_NAME):
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(name)
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer {name} ({e}), chunk sizes are approximated by word count")
+        return RegexTokenizer()
 
-        # Trường hợp 1: câu dài hơn max_len → cắt thông minh
-        while len(sentence) > max_len:
-            # tìm dấu chấm gần nhất trước max_len
-            cut = sentence.rfind(". ", 0, max_len)
+class TokenChunker:
+    """
+    chunk_size : so token toi da cua 1 chunk (gom ca prefix ma caller gan vao truoc chunk), bi gioi han them
+                 boi max sequence length cua model tru special token de embedding khong bi cat
+    chunk_overlap : so token toi da lap lai giua 2 chunk lien tiep
+    """
 
-            if cut == -1:
-                # fallback: không có dấu chấm → cắt cứng
-                cut = max_len
+    def __init__(self, tokenizer, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+        self.tokenizer = tokenizer
+        max_length = getattr(tokenizer, "model_max_length", None)
+        if max_length and max_length < 1_000_000: # tokenizer khong khai bao max length tra ve so rat lon
+            chunk_size = min(chunk_size, max_length - tokenizer.num_special_tokens_to_add())
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
 
-            chunk = sentence[:cut].strip()
+    def _offsets(self, text: str) -> list[tuple[int, int]]:
+        return self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._offsets(text)) if text else 0
+
+    def _boundary_tokens(self, text: str, offsets: list[tuple[int, int]]) -> list[int]:
+        """Vi tri token bat dau moi cau (tang dan, trong khoang (0, so token))"""
+        starts = [start for start, _ in offsets]
+        boundaries = []
+        for match in SENTENCE_BOUNDARY.finditer(text):
+            token = bisect_left(starts, match.end()) # token dau tien cua cau tiep theo
+            if 0 < token < len(offsets) and (not boundaries or boundaries[-1] != token):
+                boundaries.append(token)
+        return boundaries
+
+    def split(self, text: str, prefix: str = "") -> list[str]:
+        """Chia text thanh cac chunk, moi chunk + prefix toi da chunk_size token"""
+        offsets = self._offsets(text) if text else []
+        if not offsets:
+            return []
+
+        budget = max(1, self.chunk_size - self.count_tokens(prefix))
+        overlap = min(self.chunk_overlap, budget // 2)
+        boundaries = self._boundary_tokens(text, offsets)
+        total = len(offsets)
+
+        chunks = []
+        start = previous_end = 0
+        while start < total:
+            limit = start + budget
+            hard_cut = False
+            if limit >= total:
+                end = total
+            else:
+                index = bisect_right(boundaries, limit) - 1 # ranh gioi cau cuoi cung vua trong budget
+                if index >= 0 and boundaries[index] > max(start, previous_end): # chunk phai co noi dung moi ngoai phan overlap
+                    end = boundaries[index]
+                else: # 1 cau dai hon budget -> cat theo token
+                    end, hard_cut = limit, True
+
+            chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
             if chunk:
-                out.append(chunk)
+                chunks.append(chunk)
+            if end >= total:
+                break
+            previous_end = end
 
-            sentence = sentence[cut:].strip()
+            # chunk sau bat dau tu ranh gioi cau dau tien trong overlap token cuoi cua chunk nay
+            index = bisect_left(boundaries, end - overlap)
+            if overlap and index < len(boundaries) and start < boundaries[index] < end:
+                start = boundaries[index]
+            elif hard_cut and overlap:
+                start = max(end - overlap, start + 1)
+            else:
+                start = end
+        return chunks
 
-        # Trường hợp 2: ghép câu vào buffer
-        if len(buf) + len(sentence) + 2 <= max_len:
-            buf += sentence + ". "
-        else:
-            out.append(buf.strip())
-            buf = sentence + ". "
+_chunker = None
 
-    # flush buffer cuối
-    if buf:
-        out.append(buf.strip())
+def get_chunker() -> TokenChunker:
+    global _chunker # moi process chunker load tokenizer 1 lan
+    if _chunker is None:
+        _chunker = TokenChunker(load_tokenizer())
+    return _chunker
 
-    return out
+def split_paragraphs(text, prefix: str = ""):
+    """Chia text thanh cac doan vua chunk_size token (tinh ca prefix se duoc gan truoc moi doan)"""
+    if not text:
+        logger.warning("Empty text provided to split_paragraphs")
+        return []
+    return get_chunker().split(text, prefix)
@@ -1,40 +1,72 @@
+import argparse
 import json
 import logging
 from pathlib import Path
 
 from core.settings_loader import load_settings
+from ingestion.helpers.json_stream import iter_export_tables
 
 settings = load_settings()
 logger = logging.getLogger("ingestion")
 
-def load_data():
-    data = json.load(open(Path(settings["data"]["raw_dir"]) / "database_export_2026-01-14T02-32-14.json", "r", encoding="utf-8"))
-    
-    if not data:
+PROCESSED_FORMAT = settings["data"].get("processed_format", "jsonl")
+
+def latest_export_path() -> Path | None:
+    """File database_export_*.json moi nhat trong raw_dir (ten file chua timestamp nen sap xep theo ten)"""
+    exports = sorted(Path(settings["data"]["raw_dir"]).glob("database_export_*.json"))
+    return exports[-1] if exports else None
+
+def write_table(records, output_path: Path, output_format: str = PROCESSED_FORMAT) -> int:
+    """Ghi tung record ra file ngay khi doc duoc (khong giu ca bang trong bo nho), tra ve so record"""
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as outfile:
+        if output_format == "jsonl":
+            for record in records:
+                # ensure_ascii=False de giu nguyen tieng viet, 1 record / dong, khong indent
+                outfile.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                count += 1
+        else:
+            outfile.write("[")
+            for record in records:
+                # indent=4 de format lai file de doc hon
+                outfile.write(("," if count else "") + "\n    " + json.dumps(record, ensure_ascii=False, indent=4).replace("\n", "\n    "))
+                count += 1
+            outfile.write("\n]" if count else "]")
+    return count
+
+def load_data(export_path: Path | None = None, output_format: str = PROCESSED_FORMAT):
+    export_path = export_path or latest_export_path()
+    if export_path is None or not Path(export_path).exists():
         logger.error("No raw data found")
         return
-    
-    tables = data.get("tables", {})
-    
-    if not tables:
-        logger.warning("No tables found")
-        return
-    
-    # table_name: ten bang, table_data: du lieu trong bang
-    for table_name, table_data in tables.items(): 
-        if not table_data:
+
+    processed_dir = Path(settings["data"]["processed_dir"])
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    suffix = ".jsonl" if output_format == "jsonl" else ".json"
+
+    tables = 0
+    # table_name: ten bang, records: iterator record cua bang (doc streaming tu file export)
+    for table_name, records in iter_export_tables(export_path):
+        tables += 1
+        # tao duong dan file moi cho tung bang
+        output_path = processed_dir / f"{table_name}{suffix}"
+        count = write_table(records, output_path, output_format)
+
+        if not count:
             logger.warning(f"No data for table {table_name}")
+            output_path.unlink()
             continue
-        
-        # tao duong dan file json moi cho tung bang
-        output_path = Path(settings["data"]["processed_dir"]) / f"{table_name}.json" 
-        
-        # mo file de ghi du lieu
-        with open(output_path, "w", encoding="utf-8") as outfile: 
-            # ensure_ascii=False de giu nguyen tieng viet, indent=4 de format lai file de doc hon
-            json.dump(table_data, outfile, ensure_ascii=False, indent=4) 
-            
-        logger.info(f"Data for table {table_name} written to {output_path}")
-        
+
+        # xoa file cua format con lai (neu co) de chunker khong doc nham du lieu cu
+        (processed_dir / f"{table_name}{'.json' if suffix == '.jsonl' else '.jsonl'}").unlink(missing_ok=True)
+        logger.info(f"Data for table {table_name} ({count} records) written to {output_path}")
+
+    if not tables:
+        logger.warning("No tables found")
+
 if __name__ == "__main__":
-    load_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Split the raw database export into one processed file per table")
+    parser.add_argument("--export", type=Path, help="file export (mac dinh: database_export_*.json moi nhat trong raw_dir)")
+    parser.add_argument("--format", choices=("jsonl", "json"), default=PROCESSED_FORMAT)
+    args = parser.parse_args()
+    load_data(args.export, args.format)
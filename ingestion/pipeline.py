@@ -1,4 +1,8 @@
+import argparse
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
 
 from ingestion.chunking.architectureTypes import chunk_architecture_types
 from ingestion.chunking.companyInfo import chunk_company_info
@@ -7,30 +11,72 @@ from ingestion.chunking.newCategories import chunk_news_categories
 from ingestion.chunking.news import chunk_news
 from ingestion.chunking.projectCategories import chunk_project_categories
 from ingestion.chunking.projects import chunk_projects
+from ingestion.helpers.make_metadata import assign_chunk_ids
 from core.logging_setup import setup_logging
+from core.settings_loader import load_settings
 
-from vectorstore.upsert import upsert_chunks
+from vectorstore.upsert import sync_chunk_stream, upsert_chunks
+from cache.semantic_cache import mark_index_updated
 
 setup_logging()
+settings = load_settings()
 logger = logging.getLogger("ingestion")
 
-def run_ingestion_pipeline():
-    all_chunks = []
+CHUNKING_WORKERS = settings.get("ingestion", {}).get("chunking_workers", 0) or None # None: so CPU
+
+CHUNKERS = (
+    chunk_architecture_types,
+    chunk_company_info,
+    chunk_interior_styles,
+    chunk_news_categories,
+    chunk_news,
+    chunk_project_categories,
+    chunk_projects,
+)
+
+def iter_chunk_batches(workers: int | None = None) -> Iterator[list[dict]]:
+    """
+    Chay cac chunker trong process pool (JSON parse + strip HTML ton CPU), tra ve chunk cua tung chunker
+    ngay khi chunker do xong de buoc embedding bat dau truoc khi moi chunker chay xong.
+    """
+    start = time.perf_counter()
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers or CHUNKING_WORKERS) as executor:
+        futures = {executor.submit(chunker): chunker.__name__ for chunker in CHUNKERS}
+        for future in as_completed(futures):
+            chunks = assign_chunk_ids(future.result()) # chunk_id co dinh theo noi dung -> chay lai chi upsert phan thay doi
+            total += len(chunks)
+            logger.info(f"{futures[future]}: {len(chunks)} chunks after {time.perf_counter() - start:.2f}s")
+            yield chunks
+    
+    elapsed = time.perf_counter() - start
+    logger.info(f"Chunk stream (chunking overlapped with embedding): {total} chunks in {elapsed:.2f}s ({total / elapsed if elapsed else 0.0:.1f} chunks/s)")
+
+def run_ingestion_pipeline(parallel: bool = True):
+    start = time.perf_counter()
     
-    all_chunks.extend(chunk_architecture_types())
-    all_chunks.extend(chunk_company_info())
-    all_chunks.extend(chunk_interior_styles())
-    all_chunks.extend(chunk_news_categories())
-    all_chunks.extend(chunk_news())
-    all_chunks.extend(chunk_project_categories())
-    all_chunks.extend(chunk_projects())
+    if parallel:
+        # chunking (process pool) -> embedding -> upload (thread pool) chay goi dau nhau
+        stats = sync_chunk_stream(iter_chunk_batches())
+    else:
+        all_chunks = []
+        for chunker in CHUNKERS:
+            all_chunks.extend(chunker())
+        
+        if not all_chunks:
+            logger.warning("No chunks to upsert.")
+            return
+        
+        assign_chunk_ids(all_chunks) # chunk_id co dinh theo noi dung -> chay lai chi upsert phan thay doi
+        stats = upsert_chunks(all_chunks)
     
-    if not all_chunks:
-        logger.warning("No chunks to upsert.")
-        return
+    logger.info(f"Synced chunks into the vector store in {time.perf_counter() - start:.2f}s: {stats}")
     
-    upsert_chunks(all_chunks)
-    logger.info(f"Upserted {len(all_chunks)} chunks into the vector store.")
+    if stats["upserted"] or stats["deleted"]:
+        mark_index_updated() # collection da thay doi -> answer cache cu khong con dung
+    return stats
     
 if __name__ == "__main__":
-    run_ingestion_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chunk processed data and sync it into Qdrant")
+    parser.add_argument("--sequential", action="store_true", help="chay lan luot tung chunker roi moi embed (khong dung process pool)")
+    run_ingestion_pipeline(parallel=not parser.parse_args().sequential)
@@ -1,7 +1,10 @@
 import logging
 import ollama
 import time # Thêm thư viện time để đo thời gian thực thi va theo dõi hiệu suất
-from llm.prompt import build_prompt
+from contextlib import aclosing
+from typing import AsyncIterator
+from llm.prompt import build_prompt, format_history
+from core.metrics import ERRORS
 from core.settings_loader import load_settings
 
 settings = load_settings()
@@ -14,17 +17,81 @@ MODEL_BASE_URL = LLM_CONFIG.get("base_url", "http://localhost:11434")
 MODEL_TEMPERATURE = LLM_CONFIG.get("temperature", 0.2)
 MODEL_MAX_TOKENS = LLM_CONFIG.get("max_tokens", 1024)
 MODEL_TIMEOUT = LLM_CONFIG.get("timeout", 60)
+HISTORY_MAX_CHARS = LLM_CONFIG.get("history_max_chars", 2000) # tong do dai lich su hoi thoai dua vao prompt
+HISTORY_ANSWER_CHARS = LLM_CONFIG.get("history_answer_chars", 600) # cat moi cau tra loi cu con so ky tu nay
 
-def generate_answer(context: str, question: str) -> str:
+# Cac cau tra loi khi khong goi duoc LLM, khong phai cau tra loi that (khong dua vao cache)
+EMPTY_CONTEXT_ANSWER = "Dữ liệu ngữ cảnh không được để trống."
+EMPTY_QUESTION_ANSWER = "Câu hỏi không được để trống."
+UNSUPPORTED_PROVIDER_ANSWER = "Nhà cung cấp mô hình không được hỗ trợ."
+LLM_ERROR_ANSWER = "Xin lỗi, mô hình ngôn ngữ đang gặp vấn đề. Vui lòng thử lại sau."
+CONNECTION_ERROR_ANSWER = "Không thể kết nối đến dịch vụ AI. Vui lòng kiểm tra cấu hình."
+TIMEOUT_ANSWER = "Yêu cầu xử lý quá lâu. Vui lòng thử lại với câu hỏi ngắn gọn hơn."
+GENERATION_ERROR_ANSWER = "Đã xảy ra lỗi trong quá trình tạo câu trả lời."
+FALLBACK_ANSWERS = frozenset({
+    EMPTY_CONTEXT_ANSWER, EMPTY_QUESTION_ANSWER, UNSUPPORTED_PROVIDER_ANSWER, LLM_ERROR_ANSWER,
+    CONNECTION_ERROR_ANSWER, TIMEOUT_ANSWER, GENERATION_ERROR_ANSWER,
+})
+
+_async_client: ollama.AsyncClient | None = None
+
+def get_async_client() -> ollama.AsyncClient:
+    """AsyncClient dung chung cho cac request de tai su dung connection pool"""
+    global _async_client
+    if _async_client is None:
+        _async_client = ollama.AsyncClient(host=MODEL_BASE_URL, timeout=MODEL_TIMEOUT)
+    return _async_client
+
+def validate_inputs(context: str, question: str) -> str | None:
+    """Tra ve thong bao loi neu context/question khong hop le, None neu hop le"""
     if not context or not context.strip(): # Kiểm tra context rỗng
         logger.warning("Received empty context for answer generation.")
-        return "Dữ liệu ngữ cảnh không được để trống."
+        return EMPTY_CONTEXT_ANSWER
     
     if not question or not question.strip(): # Kiểm tra câu hỏi rỗng
         logger.warning("Received empty question for answer generation.")
-        return "Câu hỏi không được để trống."
+        return EMPTY_QUESTION_ANSWER
+    
+    return None
+
+def build_chat_request(context: str, question: str, history: list | None = None) -> dict:
+    # Tạo prompt từ context, question va cac luot hoi dap truoc (da cat gon)
+    prompt = build_prompt(context, question, format_history(history, HISTORY_MAX_CHARS, HISTORY_ANSWER_CHARS))
+    return {
+        "model": MODEL_NAME,
+        "messages": [
+            {"role": "system", "content": prompt},
+        ],
+        "options": {
+            "temperature": MODEL_TEMPERATURE, # do sang tao
+            "num_predict": MODEL_MAX_TOKENS # so luong token toi da tuc la do dai cau tra loi
+        }
+    }
+
+def error_message(e: Exception) -> str:
+    """Chuyen exception khi goi LLM thanh thong bao cho nguoi dung"""
+    ERRORS.inc(stage="llm")
+    if isinstance(e, ollama.ResponseError):
+        logger.error(f"Ollama API error: {e}")
+        return LLM_ERROR_ANSWER
+    if isinstance(e, ollama.RequestError):
+        logger.error(f"Cannot connect to Ollama: {e}")
+        return CONNECTION_ERROR_ANSWER
+    if isinstance(e, TimeoutError):
+        logger.error(f"Ollama request timeout after {MODEL_TIMEOUT}s")
+        return TIMEOUT_ANSWER
+    logger.error(f"Error during answer generation: {e}", exc_info=True)
+    return GENERATION_ERROR_ANSWER
+
+def is_fallback_answer(answer: str) -> bool:
+    return answer in FALLBACK_ANSWERS
+
+def generate_answer(context: str, question: str, history: list | None = None) -> str:
+    invalid = validate_inputs(context, question)
+    if invalid:
+        return invalid
     
-    prompt = build_prompt(context, question) # Tạo prompt từ context và question
+    request = build_chat_request(context, question, history)
     start = time.time() # Bắt đầu đo thời gian
     
     logger.info(f"Generating answer using model: {MODEL_NAME}")
@@ -33,34 +100,67 @@ def generate_answer(context: str, question: str) -> str:
         if MODEL_PROVIDER == "ollama":
             # Configure ollama client với base_url và timeout
             client = ollama.Client(host=MODEL_BASE_URL, timeout=MODEL_TIMEOUT)
-            response = client.chat(
-                model=MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": prompt},
-                ],
-                options={
-                    "temperature": MODEL_TEMPERATURE, # do sang tao
-                    "num_predict": MODEL_MAX_TOKENS # so luong token toi da tuc la do dai cau tra loi
-                }
-            )
+            response = client.chat(**request)
             answer = response['message']['content'].strip() # ollama co message chua content con openai co text
         else:
             logger.error(f"Unsupported model provider: {MODEL_PROVIDER}")
-            return "Nhà cung cấp mô hình không được hỗ trợ."
+            return UNSUPPORTED_PROVIDER_ANSWER
+        
+        logger.info("Answer generation completed successfully.")
+        logger.info(f"Time taken for generation: {time.time() - start:.2f} seconds")
+        return answer
+    
+    except Exception as e:
+        return error_message(e)
+
+async def generate_answer_async(context: str, question: str, history: list | None = None) -> str:
+    """Giong generate_answer nhung dung ollama.AsyncClient, khong chan event loop khi cho LLM"""
+    invalid = validate_inputs(context, question)
+    if invalid:
+        return invalid
+    
+    request = build_chat_request(context, question, history)
+    start = time.time()
+    
+    logger.info(f"Generating answer using model: {MODEL_NAME}")
+    
+    try:
+        if MODEL_PROVIDER != "ollama":
+            logger.error(f"Unsupported model provider: {MODEL_PROVIDER}")
+            return UNSUPPORTED_PROVIDER_ANSWER
+        
+        response = await get_async_client().chat(**request)
+        answer = response['message']['content'].strip()
         
         logger.info("Answer generation completed successfully.")
         logger.info(f"Time taken for generation: {time.time() - start:.2f} seconds")
         return answer
     
-    except ollama.ResponseError as e:
-        logger.error(f"Ollama API error: {e}")
-        return "Xin lỗi, mô hình ngôn ngữ đang gặp vấn đề. Vui lòng thử lại sau."
-    except ollama.RequestError as e:
-        logger.error(f"Cannot connect to Ollama: {e}")
-        return "Không thể kết nối đến dịch vụ AI. Vui lòng kiểm tra cấu hình."
-    except TimeoutError:
-        logger.error(f"Ollama request timeout after {MODEL_TIMEOUT}s")
-        return "Yêu cầu xử lý quá lâu. Vui lòng thử lại với câu hỏi ngắn gọn hơn."
     except Exception as e:
-        logger.error(f"Error during answer generation: {e}", exc_info=True)
-        return "Đã xảy ra lỗi trong quá trình tạo câu trả lời."
\ No newline at end of file
+        return error_message(e)
+
+async def stream_answer(context: str, question: str, history: list | None = None) -> AsyncIterator[str]:
+    """
+    Stream cau tra loi tu Ollama (stream=True), yield tung doan text (moi chunk cua Ollama ~ 1 token).
+    Loi khi goi LLM duoc raise cho caller; dong generator (client ngat ket noi) se dong HTTP stream toi Ollama
+    de Ollama dung generate.
+    """
+    invalid = validate_inputs(context, question)
+    if invalid:
+        yield invalid
+        return
+    
+    if MODEL_PROVIDER != "ollama":
+        logger.error(f"Unsupported model provider: {MODEL_PROVIDER}")
+        yield UNSUPPORTED_PROVIDER_ANSWER
+        return
+    
+    request = build_chat_request(context, question, history)
+    logger.info(f"Streaming answer using model: {MODEL_NAME}")
+    
+    stream = await get_async_client().chat(**request, stream=True)
+    async with aclosing(stream):
+        async for part in stream:
+            content = part['message']['content']
+            if content:
+                yield content
\ No newline at end of file
@@ -27,10 +27,30 @@ VÍ DỤ TRẢ LỜI TỐT:
 Bạn thích phong cách nào nhất? 😊"
 """
 
-def build_prompt(context: str, question: str) -> str:
+def format_history(history: list | None, max_chars: int = 2000, answer_chars: int = 600) -> str:
+    """
+    Cac luot hoi dap truoc (Turn, cu -> moi) dang text gon: moi cau tra loi cat con answer_chars ky tu,
+    tong do dai <= max_chars (bo luot cu nhat truoc) de prompt khong dai ra theo so luot.
+    """
+    lines: list[str] = []
+    total = 0
+    for turn in reversed(history or []):
+        answer = turn.answer if len(turn.answer) <= answer_chars else turn.answer[:answer_chars] + "..."
+        entry = f"Người dùng: {turn.question}\nChatbot: {answer}"
+        if total + len(entry) > max_chars:
+            break
+        lines.append(entry)
+        total += len(entry)
+    return "\n\n".join(reversed(lines))
+
+def build_prompt(context: str, question: str, history: str = "") -> str:
+    history_block = f"""
+LỊCH SỬ HỘI THOẠI (chỉ để hiểu câu hỏi tiếp theo, không phải nguồn thông tin):
+{history}
+""" if history else ""
     return f"""
 {SYSTEM_PROMPT}
-
+{history_block}
 CONTEXT (Thông tin từ cơ sở dữ liệu):
 {context}
 
@@ -1,12 +1,43 @@
 import logging
 from sentence_transformers import CrossEncoder
 
+from core.inference import load_model
+
 logger = logging.getLogger("reranking")
 
+TRUNCATION_POLICIES = ("longest_first", "only_second")
+
 class CrossEncoderModel:
-    def __init__(self, model_name: str, device: str = "cpu"):
-        logger.info(f"Loading reranker model: {model_name}")
-        self.model = CrossEncoder(model_name, device=device)
+    """
+    max_length: so token toi da cua cap (query, document), None la max cua model.
+    truncation:
+        longest_first : de tokenizer cat token cua chuoi dai hon (mac dinh cua CrossEncoder)
+        only_second   : giu nguyen query, chi cat document cho vua max_length
+    backend: torch | onnx | onnx-int8 (xem core.inference.load_model)
+    """
+
+    def __init__(self, model_name: str, device: str = "cpu", max_length: int | None = None, truncation: str = "longest_first", backend: str = "torch"):
+        if truncation not in TRUNCATION_POLICIES:
+            raise ValueError(f"Unknown truncation policy: {truncation}")
+
+        logger.info(f"Loading reranker model: {model_name} (max_length={max_length}, truncation={truncation}, backend={backend})")
+        self.model = load_model(CrossEncoder, model_name, backend, device=device, max_length=max_length)
+        self.max_length = max_length or self.model.max_length
+        self.truncation = truncation
+
+    def truncate_document(self, query: str, text: str) -> str:
+        """Cat document theo offset token de query + document vua max_length (policy only_second)"""
+        tokenizer = self.model.tokenizer
+        budget = self.max_length - len(tokenizer.tokenize(query)) - 3 # [CLS] query [SEP] document [SEP]
+        if budget <= 0 or len(text) <= budget: # moi token >= 1 ky tu -> chac chan vua
+            return text
+
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        if len(offsets) <= budget:
+            return text
+        return text[:offsets[budget - 1][1]]
 
     def score_batch(self, pairs: list[tuple[str, str]]) -> list[float]:
+        if self.truncation == "only_second":
+            pairs = [(query, self.truncate_document(query, text)) for query, text in pairs]
         return self.model.predict(pairs).tolist()
\ No newline at end of file
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import logging
+import time
+
+from cache.lru import LRUCache
+from cache.semantic_cache import normalize_query
+from core.batching import MicroBatcher
+from core.metrics import CACHE_REQUESTS
+from core.schema import RetrievedDocument
+from core.settings_loader import load_settings
+from reranking.models.cross_encoder import CrossEncoderModel
+
+settings = load_settings()
+logger = logging.getLogger("reranking")
+
+RERANKER_CONFIG = settings.get("reranking", {})
+SCORE_CACHE_SIZE = RERANKER_CONFIG.get("score_cache_size", 20000)
+SCORE_CACHE_TTL_SECONDS = RERANKER_CONFIG.get("score_cache_ttl_seconds", 3600)
+MAX_BATCH_SIZE = RERANKER_CONFIG.get("max_batch_size", 32)
+MAX_BATCH_WAIT_MS = RERANKER_CONFIG.get("max_batch_wait_ms", 5)
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()[:16]
+
+class RerankingService:
+    """
+    Rerank tren request path:
+        - cache score theo (query hash, chunk id): candidate set lap lai / chong nhau khong phai predict lai
+        - cap dang duoc score boi request khac (cung query, cung chunk) thi cho ket qua do thay vi score lai
+        - cac cap (query, document) con thieu cua nhieu request dong thoi duoc gom vao 1 lan predict (MicroBatcher)
+        - thoi gian tung buoc (cache lookup, cho + chay model, sort) duoc cong don trong stats()
+    """
+
+    def __init__(
+        self,
+        model: CrossEncoderModel,
+        cache_size: int = SCORE_CACHE_SIZE,
+        cache_ttl_seconds: float | None = SCORE_CACHE_TTL_SECONDS,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_batch_wait_ms: float = MAX_BATCH_WAIT_MS,
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait_ms = max_batch_wait_ms
+        self.score_cache = LRUCache(max_entries=cache_size, ttl_seconds=cache_ttl_seconds)
+        self._batcher: MicroBatcher | None = None
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+
+        self.requests = 0
+        self.pairs_total = 0
+        self.pairs_scored = 0
+        self.timings = {"cache_lookup": 0.0, "inference": 0.0, "sort": 0.0, "total": 0.0} # giay, cong don
+
+    def _get_batcher(self) -> MicroBatcher:
+        if self._batcher is None or self._batcher.loop is not asyncio.get_running_loop():
+            self._batcher = MicroBatcher(self.model.score_batch, "reranking", self.max_batch_size, self.max_batch_wait_ms)
+            self._in_flight = {}
+        return self._batcher
+
+    def _score_missing(self, query: str, key: str, documents: list[RetrievedDocument], missing: list[int]) -> tuple[list[asyncio.Future], int]:
+        """Tra ve future score cho tung document con thieu va so cap thuc su phai predict"""
+        batcher = self._get_batcher()
+        futures, submitted = [], 0
+        for i in missing:
+            pair_key = (key, documents[i].id)
+            future = self._in_flight.get(pair_key)
+            if future is None:
+                future = asyncio.ensure_future(batcher.submit((query, documents[i].text)))
+                future.add_done_callback(lambda _, pair_key=pair_key: self._in_flight.pop(pair_key, None))
+                self._in_flight[pair_key] = future
+                submitted += 1
+            futures.append(asyncio.shield(future)) # request bi cancel khong cancel future dung chung
+        return futures, submitted
+
+    def _lookup(self, key: str, documents: list[RetrievedDocument]) -> tuple[list[float | None], list[int]]:
+        scores = [self.score_cache.get((key, doc.id)) for doc in documents]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        return scores, missing
+
+    def _finish(
+        self, key: str, documents: list[RetrievedDocument], scores: list[float | None],
+        missing: list[int], new_scores: list[float], top_k: int | None,
+    ) -> list[RetrievedDocument]:
+        for i, score in zip(missing, new_scores):
+            scores[i] = float(score)
+            self.score_cache.set((key, documents[i].id), scores[i])
+
+        for doc, score in zip(documents, scores):
+            doc.metadata["rerank_score"] = score
+
+        documents = sorted(documents, key=lambda d: d.metadata["rerank_score"], reverse=True)
+        return documents[:top_k] if top_k is not None else documents
+
+    def _record(self, documents: list[RetrievedDocument], scored: int, timings: dict[str, float]):
+        self.requests += 1
+        self.pairs_total += len(documents)
+        self.pairs_scored += scored
+        CACHE_REQUESTS.inc(len(documents) - scored, cache="rerank_score", result="hit")
+        CACHE_REQUESTS.inc(scored, cache="rerank_score", result="miss")
+        for stage, seconds in timings.items():
+            self.timings[stage] += seconds
+        logger.info(
+            f"Reranked {len(documents)} documents ({len(documents) - scored} cached) in "
+            f"{timings['total'] * 1000:.1f} ms (inference {timings['inference'] * 1000:.1f} ms)"
+        )
+
+    async def rerank(self, query: str, documents: list[RetrievedDocument], top_k: int | None = None) -> list[RetrievedDocument]:
+        if not documents:
+            return []
+
+        start = time.perf_counter()
+        key = query_hash(query)
+        scores, missing = self._lookup(key, documents)
+        looked_up = time.perf_counter()
+
+        new_scores, scored = [], 0
+        if missing:
+            futures, scored = self._score_missing(query, key, documents, missing)
+            new_scores = await asyncio.gather(*futures)
+        inferred = time.perf_counter()
+
+        reranked = self._finish(key, documents, scores, missing, new_scores, top_k)
+        end = time.perf_counter()
+
+        self._record(documents, scored, {
+            "cache_lookup": looked_up - start, "inference": inferred - looked_up, "sort": end - inferred, "total": end - start,
+        })
+        return reranked
+
+    def rerank_sync(self, query: str, documents: list[RetrievedDocument], top_k: int | None = None) -> list[RetrievedDocument]:
+        """Cho code sync (CLI), dung chung cache nhung khong batch giua cac request"""
+        if not documents:
+            return []
+
+        start = time.perf_counter()
+        key = query_hash(query)
+        scores, missing = self._lookup(key, documents)
+        looked_up = time.perf_counter()
+
+        new_scores = self.model.score_batch([(query, documents[i].text) for i in missing]) if missing else []
+        inferred = time.perf_counter()
+
+        reranked = self._finish(key, documents, scores, missing, new_scores, top_k)
+        end = time.perf_counter()
+
+        self._record(documents, len(missing), {
+            "cache_lookup": looked_up - start, "inference": inferred - looked_up, "sort": end - inferred, "total": end - start,
+        })
+        return reranked
+
+    def clear_cache(self):
+        self.score_cache.clear()
+
+    def stats(self) -> dict:
+        stats = {
+            "requests": self.requests,
+            "pairs_total": self.pairs_total,
+            "pairs_scored": self.pairs_scored,
+            "pairs_cached": self.pairs_total - self.pairs_scored,
+            "score_cache": self.score_cache.stats(),
+            "timings_ms": {stage: round(seconds * 1000, 1) for stage, seconds in self.timings.items()},
+            "mean_timings_ms": {
+                stage: round(seconds * 1000 / self.requests, 2) if self.requests else 0.0
+                for stage, seconds in self.timings.items()
+            },
+        }
+        if self._batcher is not None:
+            stats["batching"] = self._batcher.stats()
+        return stats
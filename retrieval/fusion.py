@@ -0,0 +1,72 @@
+"""
+Fuse dense score (cosine, [0, 1]) va BM25 score (khong gioi han tren, lon voi chunk dai / nhieu term) cua cung
+1 tap candidate thanh 1 hybrid score. Cong truc tiep 2 score ("weighted") lam BM25 lan at dense va dense_weight /
+bm25_weight mat y nghia, nen moi leg duoc dua ve cung thang do truoc khi nhan trong so:
+
+    minmax : (x - min) / (max - min) tren tap candidate -> [0, 1]
+    zscore : (x - mean) / std tren tap candidate
+    rrf    : 1 / (rrf_k + rank) theo thu hang trong tung leg (chi dung thu tu, bo qua do lon score)
+
+Tinh vector hoa tren mang score cua ca tap candidate (numpy), khong loop tung document.
+"""
+import numpy as np
+
+from core.settings_loader import load_settings
+
+settings = load_settings()
+
+RETRIEVAL_CONFIG = settings["retrieval"]
+RRF_K = RETRIEVAL_CONFIG.get("rrf_k", 60)
+
+def minmax_normalize(scores: np.ndarray) -> np.ndarray:
+    if scores.size == 0:
+        return scores
+    low, high = scores.min(), scores.max()
+    if high == low: # moi candidate bang nhau -> leg nay khong phan biet duoc, khong dong gop vao thu tu
+        return np.zeros_like(scores)
+    return (scores - low) / (high - low)
+
+def zscore_normalize(scores: np.ndarray) -> np.ndarray:
+    if scores.size == 0:
+        return scores
+    std = scores.std()
+    if std == 0:
+        return np.zeros_like(scores)
+    return (scores - scores.mean()) / std
+
+def reciprocal_ranks(scores: np.ndarray, k: int = RRF_K, ignore_zero: bool = False) -> np.ndarray:
+    """
+    1 / (k + rank), rank tinh tu 1 theo score giam dan (score bang nhau cung rank).
+    ignore_zero: BM25 = 0 nghia la khong match term nao -> khong dong gop.
+    """
+    if scores.size == 0:
+        return scores
+    ranks = np.searchsorted(-np.sort(scores)[::-1], -scores, side="left") + 1
+    fused = 1.0 / (k + ranks)
+    if ignore_zero:
+        fused[scores <= 0] = 0.0
+    return fused
+
+def fuse_scores(
+    dense_scores,
+    bm25_scores,
+    dense_weight: float,
+    bm25_weight: float,
+    strategy: str = "minmax", # weighted | minmax | zscore | rrf
+    rrf_k: int = RRF_K,
+) -> np.ndarray:
+    """Hybrid score cho tung candidate, cung thu tu voi dense_scores / bm25_scores"""
+    dense = np.asarray(dense_scores, dtype=np.float64)
+    bm25 = np.asarray(bm25_scores, dtype=np.float64)
+    if dense.shape != bm25.shape:
+        raise ValueError("dense_scores and bm25_scores must have the same length")
+
+    if strategy == "weighted": # cach cu: cong score chua chuan hoa
+        return dense_weight * dense + bm25_weight * bm25
+    if strategy == "minmax":
+        return dense_weight * minmax_normalize(dense) + bm25_weight * minmax_normalize(bm25)
+    if strategy == "zscore":
+        return dense_weight * zscore_normalize(dense) + bm25_weight * zscore_normalize(bm25)
+    if strategy == "rrf":
+        return dense_weight * reciprocal_ranks(dense, rrf_k) + bm25_weight * reciprocal_ranks(bm25, rrf_k, ignore_zero=True)
+    raise ValueError(f"Unknown score fusion strategy: {strategy}")
@@ -1,15 +1,21 @@
+import asyncio
 import logging
 from typing import List
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import ScoredPoint
+import numpy as np
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import Filter, Fusion, FusionQuery, Prefetch, ScoredPoint, Record, SparseVector
 from qdrant_client.http.exceptions import ResponseHandlingException
 
+from core.metrics import ERRORS, stage
 from core.settings_loader import load_settings
 from core.schema import RetrievedDocument
-from vectorstore.qdrant import get_qdrant_client
-from embedding.embedder import embed_texts
+from vectorstore.qdrant import get_qdrant_client, get_async_qdrant_client
+from embedding.service import get_embedding_service
 from scoring.bm25 import BM25
+from core.startup import is_sparse_search_ready
+from retrieval.fusion import fuse_scores
+from retrieval.query_router import route_types, type_filter
 
 settings = load_settings()
 logger = logging.getLogger("retrieval")
@@ -20,6 +26,192 @@ TOP_K = RETRIEVAL_CONFIG.get("top_k", 10)
 SCORE_THRESHOLD = RETRIEVAL_CONFIG.get("score_threshold", 0.0)
 DENSE_WEIGHT = RETRIEVAL_CONFIG.get("dense_weight", 0.6)
 BM25_WEIGHT = RETRIEVAL_CONFIG.get("bm25_weight", 0.4)
+BM25_CANDIDATES = RETRIEVAL_CONFIG.get("bm25_candidates", TOP_K * 3)
+KEYWORD_SEARCH = RETRIEVAL_CONFIG.get("keyword_search", "local") # local | qdrant
+SCORE_FUSION = RETRIEVAL_CONFIG.get("score_fusion", "zscore") # chuan hoa dense / BM25 truoc khi blend: weighted | minmax | zscore | rrf
+FUSION = RETRIEVAL_CONFIG.get("fusion", "none") # none: blend trong Python | rrf | dbsf: fuse dense + sparse tren Qdrant
+# chi lay cac field duoc dua vao context / sources, khong lay ca payload (created_at, content_hash, slug, ...)
+PAYLOAD_FIELDS = RETRIEVAL_CONFIG.get("payload_fields") or True
+
+def _dense_query(query_vector: list[float], query_filter: Filter | None = None) -> dict:
+    return {
+        "collection_name": COLLECTION_NAME,
+        "query": query_vector,
+        "using": "dense",  # specify named vector for hybrid search
+        "query_filter": query_filter, # intent cua query (query_router), dung payload index "type"
+        "limit": TOP_K * 3,  # lấy dư để rerank
+        "with_payload": PAYLOAD_FIELDS,
+        "score_threshold": SCORE_THRESHOLD,
+    }
+
+def _route(query: str) -> tuple[list[str] | None, Filter | None]:
+    types = route_types(query)
+    if types:
+        logger.info(f"Query routed to types {types}")
+    return types, type_filter(types)
+
+def _fusion_query(query: str, bm25: BM25, query_vector: list[float], query_filter: Filter | None = None) -> dict | None:
+    """
+    1 query_points: prefetch dense + sparse named vector, Qdrant fuse 2 danh sach (RRF hoac DBSF) va tra ve TOP_K.
+    Chi dung khi sparse model o serve time chinh la sparse model da encode collection, nguoc lai None (blend trong Python).
+    """
+    if FUSION not in ("rrf", "dbsf") or not bm25.has_index or not is_sparse_search_ready():
+        return None
+    prefetch = [Prefetch(query=query_vector, using="dense", filter=query_filter, limit=TOP_K * 3, score_threshold=SCORE_THRESHOLD)]
+    sparse_vector = bm25.sparse_embedder.encode(query)
+    if sparse_vector["indices"]: # query khong co term nao trong vocabulary -> chi con dense leg
+        prefetch.append(Prefetch(
+            query=SparseVector(indices=sparse_vector["indices"], values=sparse_vector["values"]),
+            using="sparse",
+            filter=query_filter,
+            limit=BM25_CANDIDATES,
+        ))
+    return {
+        "collection_name": COLLECTION_NAME,
+        "prefetch": prefetch,
+        "query": FusionQuery(fusion=Fusion(FUSION)),
+        "limit": TOP_K,
+        "with_payload": PAYLOAD_FIELDS,
+    }
+
+def _fused_documents(points: list[ScoredPoint]) -> List[RetrievedDocument]:
+    return [
+        RetrievedDocument(
+            id=str(point.id),
+            score=point.score,
+            text=point.payload["text"],
+            metadata={
+                **{k: v for k, v in point.payload.items() if k not in ("text", "sparse_model_version")},
+                "fusion": FUSION,
+            },
+        )
+        for point in points
+        if (point.payload or {}).get("text")
+    ]
+
+def _keyword_hits(query: str, bm25: BM25, dense_points: list[ScoredPoint]) -> dict[str, float]:
+    """BM25 tren toan corpus, chi giu cac document ma dense search khong tra ve"""
+    if not bm25.has_index:
+        return {}
+    dense_ids = {str(point.id) for point in dense_points}
+    return {point_id: score for point_id, score in bm25.search(query, BM25_CANDIDATES) if point_id not in dense_ids}
+
+def _sparse_query(query: str, bm25: BM25, query_filter: Filter | None = None) -> dict | None:
+    """
+    Keyword leg tren server: query "sparse" named vector cua Qdrant.
+    Chi dung khi sparse model o serve time chinh la sparse model da encode collection (cung term id + idf).
+    """
+    if KEYWORD_SEARCH != "qdrant" or not bm25.has_index or not is_sparse_search_ready():
+        return None
+    sparse_vector = bm25.sparse_embedder.encode(query)
+    if not sparse_vector["indices"]:
+        return None
+    return {
+        "collection_name": COLLECTION_NAME,
+        "query": SparseVector(indices=sparse_vector["indices"], values=sparse_vector["values"]),
+        "using": "sparse",
+        "query_filter": query_filter,
+        "limit": BM25_CANDIDATES + TOP_K * 3, # du cho ca cac point trung voi dense leg
+        "with_payload": False,
+    }
+
+def _sparse_keyword_hits(query: str, bm25: BM25, sparse_points: list[ScoredPoint], dense_points: list[ScoredPoint]) -> dict[str, float]:
+    """Candidate tu sparse search cua Qdrant, score BM25 lay tu inverted index de blend cung thang do voi dense leg"""
+    dense_ids = {str(point.id) for point in dense_points}
+    point_ids = [str(point.id) for point in sparse_points if str(point.id) not in dense_ids][:BM25_CANDIDATES]
+    return {point_id: score for point_id, score in zip(point_ids, bm25.score_indexed(query, point_ids)) if score is not None}
+
+def _keyword_records_request(point_ids: list[str]) -> dict:
+    return {
+        "collection_name": COLLECTION_NAME,
+        "ids": point_ids,
+        "with_payload": PAYLOAD_FIELDS,
+        "with_vectors": ["dense"],
+    }
+
+def _score_keyword_records(records: list[Record], query_vector: list[float], types: list[str] | None = None) -> list[tuple[str, float, dict]]:
+    """
+    dense score = cosine(query, vector) de blend cung thang do voi dense leg.
+    types: BM25 trong process search toan corpus -> bo cac point khong thuoc intent cua query.
+    """
+    query_array = np.asarray(query_vector, dtype=np.float32)
+    query_norm = np.linalg.norm(query_array) or 1.0
+    keyword_points = []
+
+    for record in records:
+        payload = record.payload or {}
+        vector = (record.vector or {}).get("dense") if isinstance(record.vector, dict) else record.vector
+        if not payload.get("text") or vector is None:
+            continue
+        if types and payload.get("type") not in types:
+            continue
+        vector_array = np.asarray(vector, dtype=np.float32)
+        dense_score = float(query_array @ vector_array / (query_norm * (np.linalg.norm(vector_array) or 1.0)))
+        keyword_points.append((str(record.id), dense_score, payload))
+
+    return keyword_points
+
+def fetch_keyword_points(
+    client: QdrantClient, point_ids: list[str], query_vector: list[float], types: list[str] | None = None,
+) -> list[tuple[str, float, dict]]:
+    """Lay payload + dense vector cua cac point chi co trong BM25 leg (dense search khong tra ve)"""
+    if not point_ids:
+        return []
+    return _score_keyword_records(client.retrieve(**_keyword_records_request(point_ids)), query_vector, types)
+
+async def fetch_keyword_points_async(
+    client: AsyncQdrantClient, point_ids: list[str], query_vector: list[float], types: list[str] | None = None,
+) -> list[tuple[str, float, dict]]:
+    if not point_ids:
+        return []
+    return _score_keyword_records(await client.retrieve(**_keyword_records_request(point_ids)), query_vector, types)
+
+def _blend(
+    query: str,
+    bm25: BM25,
+    dense_points: list[ScoredPoint],
+    keyword_hits: dict[str, float],
+    keyword_points: list[tuple[str, float, dict]],
+) -> List[RetrievedDocument]:
+    candidates = [(str(point.id), point.score, point.payload) for point in dense_points if (point.payload or {}).get("text")]
+
+    # BM25 lay tu inverted index theo point id, chi fallback ve tokenize text voi point chua co trong index
+    bm25_scores = bm25.score_candidates(
+        query,
+        [point_id for point_id, _, _ in candidates],
+        [payload["text"] for _, _, payload in candidates],
+    )
+
+    # Them cac document chi match keyword (ten du an, chu dau tu, dia chi) tu BM25 leg
+    if keyword_points:
+        candidates.extend(keyword_points)
+        bm25_scores.extend(keyword_hits[point_id] for point_id, _, _ in keyword_points)
+        logger.info(f"BM25 leg added {len(keyword_points)} keyword-only candidates.")
+
+    hybrid_scores = fuse_scores(
+        [dense_score for _, dense_score, _ in candidates], bm25_scores, DENSE_WEIGHT, BM25_WEIGHT, SCORE_FUSION,
+    )
+
+    documents: list[RetrievedDocument] = []
+
+    for (point_id, dense_score, payload), bm25_score, hybrid_score in zip(candidates, bm25_scores, hybrid_scores):
+        text = payload.get("text", "")
+
+        documents.append(
+            RetrievedDocument(
+                id=point_id,
+                score=float(hybrid_score),
+                text=text,
+                metadata={
+                    **{k: v for k, v in payload.items() if k not in ("text", "sparse_model_version")},
+                    "dense_score": dense_score,
+                    "bm25_score": bm25_score,
+                },
+            )
+        )
+
+    documents.sort(key=lambda d: d.score, reverse=True)
+    return documents[:TOP_K]
 
 def hybrid_retrieve(query: str, bm25: BM25) -> List[RetrievedDocument]:
     if not query or not query.strip():
@@ -28,54 +220,111 @@ def hybrid_retrieve(query: str, bm25: BM25) -> List[RetrievedDocument]:
 
     try:
         client: QdrantClient = get_qdrant_client()
-        dense_vectors = embed_texts([query])
-        if not dense_vectors:
-            logger.error("Failed to embed query.")
-            return []
-
-        query_vector = dense_vectors[0]
-
-        response = client.query_points(
-            collection_name=COLLECTION_NAME,
-            query=query_vector,
-            using="dense",  # specify named vector for hybrid search
-            limit=TOP_K * 3,  # lấy dư để rerank
-            with_payload=True,
-            score_threshold=SCORE_THRESHOLD,
-        )
+        with stage("embed"):
+            query_vector = get_embedding_service().embed_query_sync(query)
 
-        points: list[ScoredPoint] = response.points
-        documents: list[RetrievedDocument] = []
-
-        for point in points:
-            payload = point.payload or {}
-            text = payload.get("text", "")
-
-            if not text:
-                continue
-
-            bm25_score = bm25.score(query, text)
-            hybrid_score = (DENSE_WEIGHT * point.score + BM25_WEIGHT * bm25_score)
-
-            documents.append(
-                RetrievedDocument(
-                    id=str(point.id),
-                    score=hybrid_score,
-                    text=text,
-                    metadata={
-                        **{k: v for k, v in payload.items() if k != "text"},
-                        "dense_score": point.score,
-                        "bm25_score": bm25_score,
-                    },
-                )
-            )
+        types, query_filter = _route(query)
+
+        # Dense + sparse fuse tren Qdrant: 1 round trip, khong blend trong Python
+        fusion_request = _fusion_query(query, bm25, query_vector, query_filter)
+        if fusion_request is not None:
+            with stage("fusion_search"):
+                points = client.query_points(**fusion_request).points
+                if query_filter is not None and not points: # route sai -> search lai toan bo collection
+                    points = client.query_points(**_fusion_query(query, bm25, query_vector)).points
+            return _fused_documents(points)
 
-        documents.sort(key=lambda d: d.score, reverse=True)
-        return documents[:TOP_K]
+        # Leg 1: dense search tren qdrant
+        with stage("dense_search"):
+            response = client.query_points(**_dense_query(query_vector, query_filter))
+            if query_filter is not None and not response.points: # route sai -> search lai toan bo collection
+                types = query_filter = None
+                response = client.query_points(**_dense_query(query_vector))
+
+        # Leg 2: BM25 tren toan corpus (sparse named vector tren Qdrant hoac inverted index trong process)
+        with stage("bm25"):
+            sparse_request = _sparse_query(query, bm25, query_filter)
+            if sparse_request is not None:
+                keyword_hits = _sparse_keyword_hits(query, bm25, client.query_points(**sparse_request).points, response.points)
+            else:
+                keyword_hits = _keyword_hits(query, bm25, response.points)
+            keyword_points = fetch_keyword_points(client, list(keyword_hits), query_vector, types)
+
+        with stage("blend"):
+            return _blend(query, bm25, response.points, keyword_hits, keyword_points)
     
     except ResponseHandlingException as e:
         logger.error(f"Qdrant connection error: {e}")
+        ERRORS.inc(stage="retrieval")
+        raise ConnectionError("Cannot connect to vector database")
+    except Exception as e:
+        logger.error(f"Error during retrieval: {e}", exc_info=True)
+        ERRORS.inc(stage="retrieval")
+        return []
+
+async def _search_async(
+    client: AsyncQdrantClient, query: str, bm25: BM25, query_vector: list[float], query_filter: Filter | None = None,
+) -> tuple[list[ScoredPoint], list[ScoredPoint] | None]:
+    """Dense leg (+ sparse leg tren Qdrant neu dung), tra ve (dense points, sparse points hoac None)"""
+    sparse_request = _sparse_query(query, bm25, query_filter)
+    if sparse_request is None:
+        return (await client.query_points(**_dense_query(query_vector, query_filter))).points, None
+    # dense va sparse leg chay song song tren Qdrant
+    response, sparse_response = await asyncio.gather(
+        client.query_points(**_dense_query(query_vector, query_filter)),
+        client.query_points(**sparse_request),
+    )
+    return response.points, sparse_response.points
+
+async def hybrid_retrieve_async(query: str, bm25: BM25, query_vector: list[float] | None = None) -> List[RetrievedDocument]:
+    """
+    Giong hybrid_retrieve nhung khong chan event loop:
+    embedding chay trong executor, Qdrant goi qua AsyncQdrantClient.
+    query_vector: embedding da tinh san (vd. tu buoc lookup answer cache) de khong embed lai.
+    """
+    if not query or not query.strip():
+        logger.warning("Empty query received for hybrid retrieval.")
+        return []
+
+    try:
+        client: AsyncQdrantClient = get_async_qdrant_client()
+        if query_vector is None:
+            # LRU cache + micro-batching voi cac request dong thoi
+            with stage("embed"):
+                query_vector = await get_embedding_service().embed_query(query)
+
+        types, query_filter = _route(query)
+
+        fusion_request = _fusion_query(query, bm25, query_vector, query_filter)
+        if fusion_request is not None:
+            with stage("fusion_search"):
+                points = (await client.query_points(**fusion_request)).points
+                if query_filter is not None and not points: # route sai -> search lai toan bo collection
+                    points = (await client.query_points(**_fusion_query(query, bm25, query_vector))).points
+            return _fused_documents(points)
+
+        # keyword_search qdrant: sparse leg chay song song voi dense leg, tinh vao dense_search
+        with stage("dense_search"):
+            dense_points, sparse_points = await _search_async(client, query, bm25, query_vector, query_filter)
+            if query_filter is not None and not dense_points: # route sai -> search lai toan bo collection
+                types = None
+                dense_points, sparse_points = await _search_async(client, query, bm25, query_vector)
+
+        with stage("bm25"):
+            if sparse_points is not None:
+                keyword_hits = _sparse_keyword_hits(query, bm25, sparse_points, dense_points)
+            else:
+                keyword_hits = _keyword_hits(query, bm25, dense_points)
+            keyword_points = await fetch_keyword_points_async(client, list(keyword_hits), query_vector, types)
+
+        with stage("blend"):
+            return _blend(query, bm25, dense_points, keyword_hits, keyword_points)
+
+    except ResponseHandlingException as e:
+        logger.error(f"Qdrant connection error: {e}")
+        ERRORS.inc(stage="retrieval")
         raise ConnectionError("Cannot connect to vector database")
     except Exception as e:
         logger.error(f"Error during retrieval: {e}", exc_info=True)
+        ERRORS.inc(stage="retrieval")
         return []
\ No newline at end of file
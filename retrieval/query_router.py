@@ -0,0 +1,52 @@
+"""
+Router nhe theo tu khoa: doan intent cua cau hoi (du an, phong cach, tin tuc, lien he) va tra ve Filter theo payload
+"type" de Qdrant chi search trong cac chunk lien quan (dung payload index, khong can quet ca collection).
+
+Khong match intent nao -> None (search toan bo collection). Match nhieu intent -> hop cac type.
+So khop khong phan biet dau ("du an" == "dự án").
+"""
+import re
+import unicodedata
+
+from qdrant_client.models import FieldCondition, Filter, MatchAny
+
+from core.settings_loader import load_settings
+
+settings = load_settings()
+
+QUERY_ROUTER_ENABLED = settings["retrieval"].get("query_router", True)
+
+# intent: (tu khoa khong dau, cac gia tri payload "type" duoc search)
+INTENTS = {
+    "project": (("du an", "cong trinh", "chu dau tu", "dien tich"), ("project", "project_category")),
+    "style": (("phong cach", "noi that", "kien truc", "style"), ("interior_style", "architecture_type", "project")),
+    "news": (("tin tuc", "bai viet", "ban tin", "su kien"), ("news", "news_category")),
+    "contact": (("lien he", "hotline", "dien thoai", "sdt", "email", "dia chi", "van phong", "cong ty"), ("company_info",)),
+}
+
+_PATTERNS = {
+    intent: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b")
+    for intent, (keywords, _) in INTENTS.items()
+}
+
+def strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    return "".join(char for char in text if unicodedata.category(char) != "Mn")
+
+def matched_intents(query: str) -> list[str]:
+    normalized = strip_accents(query)
+    return [intent for intent, pattern in _PATTERNS.items() if pattern.search(normalized)]
+
+def route_types(query: str) -> list[str] | None:
+    """Cac gia tri payload "type" can search cho query, None neu khong route duoc (search toan bo)"""
+    if not QUERY_ROUTER_ENABLED:
+        return None
+    types = []
+    for intent in matched_intents(query):
+        types.extend(chunk_type for chunk_type in INTENTS[intent][1] if chunk_type not in types)
+    return types or None
+
+def type_filter(types: list[str] | None) -> Filter | None:
+    if not types:
+        return None
+    return Filter(must=[FieldCondition(key="type", match=MatchAny(any=types))])
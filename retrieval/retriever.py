@@ -34,6 +34,7 @@ def retrieve(query: str) -> list[RetrievedDocument]:
         response = client.query_points( # truy van points tu qdrant
             collection_name=COLLECTION_NAME,
             query=query_vector,
+            using="dense", # collection co 2 named vector (dense + sparse)
             limit=RETRIEVAL_TOP_K,
             with_payload=True, # lay ca payload noi chua text va metadata
             score_threshold=RETRIEVAL_SCORE_THRESHOLD,
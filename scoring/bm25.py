@@ -2,6 +2,9 @@ import logging
 import math
 from collections import Counter
 
+import numpy as np
+from scipy import sparse
+
 from embedding.sparse_embedder import tokenize, SparseEmbedder
 
 logger = logging.getLogger("scoring")
@@ -13,6 +16,17 @@ class BM25:
         self.b = b
         self.num_documents = sparse_embedder.num_documents
         self.average_document_length = None
+
+        # Inverted index (duoc build 1 lan o startup bang build_index)
+        self.document_index: dict[str, int] = {} # document id (point id trong qdrant) -> vi tri trong cac mang ben duoi
+        self.document_lengths: np.ndarray | None = None # so token cua tung document
+        self.inverse_document_frequency: np.ndarray | None = None # idf cua tung term, theo term id cua vocabulary
+        self.postings_offsets: np.ndarray | None = None # postings cua term t nam trong [offsets[t], offsets[t + 1])
+        self.postings_documents: np.ndarray | None = None # vi tri document trong postings, tang dan trong moi term
+        self.postings_frequencies: np.ndarray | None = None # term frequency tuong ung
+        self._length_normalization: np.ndarray | None = None # k1 * (1 - b + b * dl / avgdl) cho tung document
+        self.document_ids: list[str] = [] # nguoc lai cua document_index
+        self.term_document_weights: sparse.csr_matrix | None = None # ma tran term x document chua san trong so BM25
         
     def compute_average_document_length(self, documents: list[str]):
         total_length = 0 # tổng số token trong tất cả các tài liệu
@@ -34,6 +48,243 @@ class BM25:
         self.average_document_length = total_length / max(valid_documents, 1) # tính độ dài trung bình của tài liệu
         logger.debug(f"Computed average document length: {self.average_document_length}")
         
+    def build_index(self, documents: list[str], document_ids: list[str]):
+        """
+        Build inverted index 1 lan cho toan bo corpus de khong phai tokenize lai text khi score.
+
+            Vi du:
+                documents = ["nha pho hien dai", "nha dep"]
+                vocabulary = {"nha": 0, "pho": 1, "hien": 2, "dai": 3, "dep": 4}
+
+                postings_offsets     = [0, 2, 3, 4, 5, 6]
+                postings_documents   = [0, 1, 0, 0, 0, 1]   # term 0 ("nha") xuat hien trong doc 0 va doc 1
+                postings_frequencies = [1, 1, 1, 1, 1, 1]
+                document_lengths     = [4, 2]
+        """
+        if len(documents) != len(document_ids):
+            raise ValueError("documents and document_ids must have the same length")
+
+        vocabulary = self.sparse_embedder.vocabulary
+        num_terms = len(vocabulary)
+
+        document_lengths = np.zeros(len(documents), dtype=np.int32)
+        term_ids: list[int] = []
+        document_positions: list[int] = []
+        frequencies: list[int] = []
+
+        for position, document in enumerate(documents):
+            tokens = tokenize(document)
+            document_lengths[position] = len(tokens)
+            for term, frequency in Counter(tokens).items():
+                term_id = vocabulary.get(term)
+                if term_id is None:
+                    continue
+                term_ids.append(term_id)
+                document_positions.append(position)
+                frequencies.append(frequency)
+
+        term_ids_array = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids_array, kind="stable") # stable de giu document tang dan trong moi term
+
+        postings_offsets = np.zeros(num_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids_array, minlength=num_terms), out=postings_offsets[1:])
+
+        self.set_index(
+            document_ids,
+            document_lengths,
+            postings_offsets,
+            np.asarray(document_positions, dtype=np.int32)[order],
+            np.asarray(frequencies, dtype=np.float32)[order],
+        )
+        logger.info(f"Built BM25 index with {len(documents)} documents and {len(self.postings_documents)} postings.")
+
+    def set_index(
+        self,
+        document_ids: list[str],
+        document_lengths: np.ndarray,
+        postings_offsets: np.ndarray,
+        postings_documents: np.ndarray,
+        postings_frequencies: np.ndarray,
+    ):
+        """
+        Gan inverted index vua build (build_index) va tinh cac phan suy ra: idf, avgdl, length normalization,
+        ma tran trong so.
+        """
+        self._assign_postings(document_ids, document_lengths, postings_offsets, postings_documents, postings_frequencies)
+
+        # idf tinh giong score(): dung document_frequency cua sparse embedder
+        document_frequency = np.zeros(len(postings_offsets) - 1, dtype=np.float64)
+        for term, term_id in self.sparse_embedder.vocabulary.items():
+            document_frequency[term_id] = self.sparse_embedder.document_frequency.get(term, 0)
+        self.inverse_document_frequency = np.log(
+            (self.num_documents - document_frequency + 0.5) / (document_frequency + 0.5) + 1
+        ).astype(np.float32)
+
+        non_empty = document_lengths[document_lengths > 0]
+        self.average_document_length = float(non_empty.mean()) if non_empty.size else 0.0
+        self._length_normalization = self._compute_length_normalization()
+        self.term_document_weights = self._build_term_document_weights()
+
+    def load_index(
+        self,
+        document_ids: list[str],
+        document_lengths: np.ndarray,
+        postings_offsets: np.ndarray,
+        postings_documents: np.ndarray,
+        postings_frequencies: np.ndarray,
+        inverse_document_frequency: np.ndarray,
+        length_normalization: np.ndarray,
+        term_document_weights: np.ndarray,
+        average_document_length: float,
+    ):
+        """
+        Gan index da tinh san (load tu snapshot, mang co the la np.memmap): khong tinh lai idf / trong so,
+        CSR dung thang postings_documents va term_document_weights (data) ma khong copy.
+        """
+        self._assign_postings(document_ids, document_lengths, postings_offsets, postings_documents, postings_frequencies)
+        self.inverse_document_frequency = inverse_document_frequency
+        self.average_document_length = average_document_length
+        self._length_normalization = length_normalization
+        self.term_document_weights = sparse.csr_matrix(
+            (term_document_weights, postings_documents, postings_offsets),
+            shape=(len(postings_offsets) - 1, len(document_lengths)),
+        )
+
+    def _assign_postings(
+        self,
+        document_ids: list[str],
+        document_lengths: np.ndarray,
+        postings_offsets: np.ndarray,
+        postings_documents: np.ndarray,
+        postings_frequencies: np.ndarray,
+    ):
+        self.num_documents = self.sparse_embedder.num_documents
+        self.postings_offsets = postings_offsets
+        self.postings_documents = postings_documents
+        self.postings_frequencies = postings_frequencies
+        self.document_ids = [str(document_id) for document_id in document_ids]
+        self.document_index = {document_id: position for position, document_id in enumerate(self.document_ids)}
+        self.document_lengths = document_lengths
+
+    def _compute_length_normalization(self) -> np.ndarray:
+        average_document_length = self.average_document_length or 1.0
+        return (self.k1 * (1 - self.b + self.b * (self.document_lengths / average_document_length))).astype(np.float32)
+
+    def _build_term_document_weights(self) -> sparse.csr_matrix:
+        """
+        CSR term x document dung lai postings lam indptr/indices, data la trong so BM25 da tinh san:
+            weight(t, d) = idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        Score cua ca corpus cho 1 query = query_vector (1 x V) @ weights (V x N).
+        """
+        term_ids = np.repeat(np.arange(len(self.postings_offsets) - 1), np.diff(self.postings_offsets))
+        weights = self.inverse_document_frequency[term_ids] * (
+            self.postings_frequencies * (self.k1 + 1)
+            / (self.postings_frequencies + self._length_normalization[self.postings_documents])
+        )
+        return sparse.csr_matrix(
+            (weights.astype(np.float32), self.postings_documents, self.postings_offsets),
+            shape=(len(self.postings_offsets) - 1, len(self.document_lengths)),
+        )
+
+    @property
+    def has_index(self) -> bool:
+        return self.postings_offsets is not None
+
+    def _query_term_ids(self, query: str) -> np.ndarray:
+        vocabulary = self.sparse_embedder.vocabulary
+        term_ids = {vocabulary[term] for term in tokenize(query) if term in vocabulary}
+        return np.fromiter(term_ids, dtype=np.int64, count=len(term_ids))
+
+    def score_all(self, query: str) -> np.ndarray:
+        """Score toan bo corpus bang cach cong don postings cua cac term trong query"""
+        if not self.has_index:
+            raise RuntimeError("BM25 index not built. Call build_index first.")
+
+        scores = np.zeros(len(self.document_lengths), dtype=np.float32)
+        for term_id in self._query_term_ids(query):
+            start, end = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+            if start == end:
+                continue
+            documents = self.postings_documents[start:end]
+            frequencies = self.postings_frequencies[start:end]
+            scores[documents] += self.inverse_document_frequency[term_id] * (
+                frequencies * (self.k1 + 1) / (frequencies + self._length_normalization[documents])
+            )
+        return scores
+
+    def search(self, query: str, top_k: int) -> list[tuple[str, float]]:
+        """
+        Retrieve top_k document tren toan corpus (khong phu thuoc dense search).
+        Tra ve list (document id, bm25 score) giam dan theo score.
+        """
+        if not self.has_index:
+            raise RuntimeError("BM25 index not built. Call build_index first.")
+
+        term_ids = self._query_term_ids(query)
+        if top_k <= 0 or term_ids.size == 0:
+            return []
+
+        query_vector = sparse.csr_matrix(
+            (np.ones(term_ids.size, dtype=np.float32), term_ids, [0, term_ids.size]),
+            shape=(1, self.term_document_weights.shape[0]),
+        )
+        scores = query_vector @ self.term_document_weights # 1 x N, chi chua document co it nhat 1 term
+        documents, values = scores.indices, scores.data
+        if documents.size == 0:
+            return []
+
+        if documents.size > top_k:
+            top = np.argpartition(-values, top_k - 1)[:top_k]
+            documents, values = documents[top], values[top]
+        order = np.argsort(-values, kind="stable")
+        return [(self.document_ids[documents[i]], float(values[i])) for i in order]
+
+    def score_indexed(self, query: str, document_ids: list[str]) -> list[float | None]:
+        """
+        Score cac document da co trong index chi bang lookup postings (khong tokenize text).
+        Tra ve None cho document id khong co trong index.
+        """
+        if not self.has_index:
+            raise RuntimeError("BM25 index not built. Call build_index first.")
+
+        positions = np.array([self.document_index.get(str(document_id), -1) for document_id in document_ids], dtype=np.int64)
+        known = positions >= 0
+        candidates = positions[known]
+        scores = np.zeros(len(candidates), dtype=np.float32)
+
+        if candidates.size:
+            for term_id in self._query_term_ids(query):
+                start, end = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+                if start == end:
+                    continue
+                documents = self.postings_documents[start:end]
+                # postings da sap xep theo document nen dung binary search de tim candidate
+                slots = np.searchsorted(documents, candidates)
+                slots[slots >= len(documents)] = 0
+                matched = documents[slots] == candidates
+                if not matched.any():
+                    continue
+                frequencies = self.postings_frequencies[start:end][slots[matched]]
+                scores[matched] += self.inverse_document_frequency[term_id] * (
+                    frequencies * (self.k1 + 1) / (frequencies + self._length_normalization[candidates[matched]])
+                )
+
+        results: list[float | None] = [None] * len(document_ids)
+        for slot, index in enumerate(np.flatnonzero(known)):
+            results[index] = float(scores[slot])
+        return results
+
+    def score_candidates(self, query: str, document_ids: list[str], documents: list[str]) -> list[float]:
+        """Score candidate tu index, fallback ve score() theo text cho document chua co trong index"""
+        if not self.has_index:
+            return self.score_batch(query, documents)
+
+        scores = self.score_indexed(query, document_ids)
+        return [
+            score if score is not None else self.score(query, document)
+            for score, document in zip(scores, documents)
+        ]
+
     def score(self, query: str, document: str) -> float:
         if not query or not document:
             logger.warning("Empty query or document provided for scoring.")
@@ -0,0 +1,263 @@
+"""
+Snapshot nhi phan cua SparseEmbedder + BM25 inverted index (vocabulary, document frequency, doc lengths, postings)
+kem cac phan suy ra (idf, length normalization, trong so CSR term x document) de load khong phai tinh lai gi.
+
+Ingestion ghi snapshot sau khi upsert, startup mmap snapshot thay vi scroll toan bo collection va fit lai.
+BM25 index chi duoc dung khi khop collection hien tai (so point + digest cua toan bo point id + hash text cua 1 mau
+point), nguoc lai startup quay ve scroll va ghi snapshot moi. Point id la content hash cua chunk nen chunk bi thay
+o bat ky dau cung lam digest khac. Sparse model (vocabulary + idf) thi duoc load nguyen ven mien la moi point
+trong collection co payload sparse_model_version trung voi snapshot, de sparse vector tinh o query time cung
+term id / idf voi sparse vector da luu trong Qdrant.
+
+    data/bm25_snapshot/
+        manifest.json                    # snapshot hien tai + fingerprint, ghi de atomic (os.replace)
+        <snapshot_id>/
+            terms.json                   # term theo term id
+            document_ids.json            # point id theo vi tri document
+            document_frequency.npy
+            document_lengths.npy
+            postings_offsets.npy
+            postings_documents.npy
+            postings_frequencies.npy
+            inverse_document_frequency.npy
+            length_normalization.npy
+            term_document_weights.npy    # data cua CSR, indices / indptr la postings_documents / postings_offsets
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from collections import Counter
+
+import numpy as np
+from qdrant_client.models import FieldCondition, Filter, MatchValue
+
+from core.settings_loader import load_settings
+from embedding.sparse_embedder import SparseEmbedder
+from scoring.bm25 import BM25
+
+settings = load_settings()
+logger = logging.getLogger("scoring")
+
+COLLECTION_NAME = settings["vector_database"]["collection_name"]
+BM25_SNAPSHOT_DIR = settings.get("retrieval", {}).get("bm25_snapshot_dir", "data/bm25_snapshot")
+
+FORMAT_VERSION = 2
+FINGERPRINT_SAMPLE_SIZE = 16
+SCROLL_BATCH_SIZE = 10000
+ARRAYS = (
+    "document_frequency", "document_lengths", "postings_offsets", "postings_documents", "postings_frequencies",
+    "inverse_document_frequency", "length_normalization", "term_document_weights",
+)
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+def _point_id(document_id: str):
+    return int(document_id) if document_id.isdigit() else document_id # qdrant point id: so nguyen hoac uuid
+
+def _ids_digest(document_ids) -> str:
+    """sha1 cua tap point id (sap xep), khong phu thuoc thu tu"""
+    digest = hashlib.sha1()
+    for document_id in sorted(str(document_id) for document_id in document_ids):
+        digest.update(document_id.encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+def _collection_ids(client, collection_name: str) -> list[str]:
+    """Id cua toan bo point trong collection (khong lay payload / vector)"""
+    point_ids = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=SCROLL_BATCH_SIZE,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        point_ids.extend(str(point.id) for point in points)
+        if offset is None:
+            return point_ids
+
+def _fingerprint_sample(document_ids: list[str], documents: list[str]) -> dict[str, str]:
+    """Hash text cua toi da FINGERPRINT_SAMPLE_SIZE document trai deu tren corpus"""
+    if not document_ids:
+        return {}
+    positions = np.unique(np.linspace(0, len(document_ids) - 1, FINGERPRINT_SAMPLE_SIZE).astype(int))
+    return {document_ids[position]: _text_hash(documents[position]) for position in positions}
+
+def _write_json(path: str, data):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False)
+
+def save_bm25_snapshot(
+    bm25: BM25, documents: list[str], directory: str = BM25_SNAPSHOT_DIR, collection_name: str = COLLECTION_NAME,
+) -> str:
+    """
+    Ghi snapshot moi cho bm25 (da build_index tren documents) va tra ve snapshot id.
+    Snapshot cu bi xoa sau khi manifest da tro sang snapshot moi.
+    """
+    if not bm25.has_index:
+        raise RuntimeError("BM25 index not built. Call build_index first.")
+    if len(documents) != len(bm25.document_ids):
+        raise ValueError("documents must match the indexed document ids")
+
+    os.makedirs(directory, exist_ok=True)
+    snapshot_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    temporary_dir = os.path.join(directory, f".{snapshot_id}.tmp")
+    os.makedirs(temporary_dir)
+
+    sparse_embedder = bm25.sparse_embedder
+    terms = [""] * len(sparse_embedder.vocabulary)
+    for term, term_id in sparse_embedder.vocabulary.items():
+        terms[term_id] = term
+    arrays = {
+        "document_frequency": np.array([sparse_embedder.document_frequency.get(term, 0) for term in terms], dtype=np.int32),
+        "document_lengths": np.asarray(bm25.document_lengths, dtype=np.int32),
+        "postings_offsets": np.asarray(bm25.postings_offsets, dtype=np.int64),
+        "postings_documents": np.asarray(bm25.postings_documents, dtype=np.int32),
+        "postings_frequencies": np.asarray(bm25.postings_frequencies, dtype=np.float32),
+        "inverse_document_frequency": np.asarray(bm25.inverse_document_frequency, dtype=np.float32),
+        "length_normalization": np.asarray(bm25._length_normalization, dtype=np.float32),
+        "term_document_weights": np.asarray(bm25.term_document_weights.data, dtype=np.float32),
+    }
+
+    _write_json(os.path.join(temporary_dir, "terms.json"), terms)
+    _write_json(os.path.join(temporary_dir, "document_ids.json"), bm25.document_ids)
+    for name, array in arrays.items():
+        np.save(os.path.join(temporary_dir, f"{name}.npy"), array)
+    os.rename(temporary_dir, os.path.join(directory, snapshot_id))
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "snapshot_id": snapshot_id,
+        "created_at": time.time(),
+        "collection_name": collection_name,
+        "sparse_model_version": sparse_embedder.version,
+        "num_documents": sparse_embedder.num_documents,
+        "vocabulary_size": len(terms),
+        "num_postings": int(len(arrays["postings_documents"])),
+        "k1": bm25.k1,
+        "b": bm25.b,
+        "average_document_length": bm25.average_document_length,
+        "fingerprint": {
+            "points_count": len(bm25.document_ids),
+            "ids_digest": _ids_digest(bm25.document_ids),
+            "sample": _fingerprint_sample(bm25.document_ids, documents),
+        },
+    }
+    _write_json(os.path.join(directory, "manifest.json.tmp"), manifest)
+    os.replace(os.path.join(directory, "manifest.json.tmp"), os.path.join(directory, "manifest.json"))
+
+    for name in os.listdir(directory): # snapshot cu (file dang mmap van doc duoc sau khi xoa)
+        path = os.path.join(directory, name)
+        if name != snapshot_id and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+    logger.info(f"Saved BM25 snapshot {snapshot_id}: {len(bm25.document_ids)} documents, {len(terms)} terms -> {directory}")
+    return snapshot_id
+
+def read_manifest(directory: str = BM25_SNAPSHOT_DIR) -> dict | None:
+    try:
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def _fingerprint_mismatch(client, manifest: dict, collection_name: str) -> str | None:
+    """Tra ve ly do snapshot khong khop collection, None neu khop"""
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return f"format version {manifest.get('format_version')} != {FORMAT_VERSION}"
+    if manifest.get("collection_name") != collection_name:
+        return f"snapshot is for collection '{manifest.get('collection_name')}'"
+
+    fingerprint = manifest["fingerprint"]
+    points_count = client.count(collection_name=collection_name, exact=True).count
+    if points_count != fingerprint["points_count"]:
+        return f"collection has {points_count} points, snapshot has {fingerprint['points_count']}"
+    if _ids_digest(_collection_ids(client, collection_name)) != fingerprint["ids_digest"]:
+        return "collection point ids differ from snapshot"
+
+    sample = fingerprint["sample"]
+    points = client.retrieve(
+        collection_name=collection_name,
+        ids=[_point_id(document_id) for document_id in sample],
+        with_payload=["text"],
+        with_vectors=False,
+    )
+    hashes = {str(point.id): _text_hash((point.payload or {}).get("text", "")) for point in points}
+    changed = [document_id for document_id, text_hash in sample.items() if hashes.get(document_id) != text_hash]
+    if changed:
+        return f"{len(changed)}/{len(sample)} sampled points changed or missing"
+    return None
+
+def _load_sparse_embedder(snapshot_dir: str, manifest: dict, document_frequency: np.ndarray) -> SparseEmbedder:
+    with open(os.path.join(snapshot_dir, "terms.json"), encoding="utf-8") as file:
+        terms = json.load(file)
+    sparse_embedder = SparseEmbedder()
+    sparse_embedder.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+    sparse_embedder.document_frequency = Counter(dict(zip(terms, document_frequency.tolist())))
+    sparse_embedder.num_documents = manifest["num_documents"]
+    sparse_embedder.version = manifest.get("sparse_model_version")
+    return sparse_embedder
+
+def load_sparse_embedder(directory: str = BM25_SNAPSHOT_DIR) -> SparseEmbedder | None:
+    """Load nguyen ven sparse model (vocabulary, document frequency, version) cua snapshot hien tai, khong can BM25 index"""
+    manifest = read_manifest(directory)
+    if manifest is None or manifest.get("format_version") != FORMAT_VERSION:
+        return None
+    snapshot_dir = os.path.join(directory, manifest["snapshot_id"])
+    return _load_sparse_embedder(snapshot_dir, manifest, np.load(os.path.join(snapshot_dir, "document_frequency.npy")))
+
+def sparse_vectors_match(client, version: str | None, collection_name: str = COLLECTION_NAME) -> bool:
+    """True neu moi point trong collection co sparse vector duoc encode bang sparse model version nay"""
+    if version is None:
+        return False
+    mismatched = client.count(
+        collection_name=collection_name,
+        count_filter=Filter(must_not=[FieldCondition(key="sparse_model_version", match=MatchValue(value=version))]),
+        exact=True,
+    ).count
+    if mismatched:
+        logger.warning(f"{mismatched} points in '{collection_name}' were not encoded with sparse model {version}")
+    return mismatched == 0
+
+def load_bm25_snapshot(client, directory: str = BM25_SNAPSHOT_DIR, collection_name: str = COLLECTION_NAME) -> BM25 | None:
+    """
+    Load BM25 (kem SparseEmbedder tai bm25.sparse_embedder) tu snapshot, postings / idf / trong so CSR duoc mmap
+    (khong copy vao RAM, khong tinh lai).
+    Tra ve None neu chua co snapshot hoac snapshot khong khop collection -> caller scroll Qdrant va build lai.
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        logger.info(f"No BM25 snapshot found in {directory}")
+        return None
+
+    mismatch = _fingerprint_mismatch(client, manifest, collection_name)
+    if mismatch:
+        logger.warning(f"BM25 snapshot {manifest.get('snapshot_id')} is stale: {mismatch}")
+        return None
+
+    snapshot_dir = os.path.join(directory, manifest["snapshot_id"])
+    with open(os.path.join(snapshot_dir, "document_ids.json"), encoding="utf-8") as file:
+        document_ids = json.load(file)
+    arrays = {name: np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+    sparse_embedder = _load_sparse_embedder(snapshot_dir, manifest, arrays["document_frequency"])
+
+    bm25 = BM25(sparse_embedder, k1=manifest["k1"], b=manifest["b"])
+    bm25.load_index(
+        document_ids,
+        arrays["document_lengths"],
+        arrays["postings_offsets"],
+        arrays["postings_documents"],
+        arrays["postings_frequencies"],
+        arrays["inverse_document_frequency"],
+        arrays["length_normalization"],
+        arrays["term_document_weights"],
+        manifest["average_document_length"],
+    )
+    logger.info(f"Loaded BM25 snapshot {manifest['snapshot_id']}: {len(document_ids)} documents, {len(sparse_embedder.vocabulary)} terms")
+    return bm25
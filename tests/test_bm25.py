@@ -0,0 +1,68 @@
+import unittest
+
+from embedding.sparse_embedder import SparseEmbedder
+from scoring.bm25 import BM25
+
+CORPUS = [
+    "Dự án biệt thự hiện đại tại quận 2, thiết kế nội thất phong cách Indochine.",
+    "Nhà phố hiện đại 3 tầng, chủ đầu tư anh Minh.",
+    "Phong cách nội thất Japandi kết hợp Nhật Bản và Bắc Âu.",
+    "Tin tức: NMK hoàn thành dự án căn hộ cao cấp.",
+    "",
+]
+
+class TestBM25Index(unittest.TestCase):
+
+    def setUp(self):
+        sparse_embedder = SparseEmbedder()
+        sparse_embedder.fit(CORPUS)
+        self.bm25 = BM25(sparse_embedder)
+        self.bm25.build_index(CORPUS, [f"doc-{i}" for i in range(len(CORPUS))])
+
+    def test_average_document_length_matches_text_path(self):
+        """Test avg doc length cua index giong compute_average_document_length"""
+        sparse_embedder = SparseEmbedder()
+        sparse_embedder.fit(CORPUS)
+        reference = BM25(sparse_embedder)
+        reference.compute_average_document_length(CORPUS)
+        self.assertAlmostEqual(self.bm25.average_document_length, reference.average_document_length)
+
+    def test_indexed_scores_match_text_scores(self):
+        """Test score tu postings bang score() theo text"""
+        for query in ["dự án hiện đại", "phong cách nội thất", "chủ đầu tư", "không có từ nào"]:
+            indexed = self.bm25.score_indexed(query, [f"doc-{i}" for i in range(len(CORPUS))])
+            for document, score in zip(CORPUS, indexed):
+                self.assertAlmostEqual(score, self.bm25.score(query, document), places=4)
+
+    def test_score_all_matches_indexed(self):
+        """Test score_all tra ve cung ket qua voi score_indexed"""
+        query = "nội thất hiện đại"
+        all_scores = self.bm25.score_all(query)
+        indexed = self.bm25.score_indexed(query, [f"doc-{i}" for i in range(len(CORPUS))])
+        for a, b in zip(all_scores, indexed):
+            self.assertAlmostEqual(float(a), b, places=5)
+
+    def test_unknown_document_falls_back_to_text(self):
+        """Test document khong co trong index thi score theo text"""
+        text = "Biệt thự hiện đại mới"
+        indexed = self.bm25.score_indexed("hiện đại", ["unknown"])
+        self.assertEqual(indexed, [None])
+        scores = self.bm25.score_candidates("hiện đại", ["unknown", "doc-1"], [text, CORPUS[1]])
+        self.assertAlmostEqual(scores[0], self.bm25.score("hiện đại", text), places=5)
+        self.assertAlmostEqual(scores[1], self.bm25.score("hiện đại", CORPUS[1]), places=4)
+
+    def test_search_returns_corpus_top_k(self):
+        """Test search tren toan corpus khop voi thu tu cua score_all"""
+        query = "biệt thự hiện đại"
+        all_scores = self.bm25.score_all(query)
+        expected = [f"doc-{i}" for i in sorted(range(len(CORPUS)), key=lambda i: -all_scores[i]) if all_scores[i] > 0][:2]
+        results = self.bm25.search(query, top_k=2)
+        self.assertEqual([doc_id for doc_id, _ in results], expected)
+        self.assertAlmostEqual(results[0][1], float(all_scores[int(expected[0].split("-")[1])]), places=5)
+
+    def test_search_without_matching_terms(self):
+        """Test query khong co term nao trong vocabulary"""
+        self.assertEqual(self.bm25.search("xyz qwe", top_k=5), [])
+
+if __name__ == '__main__':
+    unittest.main()
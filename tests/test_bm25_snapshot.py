@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+import uuid
+from unittest.mock import patch
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, VectorParams, Distance, SparseVector, SparseVectorParams
+
+import scoring.bm25_snapshot as bm25_snapshot
+from embedding.sparse_embedder import SparseEmbedder
+from scoring.bm25 import BM25
+from scoring.bm25_snapshot import load_bm25_snapshot, load_sparse_embedder, read_manifest, save_bm25_snapshot, sparse_vectors_match
+
+COLLECTION = "test_collection"
+CORPUS = [
+    "Dự án biệt thự hiện đại tại quận 2, thiết kế nội thất phong cách Indochine.",
+    "Nhà phố hiện đại 3 tầng, chủ đầu tư anh Minh.",
+    "Phong cách nội thất Japandi kết hợp Nhật Bản và Bắc Âu.",
+    "Tin tức: NMK hoàn thành dự án căn hộ cao cấp.",
+]
+
+class TestBM25Snapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = QdrantClient(":memory:")
+        self.client.create_collection(
+            COLLECTION,
+            vectors_config={"dense": VectorParams(size=2, distance=Distance.COSINE)},
+            sparse_vectors_config={"sparse": SparseVectorParams()},
+        )
+        self.ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, text)) for text in CORPUS]
+
+        # giong ingestion: fit sparse model, encode sparse vector, ghi version vao payload
+        sparse_embedder = SparseEmbedder()
+        sparse_embedder.fit(CORPUS)
+        self.client.upsert(COLLECTION, points=[
+            PointStruct(
+                id=point_id,
+                vector={"dense": [1.0, 0.0], "sparse": SparseVector(**sparse_embedder.encode(text))},
+                payload={"text": text, "sparse_model_version": sparse_embedder.version},
+            )
+            for point_id, text in zip(self.ids, CORPUS)
+        ])
+        self.bm25 = BM25(sparse_embedder)
+        self.bm25.build_index(CORPUS, self.ids)
+        save_bm25_snapshot(self.bm25, CORPUS, self.directory, COLLECTION)
+
+    def test_loaded_snapshot_matches_built_index(self):
+        """Test BM25 load tu snapshot (mmap) cho ket qua giong index build tu corpus"""
+        loaded = load_bm25_snapshot(self.client, self.directory, COLLECTION)
+        self.assertIsNotNone(loaded)
+        self.assertIsInstance(loaded.postings_documents, np.memmap)
+        # idf / trong so CSR doc thang tu snapshot, CSR dung chung bo nho voi file mmap
+        self.assertIsInstance(loaded.inverse_document_frequency, np.memmap)
+        self.assertTrue(np.shares_memory(loaded.term_document_weights.indices, loaded.postings_documents))
+        np.testing.assert_array_equal(loaded.term_document_weights.toarray(), self.bm25.term_document_weights.toarray())
+        self.assertEqual(loaded.sparse_embedder.vocabulary, self.bm25.sparse_embedder.vocabulary)
+        self.assertEqual(loaded.sparse_embedder.encode(CORPUS[0]), self.bm25.sparse_embedder.encode(CORPUS[0]))
+        for query in ["dự án hiện đại", "phong cách nội thất", "chủ đầu tư"]:
+            self.assertEqual(loaded.search(query, 3), self.bm25.search(query, 3))
+
+    def test_changed_collection_invalidates_snapshot(self):
+        """Test collection thay doi (sua text hoac them point) thi khong dung snapshot"""
+        self.client.set_payload(COLLECTION, payload={"text": "nội dung mới"}, points=[self.ids[0]])
+        self.assertIsNone(load_bm25_snapshot(self.client, self.directory, COLLECTION))
+
+        self.client.set_payload(COLLECTION, payload={"text": CORPUS[0]}, points=[self.ids[0]])
+        self.client.upsert(COLLECTION, points=[PointStruct(id=str(uuid.uuid4()), vector={"dense": [0.0, 1.0]}, payload={"text": "mới"})])
+        self.assertIsNone(load_bm25_snapshot(self.client, self.directory, COLLECTION))
+
+    def test_replaced_unsampled_point_invalidates_snapshot(self):
+        """Test 1 chunk ngoai mau fingerprint bi thay (cung so point, id content hash moi) thi snapshot het hieu luc"""
+        with patch.object(bm25_snapshot, "FINGERPRINT_SAMPLE_SIZE", 1): # mau chi co point dau tien
+            save_bm25_snapshot(self.bm25, CORPUS, self.directory, COLLECTION)
+        self.assertIsNotNone(load_bm25_snapshot(self.client, self.directory, COLLECTION))
+
+        self.client.delete(COLLECTION, points_selector=[self.ids[2]])
+        self.client.upsert(COLLECTION, points=[PointStruct(id=str(uuid.uuid5(uuid.NAMESPACE_URL, "mới")), vector={"dense": [0.0, 1.0]}, payload={"text": "mới"})])
+        self.assertEqual(self.client.count(COLLECTION).count, len(CORPUS))
+        self.assertIsNone(load_bm25_snapshot(self.client, self.directory, COLLECTION))
+
+    def test_new_snapshot_replaces_old(self):
+        """Test ghi snapshot moi thi manifest tro sang snapshot moi va snapshot cu bi xoa"""
+        old_id = read_manifest(self.directory)["snapshot_id"]
+        new_id = save_bm25_snapshot(self.bm25, CORPUS, self.directory, COLLECTION)
+        self.assertNotEqual(old_id, new_id)
+        self.assertEqual(read_manifest(self.directory)["snapshot_id"], new_id)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, old_id)))
+        self.assertIsNotNone(load_bm25_snapshot(self.client, self.directory, COLLECTION))
+
+    def test_sparse_model_loaded_verbatim(self):
+        """Test sparse model load tu snapshot giu nguyen version / term id, query sparse vector tren Qdrant dung duoc"""
+        sparse_embedder = load_sparse_embedder(self.directory)
+        self.assertEqual(sparse_embedder.version, self.bm25.sparse_embedder.version)
+        self.assertTrue(sparse_vectors_match(self.client, sparse_embedder.version, COLLECTION))
+
+        points = self.client.query_points(
+            COLLECTION, query=SparseVector(**sparse_embedder.encode("phong cách Japandi")), using="sparse", limit=1,
+        ).points
+        self.assertEqual(str(points[0].id), self.ids[2])
+
+    def test_refitted_sparse_model_does_not_match_collection(self):
+        """Test sparse model fit lai (version khac) hoac point thieu version thi khong query sparse tren Qdrant"""
+        refitted = SparseEmbedder()
+        refitted.fit(CORPUS)
+        self.assertFalse(sparse_vectors_match(self.client, refitted.version, COLLECTION))
+
+        self.client.upsert(COLLECTION, points=[PointStruct(id=str(uuid.uuid4()), vector={"dense": [0.0, 1.0]}, payload={"text": "mới"})])
+        self.assertFalse(sparse_vectors_match(self.client, self.bm25.sparse_embedder.version, COLLECTION))
+
+    def test_missing_snapshot_returns_none(self):
+        """Test chua co snapshot thi tra ve None (startup scroll Qdrant)"""
+        self.assertIsNone(load_bm25_snapshot(self.client, tempfile.mkdtemp(), COLLECTION))
+
+if __name__ == '__main__':
+    unittest.main()
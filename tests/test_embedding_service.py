@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from core.batching import MicroBatcher
+from embedding.service import EmbeddingService
+
+def fake_embed(texts: list[str]) -> list[list[float]]:
+    return [[float(len(text)), 1.0] for text in texts]
+
+class TestMicroBatcher(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_requests_share_one_batch(self):
+        """Test cac request dong thoi duoc gom thanh 1 lan goi, ket qua dung thu tu"""
+        calls = []
+        def process(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(process, "embedding", max_batch_size=16, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        self.assertEqual(results, [0, 2, 4, 6, 8])
+        self.assertEqual(calls, [[0, 1, 2, 3, 4]])
+
+    async def test_max_batch_size(self):
+        """Test batch khong vuot max_batch_size"""
+        sizes = []
+        def process(items):
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher(process, "embedding", max_batch_size=2, max_wait_ms=20)
+        await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        self.assertEqual(sorted(sizes), [1, 2, 2])
+
+    async def test_errors_propagate_to_every_caller(self):
+        """Test loi cua batch duoc raise cho tat ca request trong batch"""
+        def process(items):
+            raise ValueError("model error")
+
+        batcher = MicroBatcher(process, "embedding", max_batch_size=8, max_wait_ms=1)
+        results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+class TestEmbeddingService(unittest.IsolatedAsyncioTestCase):
+
+    @patch('embedding.service.embed_texts')
+    async def test_query_cache_skips_model(self, mock_embed):
+        """Test cau hoi lap lai (khac hoa/thuong, khoang trang) khong goi lai model"""
+        mock_embed.side_effect = fake_embed
+        service = EmbeddingService(query_cache_size=10, max_batch_wait_ms=1)
+
+        first = await service.embed_query("Phong cách Japandi là gì?")
+        second = await service.embed_query("  phong cách japandi là gì ")
+        self.assertEqual(first, second)
+        self.assertEqual(mock_embed.call_count, 1)
+        self.assertEqual(service.stats()["query_cache"]["hits"], 1)
+
+    @patch('embedding.service.embed_texts')
+    async def test_distinct_queries_are_batched(self, mock_embed):
+        """Test query khac nhau den cung luc chi can 1 lan encode"""
+        mock_embed.side_effect = fake_embed
+        service = EmbeddingService(query_cache_size=10, max_batch_size=8, max_batch_wait_ms=20)
+
+        vectors = await asyncio.gather(*(service.embed_query(q) for q in ["a", "bb", "ccc"]))
+        self.assertEqual([vector[0] for vector in vectors], [1.0, 2.0, 3.0])
+        self.assertEqual(mock_embed.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
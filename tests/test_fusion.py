@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from retrieval.fusion import fuse_scores, minmax_normalize, reciprocal_ranks, zscore_normalize
+
+DENSE = [0.82, 0.80, 0.78, 0.40]
+BM25 = [0.0, 3.0, 25.0, 1.0] # chunk dai -> BM25 rat lon
+
+class TestScoreFusion(unittest.TestCase):
+
+    def test_normalizations(self):
+        """Test minmax ve [0, 1], zscore mean 0 std 1, leg co moi score bang nhau khong dong gop"""
+        np.testing.assert_allclose(minmax_normalize(np.array([2.0, 4.0, 3.0])), [0.0, 1.0, 0.5])
+        normalized = zscore_normalize(np.array([1.0, 2.0, 6.0]))
+        self.assertAlmostEqual(normalized.mean(), 0.0)
+        self.assertAlmostEqual(normalized.std(), 1.0)
+        np.testing.assert_array_equal(minmax_normalize(np.array([5.0, 5.0])), [0.0, 0.0])
+        np.testing.assert_array_equal(zscore_normalize(np.array([5.0, 5.0])), [0.0, 0.0])
+        self.assertEqual(fuse_scores([], [], 0.6, 0.4).size, 0)
+
+    def test_reciprocal_ranks(self):
+        """Test rank theo score giam dan, score bang nhau cung rank, BM25 = 0 khong dong gop"""
+        np.testing.assert_allclose(reciprocal_ranks(np.array([0.5, 0.9, 0.5]), k=1), [1 / 3, 1 / 2, 1 / 3])
+        np.testing.assert_allclose(reciprocal_ranks(np.array([0.0, 2.0]), k=1, ignore_zero=True), [0.0, 1 / 2])
+
+    def test_bm25_no_longer_dominates(self):
+        """Test cach cu: BM25 lon lan at dense, sau khi chuan hoa dense_weight co tac dung"""
+        self.assertEqual(int(np.argmax(fuse_scores(DENSE, BM25, 0.9, 0.1, "weighted"))), 2) # tang dense_weight van vay
+        self.assertEqual(int(np.argmax(fuse_scores(DENSE, BM25, 1.0, 0.0, "weighted"))), 0)
+        for strategy in ("minmax", "zscore", "rrf"):
+            self.assertEqual(int(np.argmax(fuse_scores(DENSE, BM25, 1.0, 0.0, strategy))), 0, strategy)
+            self.assertEqual(int(np.argmax(fuse_scores(DENSE, BM25, 0.0, 1.0, strategy))), 2, strategy)
+            fused = fuse_scores(DENSE, BM25, 0.6, 0.4, strategy)
+            self.assertLess(fused[3], fused[1], strategy) # kem ca 2 leg xep sau
+        with self.assertRaises(ValueError):
+            fuse_scores(DENSE, BM25, 0.6, 0.4, "max")
+
+if __name__ == '__main__':
+    unittest.main()
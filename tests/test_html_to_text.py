@@ -0,0 +1,68 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ingestion.helpers.html_to_text import EXTRACTORS, HtmlTextCache
+
+EDGE_CASES = [
+    "",
+    "Văn bản thuần không có tag",
+    "<p>Giá: 5&nbsp;tỷ &ndash; Hà Nội</p>\n<p> Diện tích 250m² </p>",
+    "<div>x<script>if (a < b) { y() }</script>y<style>p { color: red }</style>z</div>",
+    "<!DOCTYPE html><html><head><title>Tiêu đề</title></head><body>B &amp; &lt;x&gt;</body></html>",
+    "<!-- ghi chú -->y<![CDATA[dữ liệu]]><?php echo 1 ?>w<template>t</template>",
+    "a&#39;b &copy c &unknown; d &#150; &#x1F600; tail &amp",
+    "<p>unclosed <b>bold<br>line  break\n next</p></b><img src=x.jpg/>end",
+    "<p>1 < 2 and 3 > 2</p><textarea><b>t</b></textarea>",
+]
+
+TAGS = ["p", "div", "span", "strong", "em", "a", "li", "h2", "br", "img", "script", "table", "td"]
+TEXTS = ["Biệt thự", "  nhà phố  ", "\n", "&amp;", "&nbsp;", "&#8211;", "giá < 5 tỷ", "Hà Nội.", ""]
+
+def random_html(rng: random.Random, size: int) -> str:
+    parts = []
+    for _ in range(size):
+        tag = rng.choice(TAGS)
+        choice = rng.random()
+        if choice < 0.4:
+            parts.append(f"<{tag} class='c{rng.randint(0, 9)}'>")
+        elif choice < 0.7:
+            parts.append(f"</{tag}>")
+        elif choice < 0.75:
+            parts.append("<!-- c -->")
+        else:
+            parts.append(rng.choice(TEXTS))
+    return "".join(parts)
+
+class TestHtmlToText(unittest.TestCase):
+
+    def test_parity_with_beautifulsoup(self):
+        """Test extractor htmlparser cho cung output voi BeautifulSoup get_text(separator=" ", strip=True)"""
+        rng = random.Random(0)
+        for html in EDGE_CASES + [random_html(rng, 60) for _ in range(300)]:
+            self.assertEqual(EXTRACTORS["htmlparser"](html), EXTRACTORS["bs4"](html), html)
+
+    def test_cache_skips_unchanged_html(self):
+        """Test chay lai: HTML khong doi lay tu cache, HTML da sua duoc parse lai, entry cu bi bo"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "html_text_cache.json")
+            cache = HtmlTextCache(path)
+            self.assertEqual(cache.html_to_text("<p>Bài 1</p>"), "Bài 1")
+            cache.html_to_text("<p>Bài 2</p>")
+            cache.save()
+
+            with patch.dict(EXTRACTORS, {"htmlparser": lambda html: self.fail(f"parsed again: {html}")}):
+                cache = HtmlTextCache(path, "htmlparser")
+                self.assertEqual(cache.html_to_text("<p>Bài 1</p>"), "Bài 1")
+            cache.html_to_text("<p>Bài 2 đã sửa</p>")
+            cache.save()
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            self.assertEqual(len(HtmlTextCache(path).entries), 2)
+
+            with self.assertRaises(ValueError):
+                HtmlTextCache(path, "unknown")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import functools
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from qdrant_client import QdrantClient
+
+from ingestion.helpers.make_metadata import assign_chunk_ids, make_metadata
+from scoring import bm25_snapshot
+from vectorstore import upsert
+from vectorstore.qdrant import VECTOR_SIZE
+
+def make_chunks(texts: dict[str, str], created_at: str = "2025-01-01T00:00:00") -> list[dict]:
+    base = {"type": "project", "project_id": 1, "source": "projects.json", "created_at": created_at}
+    return assign_chunk_ids([
+        {"text": text, "metadata": make_metadata(base, chunk_type="description", part_index=index)}
+        for index, text in texts.items()
+    ])
+
+class TestChunkIds(unittest.TestCase):
+
+    def test_chunk_id_is_deterministic(self):
+        """Test cung noi dung -> cung chunk_id du created_at khac, noi dung / part_index khac -> chunk_id khac"""
+        first = make_chunks({0: "Biệt thự hiện đại", 1: "Nhà phố"})
+        second = make_chunks({0: "Biệt thự hiện đại", 1: "Nhà phố"}, created_at="2026-01-01T00:00:00")
+        changed = make_chunks({0: "Biệt thự cổ điển", 1: "Biệt thự hiện đại"})
+        ids = lambda chunks: [chunk["metadata"]["chunk_id"] for chunk in chunks]
+        self.assertEqual(ids(first), ids(second))
+        self.assertNotEqual(ids(first)[0], ids(changed)[0])
+        self.assertNotEqual(ids(first)[0], ids(changed)[1])
+
+class TestIncrementalUpsert(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = directory = tempfile.mkdtemp()
+        self.client = QdrantClient(":memory:")
+        self.embedded = []
+
+        def embed_texts(texts):
+            self.embedded.extend(texts)
+            return [[1.0] * VECTOR_SIZE for _ in texts]
+
+        for patcher in [
+            patch("vectorstore.upsert.get_qdrant_client", return_value=self.client),
+            patch("vectorstore.hybrid_index.embed_texts", side_effect=embed_texts),
+            patch("vectorstore.upsert.load_sparse_embedder", functools.partial(bm25_snapshot.load_sparse_embedder, directory)),
+            patch("vectorstore.upsert.save_bm25_snapshot", functools.partial(bm25_snapshot.save_bm25_snapshot, directory=directory)),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_rerun_on_unchanged_data_embeds_nothing(self):
+        """Test chay lai tren du lieu khong doi: khong embed, khong upsert, khong nhan doi point"""
+        chunks = {0: "Biệt thự hiện đại", 1: "Nhà phố 3 tầng", 2: "Căn hộ cao cấp"}
+        self.assertEqual(upsert.upsert_chunks(make_chunks(chunks))["upserted"], 3)
+        self.embedded.clear()
+
+        stats = upsert.upsert_chunks(make_chunks(chunks, created_at="2026-01-01T00:00:00"))
+        self.assertEqual(stats, {"upserted": 0, "deleted": 0, "unchanged": 3})
+        self.assertEqual(self.embedded, [])
+        self.assertEqual(self.client.count(upsert.COLLECTION_NAME).count, 3)
+
+    def test_changed_data_upserts_delta_and_deletes_vanished(self):
+        """Test chi embed chunk moi / thay doi, xoa chunk da mat, sparse vector cua chunk cu theo sparse model moi"""
+        upsert.upsert_chunks(make_chunks({0: "Biệt thự hiện đại", 1: "Nhà phố 3 tầng", 2: "Căn hộ cao cấp"}))
+        self.embedded.clear()
+
+        stats = upsert.upsert_chunks(make_chunks({0: "Biệt thự hiện đại", 1: "Nhà phố 4 tầng", 3: "Văn phòng"}))
+        self.assertEqual(stats, {"upserted": 2, "deleted": 2, "unchanged": 1})
+        self.assertEqual(sorted(self.embedded), ["Nhà phố 4 tầng", "Văn phòng"])
+        self.assertEqual(self.client.count(upsert.COLLECTION_NAME).count, 3)
+
+        version = bm25_snapshot.read_manifest(self.directory)["sparse_model_version"]
+        self.assertTrue(bm25_snapshot.sparse_vectors_match(self.client, version, upsert.COLLECTION_NAME))
+
+    def test_delete_vanished_with_retry(self):
+        """Test xoa chunk da mat bi loi tam thoi thi duoc retry, khong bo do sync"""
+        upsert.upsert_chunks(make_chunks({0: "Biệt thự hiện đại", 1: "Nhà phố 3 tầng"}))
+        deletes = []
+        original_delete = self.client.delete
+        def flaky_delete(**kwargs):
+            deletes.append(kwargs["points_selector"].points)
+            if len(deletes) == 1:
+                raise ConnectionError("Qdrant tam thoi khong phan hoi")
+            return original_delete(**kwargs)
+
+        with patch.object(self.client, "delete", side_effect=flaky_delete), \
+                patch("vectorstore.upsert.UPLOAD_RETRY_BACKOFF_SECONDS", 0):
+            stats = upsert.upsert_chunks(make_chunks({0: "Biệt thự hiện đại"}))
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual(len(deletes), 2)
+        self.assertEqual(self.client.count(upsert.COLLECTION_NAME).count, 1)
+
+    def test_upload_in_bounded_batches_with_retry(self):
+        """Test upsert theo batch nho, batch loi tam thoi duoc retry, loi lien tuc thi raise"""
+        upserts = []
+        original_upsert = self.client.upsert
+        def flaky_upsert(**kwargs):
+            upserts.append(len(kwargs["points"]))
+            if len(upserts) == 2:
+                raise ConnectionError("Qdrant tam thoi khong phan hoi")
+            return original_upsert(**kwargs)
+
+        with patch.object(self.client, "upsert", side_effect=flaky_upsert), \
+                patch("vectorstore.upsert.BATCH_SIZE", 2), patch("vectorstore.upsert.UPLOAD_RETRY_BACKOFF_SECONDS", 0):
+            stats = upsert.upsert_chunks(make_chunks({i: f"Dự án số {i}" for i in range(5)}))
+        self.assertEqual(stats["upserted"], 5)
+        self.assertEqual(self.client.count(upsert.COLLECTION_NAME).count, 5)
+        self.assertLessEqual(max(upserts), 2)
+        self.assertEqual(len(upserts), 4) # 3 batch + 1 lan retry
+
+        with patch.object(self.client, "upsert", side_effect=ConnectionError("down")), \
+                patch("vectorstore.upsert.UPLOAD_RETRY_BACKOFF_SECONDS", 0):
+            with self.assertRaises(ConnectionError):
+                upsert.upsert_chunks(make_chunks({0: "Dự án mới"}))
+
+    def test_chunk_stream_matches_single_batch(self):
+        """Test sync_chunk_stream nhan chunk theo nhieu dot (nhu tu process pool) cho ket qua nhu 1 lan upsert_chunks"""
+        chunks = make_chunks({i: f"Dự án số {i}" for i in range(5)})
+        with patch("vectorstore.upsert.BATCH_SIZE", 2):
+            stats = upsert.sync_chunk_stream(iter([chunks[:1], [], chunks[1:4], chunks[4:]]))
+        self.assertEqual(stats, {"upserted": 5, "deleted": 0, "unchanged": 0})
+        self.assertEqual(self.client.count(upsert.COLLECTION_NAME).count, 5)
+
+        version = bm25_snapshot.read_manifest(self.directory)["sparse_model_version"]
+        self.assertTrue(bm25_snapshot.sparse_vectors_match(self.client, version, upsert.COLLECTION_NAME))
+
+        self.embedded.clear()
+        stats = upsert.sync_chunk_stream(iter([chunks[3:], chunks[:3]]))
+        self.assertEqual(stats, {"upserted": 0, "deleted": 0, "unchanged": 5})
+        self.assertEqual(self.embedded, [])
+
+if __name__ == '__main__':
+    unittest.main()
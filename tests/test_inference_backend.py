@@ -0,0 +1,61 @@
+import importlib.util
+import tempfile
+import unittest
+
+import numpy as np
+
+from core.inference import load_model
+
+HAS_ONNX = importlib.util.find_spec("optimum") is not None and importlib.util.find_spec("onnxruntime") is not None
+
+TEXTS = [
+    "Dự án biệt thự hiện đại tại quận 2",
+    "Phong cách nội thất Japandi kết hợp Nhật Bản và Bắc Âu",
+    "Nhà phố 3 tầng chủ đầu tư anh Minh",
+    "Địa chỉ và hotline của công ty NMK",
+]
+
+@unittest.skipUnless(HAS_ONNX, "optimum / onnxruntime not installed")
+class TestInferenceBackends(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from sentence_transformers import CrossEncoder, SentenceTransformer
+        from evaluation.random_models import build_random_models
+
+        cls.directory = tempfile.TemporaryDirectory()
+        words = " ".join(TEXTS).lower().split()
+        bi_encoder, cross_encoder = build_random_models(cls.directory.name, "tiny", words=words, initializer_range=0.2)
+        cache_dir = f"{cls.directory.name}/cache"
+        pairs = [("biệt thự hiện đại", text.lower()) for text in TEXTS]
+
+        cls.embeddings, cls.scores = {}, {}
+        for backend in ("torch", "onnx", "onnx-int8"):
+            model = load_model(SentenceTransformer, bi_encoder, backend, cache_dir=cache_dir)
+            cls.embeddings[backend] = model.encode([text.lower() for text in TEXTS], normalize_embeddings=True)
+            cls.scores[backend] = load_model(CrossEncoder, cross_encoder, backend, cache_dir=cache_dir).predict(pairs)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_onnx_matches_torch(self):
+        """Test ONNX (fp32) cho ket qua gan nhu trung voi torch"""
+        np.testing.assert_allclose(self.embeddings["onnx"], self.embeddings["torch"], atol=1e-4)
+        np.testing.assert_allclose(self.scores["onnx"], self.scores["torch"], atol=1e-4)
+
+    def test_int8_within_tolerance(self):
+        """Test int8 sai lech trong nguong: cosine >= 0.99, score lech <= 0.02"""
+        cosine = (self.embeddings["onnx-int8"] * self.embeddings["torch"]).sum(axis=1)
+        self.assertGreaterEqual(float(cosine.min()), 0.99)
+        self.assertLessEqual(float(np.abs(self.scores["onnx-int8"] - self.scores["torch"]).max()), 0.02)
+
+class TestBackendSelection(unittest.TestCase):
+
+    def test_unknown_backend(self):
+        """Test backend khong hop le bao loi ro rang"""
+        with self.assertRaises(ValueError):
+            load_model(object, "model", "tensorrt")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from ingestion import load_data
+from ingestion.helpers import load_table
+from ingestion.helpers.json_stream import JsonStream, iter_export_tables
+
+EXPORT = {
+    "exportedAt": "2026-01-14T02:32:14",
+    "version": 12345,
+    "tables": {
+        "projects": [
+            {"id": 1, "title": "Biệt thự [hiện đại]", "area": 250.5, "tags": ["a", "b"], "note": "ngoặc } và \\\" trong chuỗi"},
+            {"id": 2, "title": "Nhà phố", "area": 1200, "category": {"name": "Nhà ở"}, "thumbnailUrl": None},
+        ],
+        "emptyTable": [],
+        "companyInfo": {"id": 1, "companyName": "NMK"},
+        "news": [{"id": i, "content": "<p>" + "x" * 50 + "</p>"} for i in range(5)],
+    },
+    "checksum": 987654321,
+}
+
+class TestJsonStream(unittest.TestCase):
+
+    def test_stream_matches_json_load_with_tiny_buffer(self):
+        """Test doc streaming voi buffer nho (gia tri bi cat giua 2 lan doc) cho ket qua nhu json.load"""
+        for indent in (None, 4):
+            text = json.dumps(EXPORT, ensure_ascii=False, indent=indent)
+            stream = JsonStream(io.StringIO(text), read_size=7)
+            tables = {}
+            for key in stream.iter_object():
+                if key == "tables":
+                    tables = {name: list(stream.iter_records()) for name in stream.iter_object()}
+                else:
+                    self.assertEqual(stream.decode(), EXPORT[key]) # so 12345 khong bi cat thanh 12
+            self.assertEqual(tables["projects"], EXPORT["tables"]["projects"])
+            self.assertEqual(tables["emptyTable"], [])
+            self.assertEqual(tables["companyInfo"], [EXPORT["tables"]["companyInfo"]])
+            self.assertEqual(tables["news"], EXPORT["tables"]["news"])
+
+    def test_export_tables_can_be_skipped(self):
+        """Test bo qua 1 bang (khong doc iterator) van doc dung bang tiep theo"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "database_export_2026-01-14T02-32-14.json"
+            path.write_text(json.dumps(EXPORT, ensure_ascii=False), encoding="utf-8")
+            names = []
+            for name, records in iter_export_tables(path):
+                names.append(name)
+                if name == "news":
+                    self.assertEqual(len(list(records)), 5)
+            self.assertEqual(names, ["projects", "emptyTable", "companyInfo", "news"])
+
+    def test_invalid_json_raises(self):
+        """Test file export bi cat giua chung thi raise loi"""
+        stream = JsonStream(io.StringIO(json.dumps(EXPORT)[:-40]), read_size=16)
+        with self.assertRaises(ValueError):
+            for key in stream.iter_object():
+                for _ in stream.iter_records():
+                    pass
+
+class TestLoadData(unittest.TestCase):
+
+    def test_load_data_writes_tables_readable_by_chunkers(self):
+        """Test load_data ghi moi bang thanh jsonl / json va load_table doc lai dung record"""
+        with tempfile.TemporaryDirectory() as directory:
+            raw_dir, processed_dir = os.path.join(directory, "raw"), os.path.join(directory, "processed")
+            os.makedirs(raw_dir)
+            Path(raw_dir, "database_export_2026-01-14T02-32-14.json").write_text(json.dumps(EXPORT), encoding="utf-8")
+            data_settings = {"raw_dir": raw_dir, "processed_dir": processed_dir}
+
+            with patch.dict(load_data.settings["data"], data_settings), patch.dict(load_table.settings["data"], data_settings):
+                for output_format in ("jsonl", "json"):
+                    load_data.load_data(output_format=output_format)
+                    projects = load_table.load_table("projects")
+                    self.assertIsInstance(projects, types.GeneratorType) # chunker doc tung record, khong co list ca bang
+                    self.assertEqual(list(projects), EXPORT["tables"]["projects"])
+                    self.assertEqual(list(load_table.load_table("companyInfo")), [EXPORT["tables"]["companyInfo"]])
+                    self.assertIsNone(load_table.load_table("emptyTable"))
+
+                self.assertEqual(sorted(os.listdir(processed_dir)), ["companyInfo.json", "news.json", "projects.json"])
+                with open(os.path.join(processed_dir, "projects.json"), encoding="utf-8") as file:
+                    self.assertEqual(json.load(file), EXPORT["tables"]["projects"])
+
+                # File loi giua chung: giu record truoc do, dung o dong loi
+                Path(processed_dir, "broken.jsonl").write_text('{"id": 1}\n{"id": \n{"id": 3}\n', encoding="utf-8")
+                with self.assertLogs("ingestion", "ERROR"):
+                    self.assertEqual(list(load_table.load_table("broken")), [{"id": 1}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.routes.chat as chat
+from api.health import router as health_router
+from core.metrics import Counter, Histogram, REGISTRY, STAGE_DURATION, render, stage, start_trace
+from core.schema import RetrievedDocument
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(REGISTRY.__setitem__, slice(None), list(REGISTRY)) # bo cac metric tao trong test
+
+    def test_prometheus_text_format(self):
+        """Test counter / histogram render dung text format: label, bucket cong don, +Inf, _sum, _count"""
+        counter = Counter("test_requests_total", "Requests", ("cache", "result"))
+        counter.inc(cache="answer", result="hit")
+        counter.inc(2, cache="answer", result="hit")
+        histogram = Histogram("test_duration_seconds", "Duration", ("stage",), buckets=(0.1, 1))
+        histogram.observe(0.05, stage="embed")
+        histogram.observe(0.5, stage="embed")
+        histogram.observe(3, stage="embed")
+
+        self.assertEqual(counter.render().splitlines(), [
+            "# HELP test_requests_total Requests",
+            "# TYPE test_requests_total counter",
+            'test_requests_total{cache="answer",result="hit"} 3',
+        ])
+        self.assertEqual(histogram.render().splitlines()[2:], [
+            'test_duration_seconds_bucket{stage="embed",le="0.1"} 1',
+            'test_duration_seconds_bucket{stage="embed",le="1"} 2',
+            'test_duration_seconds_bucket{stage="embed",le="+Inf"} 3',
+            'test_duration_seconds_sum{stage="embed"} 3.55',
+            'test_duration_seconds_count{stage="embed"} 3',
+        ])
+        with self.assertRaises(ValueError):
+            counter.inc(cache="answer")
+
+    def test_stage_breakdown(self):
+        """Test stage() ghi vao histogram va cong don vao breakdown cua request hien tai"""
+        before = STAGE_DURATION.count(stage="dense_search")
+        breakdown = start_trace()
+        for _ in range(2):
+            with stage("dense_search"):
+                pass
+        self.assertEqual(list(breakdown), ["dense_search"])
+        self.assertEqual(STAGE_DURATION.count(stage="dense_search"), before + 2)
+
+    def test_chat_debug_timings_and_metrics_endpoint(self):
+        """Test /api/chat tra ve timings khi bat debug, /metrics co histogram cac stage"""
+        app = FastAPI()
+        app.include_router(chat.router, prefix="/api")
+        app.include_router(health_router)
+        document = RetrievedDocument(id="1", score=1.0, text="Dự án biệt thự", metadata={})
+        for patcher in [
+            patch.object(chat, "get_answer_cache", return_value=None),
+            patch.object(chat, "get_bm25", return_value=object()),
+            patch.object(chat, "get_reranking_service", return_value=None),
+            patch.object(chat, "hybrid_retrieve_async", AsyncMock(return_value=[document])),
+            patch.object(chat, "generate_answer_async", AsyncMock(return_value="Câu trả lời")),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        client = TestClient(app)
+
+        with patch.object(chat, "METRICS_DEBUG", True):
+            body = client.post("/api/chat", json={"query": "dự án biệt thự"}).json()
+        self.assertEqual(set(body["timings"]), {"context_build", "llm"})
+        self.assertNotIn("timings", client.post("/api/chat", json={"query": "dự án biệt thự"}).json())
+
+        response = client.get("/metrics")
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn('rag_stage_duration_seconds_count{stage="llm"}', response.text)
+        self.assertEqual(response.text, render())
+
+if __name__ == '__main__':
+    unittest.main()
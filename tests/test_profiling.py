@@ -0,0 +1,98 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import core.profiling as profiling
+from api.profiling import router as profiling_router
+from core.profiling import CaptureStore, ProfilingMiddleware, SamplingProfiler
+from embedding.sparse_embedder import SparseEmbedder
+from evaluation.bench_bm25 import make_corpus
+from scoring.bm25 import BM25
+
+CORPUS = make_corpus(300, 40)
+
+def build_bm25(seconds: float = 0.3):
+    """Lap lai build BM25 index (tokenize + postings) trong `seconds` giay"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sparse_embedder = SparseEmbedder()
+        sparse_embedder.fit(CORPUS)
+        BM25(sparse_embedder).build_index(CORPUS, [str(i) for i in range(len(CORPUS))])
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def test_samples_executor_threads(self):
+        """Test lay mau ca code chay trong executor thread (khong chi thread goi start)"""
+        profiler = SamplingProfiler("/test", interval_ms=2).start()
+        with ThreadPoolExecutor(1, thread_name_prefix="bm25") as executor:
+            executor.submit(build_bm25).result()
+        capture = profiler.stop()
+
+        self.assertGreater(capture.samples, 10)
+        collapsed = capture.collapsed()
+        self.assertIn("BM25.build_index (scoring/bm25.py:", collapsed)
+        self.assertTrue(any(line.startswith("bm25_0;") for line in collapsed.splitlines()))
+        self.assertNotIn("profiler;", collapsed)
+        speedscope = capture.speedscope()
+        profile = speedscope["profiles"][0]
+        self.assertEqual(len(profile["samples"]), len(profile["weights"]))
+        self.assertTrue(all(index < len(speedscope["shared"]["frames"]) for sample in profile["samples"] for index in sample))
+
+class TestProfilingMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.store = CaptureStore()
+        app = FastAPI()
+
+        @app.post("/api/chat")
+        async def chat():
+            build_bm25(0.05)
+            return {"answer": "ok"}
+
+        @app.get("/health")
+        async def health():
+            return {"status": "healthy"}
+
+        app.include_router(profiling_router)
+        app.add_middleware(ProfilingMiddleware, sample_every=3, store=self.store)
+        for patcher in [patch("api.profiling.capture_store", self.store), patch.object(profiling, "ADMIN_TOKEN", "secret")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(app, headers={"X-Admin-Token": "secret"})
+
+    def test_profile_on_demand_and_download(self):
+        """Test header X-Profile profile 1 request, tai ve dang collapsed va speedscope"""
+        self.assertNotIn("x-profile-id", self.client.post("/api/chat").headers)
+        self.assertNotIn("x-profile-id", self.client.get("/health", headers={"X-Profile": "1"}).headers)
+
+        capture_id = self.client.post("/api/chat", headers={"X-Profile": "1"}).headers["x-profile-id"]
+        self.assertEqual([profile["id"] for profile in self.client.get("/admin/profiles").json()["profiles"]], [capture_id])
+
+        response = self.client.get(f"/admin/profiles/{capture_id}")
+        self.assertIn("attachment", response.headers["content-disposition"])
+        self.assertIn("build_index", response.text)
+        speedscope = self.client.get(f"/admin/profiles/{capture_id}", params={"format": "speedscope"}).json()
+        self.assertEqual(speedscope["profiles"][0]["type"], "sampled")
+        self.assertEqual(self.client.get("/admin/profiles/missing").status_code, 404)
+
+    def test_sample_one_in_n(self):
+        """Test sample_every=3: profile request thu 3, 6, ... toi /api/chat"""
+        profiled = ["x-profile-id" in self.client.post("/api/chat").headers for _ in range(6)]
+        self.assertEqual(profiled, [False, False, True, False, False, True])
+
+    def test_admin_token(self):
+        """Test X-Profile va /admin/profiles can dung X-Admin-Token, chua dat admin_token thi tu choi het"""
+        self.assertNotIn("x-profile-id", self.client.post("/api/chat", headers={"X-Profile": "1", "X-Admin-Token": "wrong"}).headers)
+        self.assertEqual(self.client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code, 403)
+        self.assertEqual(self.client.get("/admin/profiles").status_code, 200)
+
+        with patch.object(profiling, "ADMIN_TOKEN", None):
+            self.assertNotIn("x-profile-id", self.client.post("/api/chat", headers={"X-Profile": "1"}).headers)
+            self.assertEqual(self.client.get("/admin/profiles").status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SparseVector
+
+from embedding.sparse_embedder import SparseEmbedder
+from retrieval import hybrid_retriever
+from retrieval.query_router import route_types, type_filter
+from scoring.bm25 import BM25
+from vectorstore import qdrant
+from vectorstore.qdrant import COLLECTION_NAME, VECTOR_SIZE
+
+POINTS = [
+    ("project", "Dự án biệt thự hiện đại tại quận 2"),
+    ("project", "Dự án nhà phố 3 tầng chủ đầu tư anh Minh"),
+    ("interior_style", "Phong cách nội thất Japandi kết hợp Nhật Bản và Bắc Âu"),
+    ("news", "Tin tức: NMK khánh thành văn phòng mới"),
+    ("company_info", "Liên hệ công ty NMK qua hotline 0909 000 000"),
+]
+
+class TestQueryRouter(unittest.TestCase):
+
+    def test_route_types(self):
+        """Test doan intent theo tu khoa, khong phan biet dau, nhieu intent -> hop cac type"""
+        self.assertEqual(route_types("Cho tôi xem các dự án đã làm"), ["project", "project_category"])
+        self.assertEqual(route_types("cho toi xem cac du an da lam"), ["project", "project_category"])
+        self.assertEqual(route_types("Số điện thoại liên hệ?"), ["company_info"])
+        self.assertEqual(route_types("Tin tức mới nhất về phong cách Japandi"), ["interior_style", "architecture_type", "project", "news", "news_category"])
+        self.assertIsNone(route_types("Xin chào"))
+        self.assertIsNone(route_types("duan")) # chi match nguyen tu
+        self.assertIsNone(type_filter(None))
+        self.assertEqual(type_filter(["news"]).must[0].match.any, ["news"])
+
+    def test_payload_indexes_created_once(self):
+        """Test ensure_collection tao payload index cho cac key chua co index"""
+        client = Mock()
+        client.get_collections.return_value = SimpleNamespace(collections=[SimpleNamespace(name=COLLECTION_NAME)])
+        client.get_collection.return_value = SimpleNamespace(payload_schema={"type": object()})
+        with patch.object(qdrant, "PAYLOAD_INDEXES", {"type": "keyword", "priority": "integer"}):
+            qdrant.ensure_collection(client)
+        client.create_payload_index.assert_called_once()
+        self.assertEqual(client.create_payload_index.call_args.kwargs["field_name"], "priority")
+        self.assertEqual(client.create_payload_index.call_args.kwargs["field_schema"].value, "integer")
+
+class TestRoutedRetrieval(unittest.TestCase):
+
+    def setUp(self):
+        self.client = QdrantClient(":memory:")
+        qdrant.ensure_collection(self.client)
+        ids = [str(uuid.uuid4()) for _ in POINTS]
+        texts = [text for _, text in POINTS]
+        sparse_embedder = SparseEmbedder()
+        sparse_embedder.fit(texts)
+        self.client.upsert(COLLECTION_NAME, points=[
+            PointStruct(
+                id=point_id,
+                vector={"dense": [1.0] + [0.0] * (VECTOR_SIZE - 1), "sparse": SparseVector(**sparse_embedder.encode(text))},
+                payload={"text": text, "type": chunk_type, "chunk_type": "overview", "created_at": "2026-01-01", "content_hash": "x"},
+            )
+            for point_id, (chunk_type, text) in zip(ids, POINTS)
+        ])
+        self.bm25 = BM25(sparse_embedder)
+        self.bm25.build_index(texts, ids)
+
+        embedding_service = SimpleNamespace(embed_query_sync=lambda query: [1.0] + [0.0] * (VECTOR_SIZE - 1))
+        for patcher in [
+            patch.object(hybrid_retriever, "get_qdrant_client", return_value=self.client),
+            patch.object(hybrid_retriever, "get_embedding_service", return_value=embedding_service),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_routed_query_only_returns_matching_types(self):
+        """Test query co intent chi tra ve chunk dung type (ca keyword leg), payload chi gom field can render"""
+        documents = hybrid_retriever.hybrid_retrieve("Các dự án của NMK", self.bm25)
+        self.assertEqual({document.metadata["type"] for document in documents}, {"project"})
+        self.assertEqual(len(documents), 2)
+        self.assertNotIn("created_at", documents[0].metadata)
+        self.assertNotIn("content_hash", documents[0].metadata)
+
+        documents = hybrid_retriever.hybrid_retrieve("NMK", self.bm25) # khong co intent -> toan bo collection
+        self.assertEqual(len(documents), len(POINTS))
+
+    def test_falls_back_to_unfiltered_search(self):
+        """Test route khong co chunk nao (vd. chua ingest news_category) thi search lai toan bo collection"""
+        with patch.object(hybrid_retriever, "route_types", return_value=["architecture_type"]):
+            documents = hybrid_retriever.hybrid_retrieve("dự án", self.bm25)
+        self.assertEqual(len(documents), len(POINTS))
+
+    def test_server_side_fusion(self):
+        """Test fusion rrf / dbsf: 1 query_points prefetch dense + sparse, van ap dung route va fallback"""
+        for fusion in ("rrf", "dbsf"):
+            with patch.object(hybrid_retriever, "FUSION", fusion), \
+                    patch.object(hybrid_retriever, "is_sparse_search_ready", return_value=True):
+                documents = hybrid_retriever.hybrid_retrieve("phong cách Japandi", self.bm25)
+                self.assertEqual(documents[0].text, POINTS[2][1]) # dense bang nhau -> sparse quyet dinh thu tu
+                self.assertEqual(documents[0].metadata["fusion"], fusion)
+                self.assertNotIn("created_at", documents[0].metadata)
+
+                documents = hybrid_retriever.hybrid_retrieve("Các dự án của NMK", self.bm25)
+                self.assertEqual({document.metadata["type"] for document in documents}, {"project"})
+
+                with patch.object(hybrid_retriever, "route_types", return_value=["architecture_type"]):
+                    documents = hybrid_retriever.hybrid_retrieve("dự án", self.bm25)
+                self.assertEqual(len(documents), len(POINTS))
+
+        # sparse model chua khop collection -> blend trong Python nhu cu
+        with patch.object(hybrid_retriever, "FUSION", "rrf"), \
+                patch.object(hybrid_retriever, "is_sparse_search_ready", return_value=False):
+            documents = hybrid_retriever.hybrid_retrieve("phong cách Japandi", self.bm25)
+        self.assertNotIn("fusion", documents[0].metadata)
+
+if __name__ == '__main__':
+    unittest.main()
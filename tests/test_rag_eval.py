@@ -0,0 +1,34 @@
+import unittest
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from evaluation.rag_eval import ranking_metrics, resolve_labels
+
+class TestRagEval(unittest.TestCase):
+
+    def test_ranking_metrics(self):
+        """Test recall@k, nDCG@k (relevance nhi phan) va reciprocal rank"""
+        metrics = ranking_metrics(["a", "b", "c", "d"], {"b", "d", "x"}, [1, 3])
+        self.assertEqual(metrics["recall@1"], 0.0)
+        self.assertAlmostEqual(metrics["recall@3"], 1 / 3)
+        self.assertEqual(metrics["mrr"], 0.5)
+        self.assertAlmostEqual(metrics["ndcg@3"], (1 / 1.5849625) / (1 + 1 / 1.5849625 + 0.5), places=5)
+        self.assertEqual(ranking_metrics(["a"], {"a"}, [1]), {"recall@1": 1.0, "ndcg@1": 1.0, "mrr": 1.0})
+        self.assertEqual(ranking_metrics([], set(), [1])["mrr"], 0.0)
+
+    def test_resolve_slug_labels(self):
+        """Test nhan la slug duoc doi ra tat ca chunk cua slug do, nhan la point id giu nguyen"""
+        client = QdrantClient(":memory:")
+        client.create_collection("eval", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+        ids = ["00000000-0000-0000-0000-00000000000" + str(i) for i in range(3)]
+        client.upsert("eval", points=[
+            PointStruct(id=ids[0], vector=[1.0, 0.0], payload={"project_slug": "biet-thu-q2"}),
+            PointStruct(id=ids[1], vector=[1.0, 0.0], payload={"project_slug": "biet-thu-q2"}),
+            PointStruct(id=ids[2], vector=[1.0, 0.0], payload={"news_item_slug": "khanh-thanh"}),
+        ])
+        labels = resolve_labels(client, [{"relevant": ["biet-thu-q2"]}, {"relevant": [ids[2], "khanh-thanh"]}, {"relevant": []}], "eval")
+        self.assertEqual(labels, [{ids[0], ids[1]}, {ids[2]}, set()])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import threading
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.rate_limit import InMemoryRateLimiter, RateLimiter, RateLimitMiddleware, RedisRateLimiter, SQLiteRateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 6000.0 # dau 1 window 60s
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakePipeline:
+    """Gom lenh, chi ap dung khi execute (giong MULTI/EXEC)"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    def incr(self, key):
+        self.commands.append(("incr", key))
+
+    def expire(self, key, seconds):
+        self.commands.append(("expire", key, seconds))
+
+    def execute(self):
+        for name, key, *args in self.commands:
+            if name == "incr":
+                self.redis.values[key] = self.redis.values.get(key, 0) + 1
+            else:
+                self.redis.ttls[key] = args[0]
+        self.redis.executed += 1
+
+class FakeRedis:
+    """mget + pipeline incr / expire cua redis-py tren dict (khong het han that)"""
+
+    def __init__(self):
+        self.values: dict[str, int] = {}
+        self.ttls: dict[str, int] = {}
+        self.executed = 0
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        assert transaction
+        return FakePipeline(self)
+
+class TestRateLimiters(unittest.TestCase):
+
+    def limiters(self, clock):
+        sqlite_limiter = SQLiteRateLimiter(":memory:", clock=clock, limit=10, window_seconds=60)
+        self.addCleanup(sqlite_limiter.close)
+        return [
+            InMemoryRateLimiter(clock=clock, limit=10, window_seconds=60),
+            sqlite_limiter,
+            RedisRateLimiter(FakeRedis(), clock=clock, limit=10, window_seconds=60),
+        ]
+
+    def test_sliding_window(self):
+        """Test gioi han trong 1 window, window truoc duoc tinh theo ty le con nam trong cua so truot"""
+        clock = FakeClock()
+        for limiter in self.limiters(clock):
+            with self.subTest(limiter=type(limiter).__name__):
+                clock.now = 6000.0
+                self.assertTrue(all(limiter.hit("1.1.1.1").allowed for _ in range(10)))
+                rejected = limiter.hit("1.1.1.1")
+                self.assertFalse(rejected.allowed)
+                self.assertAlmostEqual(rejected.retry_after, 60)
+                self.assertTrue(limiter.hit("2.2.2.2").allowed) # moi IP dem rieng
+
+                clock.now = 6090.0 # giua window sau: window truoc con tinh 10 * 0.5 = 5
+                self.assertEqual(sum(limiter.hit("1.1.1.1").allowed for _ in range(10)), 5)
+
+                clock.now = 6300.0 # qua 2 window: dem lai tu dau
+                self.assertEqual(sum(limiter.hit("1.1.1.1").allowed for _ in range(12)), 10)
+
+    def test_incomplete_backend_fails_at_creation(self):
+        """Test backend khong cai dat hit() bao loi ngay khi tao, khong doi toi request dau tien"""
+        class NoHit(RateLimiter):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoHit()
+
+    def test_memory_evicts_idle_keys(self):
+        """Test backend memory xoa IP idle > 2 window va khong giu qua max_keys IP"""
+        clock = FakeClock()
+        limiter = InMemoryRateLimiter(max_keys=100, clock=clock, limit=10, window_seconds=60)
+        for i in range(50):
+            limiter.hit(f"10.0.0.{i}")
+        clock.now += 121
+        limiter.hit("10.0.1.0")
+        self.assertEqual(len(limiter), 1)
+
+        for i in range(500):
+            limiter.hit(f"10.1.{i // 256}.{i % 256}")
+        self.assertEqual(len(limiter), 100)
+
+    def test_redis_counter_and_ttl_in_one_pipeline(self):
+        """Test backend redis: INCR va EXPIRE gui trong 1 pipeline, moi counter deu co TTL 2 window"""
+        clock = FakeClock()
+        client = FakeRedis()
+        limiter = RedisRateLimiter(client, prefix="rl:", clock=clock, limit=2, window_seconds=60)
+        self.assertEqual([limiter.hit("1.1.1.1").allowed for _ in range(3)], [True, True, False])
+        self.assertEqual(client.executed, 2) # request bi tu choi khong ghi
+        self.assertEqual(client.values, {"rl:1.1.1.1:100": 2})
+        self.assertEqual(client.ttls, {"rl:1.1.1.1:100": 120})
+
+class TestRateLimitMiddleware(unittest.TestCase):
+
+    def test_rejects_before_route(self):
+        """Test request vuot gioi han nhan 429 + Retry-After, route khong bi goi; path khac khong bi gioi han"""
+        calls = []
+        app = FastAPI()
+
+        @app.post("/api/chat")
+        async def chat():
+            calls.append(1)
+            return {"answer": "ok"}
+
+        @app.get("/health")
+        async def health():
+            return {"status": "healthy"}
+
+        app.add_middleware(RateLimitMiddleware, limiter=InMemoryRateLimiter(limit=2, window_seconds=60), paths=("/api/chat",))
+        client = TestClient(app)
+
+        statuses = [client.post("/api/chat", json={}).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(len(calls), 2)
+        response = client.post("/api/chat", content=b"not json")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers["retry-after"]), 1)
+        self.assertIn("Tốc độ request quá nhanh", response.json()["detail"])
+        self.assertEqual(client.get("/health").status_code, 200)
+
+    def test_blocking_backend_runs_off_event_loop(self):
+        """Test backend sqlite / redis duoc goi trong executor, backend memory goi thang tren thread cua event loop"""
+        threads = {}
+
+        class RecordingLimiter(SQLiteRateLimiter):
+            def hit(self, key):
+                threads["hit"] = threading.current_thread().name
+                return super().hit(key)
+
+        app = FastAPI()
+
+        @app.post("/api/chat")
+        async def chat():
+            threads["loop"] = threading.current_thread().name
+            return {"answer": "ok"}
+
+        limiter = RecordingLimiter(":memory:", limit=1, window_seconds=60)
+        self.addCleanup(limiter.close)
+        app.add_middleware(RateLimitMiddleware, limiter=limiter, paths=("/api/chat",))
+        client = TestClient(app)
+
+        self.assertEqual([client.post("/api/chat").status_code for _ in range(2)], [200, 429])
+        self.assertTrue(threads["hit"].startswith("rate_limit-worker"))
+        self.assertNotEqual(threads["hit"], threads["loop"])
+        self.assertFalse(InMemoryRateLimiter.blocking)
+
+if __name__ == '__main__':
+    unittest.main()
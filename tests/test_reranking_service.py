@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from core.schema import RetrievedDocument
+from reranking.service import RerankingService
+
+def documents(*ids: str) -> list[RetrievedDocument]:
+    return [RetrievedDocument(id=doc_id, score=0.0, text=f"văn bản {doc_id}", metadata={}) for doc_id in ids]
+
+class TestRerankingService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.calls = []
+        def score_batch(pairs):
+            self.calls.append(list(pairs))
+            return [float(len(text)) + (1.0 if "quan trọng" in text else 0.0) for _, text in pairs]
+        self.service = RerankingService(SimpleNamespace(score_batch=score_batch), cache_size=100, max_batch_wait_ms=20)
+
+    async def test_rerank_sorts_and_cuts_top_k(self):
+        """Test sap xep theo rerank_score va cat top_k"""
+        docs = documents("a", "bbb", "cc")
+        docs[0].text = "văn bản quan trọng"
+        reranked = await self.service.rerank("câu hỏi", docs, top_k=2)
+        self.assertEqual([doc.id for doc in reranked], ["a", "bbb"])
+        self.assertIn("rerank_score", reranked[0].metadata)
+
+    async def test_overlapping_candidates_use_score_cache(self):
+        """Test chunk da duoc score voi cung query thi khong predict lai"""
+        await self.service.rerank("Phong cách Japandi?", documents("1", "2", "3"))
+        await self.service.rerank("phong cách japandi", documents("2", "3", "4"))
+        self.assertEqual([len(call) for call in self.calls], [3, 1])
+        stats = self.service.stats()
+        self.assertEqual((stats["pairs_total"], stats["pairs_scored"], stats["pairs_cached"]), (6, 4, 2))
+
+    async def test_concurrent_requests_share_one_predict(self):
+        """Test cap (query, document) cua cac request dong thoi duoc gom vao 1 lan predict"""
+        await asyncio.gather(
+            self.service.rerank("câu hỏi 1", documents("1", "2")),
+            self.service.rerank("câu hỏi 2", documents("1", "3")),
+        )
+        self.assertEqual([len(call) for call in self.calls], [4])
+
+    async def test_identical_concurrent_requests_score_once(self):
+        """Test 2 request giong nhau den cung luc chi predict moi cap 1 lan"""
+        first, second = await asyncio.gather(
+            self.service.rerank("câu hỏi", documents("1", "2")),
+            self.service.rerank("câu hỏi", documents("1", "2")),
+        )
+        self.assertEqual(sum(len(call) for call in self.calls), 2)
+        self.assertEqual([doc.id for doc in first], [doc.id for doc in second])
+        self.assertEqual(self.service.stats()["pairs_scored"], 2)
+
+    def test_rerank_sync_shares_cache(self):
+        """Test rerank_sync (CLI) dung chung score cache"""
+        self.service.rerank_sync("câu hỏi", documents("1", "2"))
+        self.service.rerank_sync("câu hỏi", documents("1", "2"))
+        self.assertEqual(len(self.calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from cache.lru import LRUCache
+from cache.semantic_cache import SemanticAnswerCache, mark_index_updated, normalize_query
+
+def unit(*values) -> list[float]:
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        """Test entry it dung nhat bi day ra khi vuot max_entries"""
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_ttl_and_memory_bound(self):
+        """Test entry het han theo TTL va tong kich thuoc khong vuot max_bytes"""
+        now = [0.0]
+        cache = LRUCache(max_entries=10, max_bytes=10, ttl_seconds=5, size_of=len, clock=lambda: now[0])
+        cache.set("a", "xxxxxx")
+        cache.set("b", "yyyyyy")
+        self.assertIsNone(cache.get("a"))
+        self.assertLessEqual(cache.total_bytes, 10)
+        now[0] = 6.0
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 0)
+
+class TestSemanticAnswerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.version_file = os.path.join(self.directory.name, "index_version")
+        self.cache = SemanticAnswerCache(max_entries=3, similarity_threshold=0.9, version_file=self.version_file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_exact_match_after_normalization(self):
+        """Test cau hoi chi khac hoa/thuong, khoang trang, dau cau van hit exact"""
+        self.cache.put("NMK có những phong cách nội thất nào?", None, "Hiện đại, Japandi", [])
+        cached = self.cache.get_exact("  nmk có những   phong cách nội thất nào ")
+        self.assertEqual(cached.answer, "Hiện đại, Japandi")
+        self.assertEqual(normalize_query("Xin chào!!"), "xin chào")
+        self.assertEqual(self.cache.stats()["exact_hits"], 1)
+
+    def test_semantic_match_uses_threshold(self):
+        """Test semantic hit khi cosine >= threshold, miss khi thap hon"""
+        self.cache.put("phong cách nội thất", unit(1, 0, 0), "answer", [{"text": "doc"}])
+        hit = self.cache.get_similar("các phong cách nội thất", unit(1, 0.1, 0))
+        self.assertEqual(hit.sources, [{"text": "doc"}])
+        self.assertIsNone(self.cache.get_similar("địa chỉ công ty", unit(0, 1, 0)))
+        stats = self.cache.stats()
+        self.assertEqual((stats["semantic_hits"], stats["misses"]), (1, 1))
+
+    def test_semantic_match_requires_same_numbers(self):
+        """Test 'quan 7' va 'quan 2' khong dung chung cau tra loi du embedding gan nhau"""
+        self.cache.put("dự án quận 7", unit(1, 0, 0), "quận 7", [])
+        self.assertIsNone(self.cache.get_similar("dự án quận 2", unit(1, 0, 0)))
+        self.assertIsNotNone(self.cache.get_similar("các dự án ở quận 7", unit(1, 0, 0)))
+
+    def test_evicted_entries_free_embedding_slots(self):
+        """Test entry bi LRU day ra khong con semantic match"""
+        for i in range(5):
+            vector = [0.0] * 5
+            vector[i] = 1.0
+            self.cache.put(f"câu hỏi {chr(97 + i)}", vector, f"answer {i}", [])
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNone(self.cache.get_similar("câu hỏi a", [1.0, 0, 0, 0, 0]))
+        self.assertEqual(self.cache.get_similar("câu hỏi e", [0, 0, 0, 0, 1.0]).answer, "answer 4")
+
+    def test_invalidated_when_index_is_updated(self):
+        """Test ingestion ghi version file thi cache bi xoa"""
+        self.cache.put("hotline", unit(1, 0), "0123", [])
+        time.sleep(0.01)
+        mark_index_updated(self.version_file)
+        self.assertIsNone(self.cache.get_exact("hotline"))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import signal
+import time
+import unittest
+
+import httpx
+from fastapi import FastAPI
+
+from api.server import bind_socket, run_workers
+
+PRELOADED = {"value": None}
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/pid")
+    async def pid():
+        return {"pid": os.getpid(), "preloaded": PRELOADED["value"]}
+
+    return app
+
+def worker_pids(supervisor: int) -> list[int]:
+    with open(f"/proc/{supervisor}/task/{supervisor}/children") as file:
+        return sorted(int(pid) for pid in file.read().split())
+
+@unittest.skipUnless(hasattr(os, "fork") and os.path.exists("/proc/self/task"), "can fork + /proc")
+class TestPreforkServer(unittest.TestCase):
+
+    def kill(self, supervisor: int):
+        try:
+            os.kill(supervisor, signal.SIGTERM)
+            os.waitpid(supervisor, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+
+    def wait_for(self, condition, timeout: float = 20):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                result = condition()
+                if result:
+                    return result
+            except (httpx.HTTPError, OSError):
+                pass
+            time.sleep(0.1)
+        self.fail("timeout")
+
+    def test_workers_share_preload_and_restart(self):
+        """Test worker fork tu process da preload, worker chet duoc fork lai, SIGTERM dung ca server"""
+        sock = bind_socket("127.0.0.1", 0)
+        port = sock.getsockname()[1]
+        supervisor = os.fork()
+        if supervisor == 0:
+            try:
+                PRELOADED["value"] = os.getpid() # "model" load truoc khi fork
+                run_workers(create_app(), sock, workers=2)
+            finally:
+                os._exit(0)
+        sock.close()
+        self.addCleanup(self.kill, supervisor)
+
+        first = self.wait_for(lambda: len(worker_pids(supervisor)) == 2 and worker_pids(supervisor))
+        response = self.wait_for(lambda: httpx.get(f"http://127.0.0.1:{port}/pid", timeout=5).json())
+        self.assertIn(response["pid"], first)
+        self.assertEqual(response["preloaded"], supervisor)
+
+        os.kill(first[0], signal.SIGKILL)
+        restarted = self.wait_for(lambda: (pids := worker_pids(supervisor)) and len(pids) == 2 and first[0] not in pids and pids)
+        self.assertIn(first[1], restarted)
+
+        os.kill(supervisor, signal.SIGTERM)
+        _, status = os.waitpid(supervisor, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        for pid in restarted: # supervisor cho tat ca worker thoat truoc khi thoat
+            self.assertFalse(os.path.exists(f"/proc/{pid}"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.routes.chat as chat
+from cache.semantic_cache import CachedAnswer
+from cache.session_store import InMemorySessionStore, SessionStore, RedisSessionStore, SQLiteSessionStore, Turn
+from core.schema import RetrievedDocument
+from llm.generator import build_chat_request
+from llm.prompt import format_history
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeRedis:
+    """Cac lenh list + expire cua redis-py tren dict, du de test RedisSessionStore"""
+
+    def __init__(self):
+        self.lists: dict[str, list[bytes]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value.encode("utf-8"))
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lrange(key, start, end)
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+
+def make_turn(i: int, answer_size: int = 10) -> Turn:
+    return Turn(question=f"câu hỏi {i}", answer="a" * answer_size)
+
+class TestSessionStores(unittest.TestCase):
+
+    def stores(self):
+        sqlite_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(sqlite_dir.cleanup)
+        sqlite_store = SQLiteSessionStore(os.path.join(sqlite_dir.name, "sessions.sqlite3"), max_turns=3, max_bytes=500, ttl_seconds=60)
+        self.addCleanup(sqlite_store.close)
+        return [
+            InMemorySessionStore(max_turns=3, max_bytes=500, ttl_seconds=60),
+            sqlite_store,
+            RedisSessionStore(FakeRedis(), max_turns=3, max_bytes=500, ttl_seconds=60),
+        ]
+
+    def test_max_turns_and_bytes(self):
+        """Test moi backend chi giu max_turns luot moi nhat va bo luot cu khi vuot max_bytes"""
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                for i in range(5):
+                    store.append("s1", make_turn(i))
+                self.assertEqual([turn.question for turn in store.history("s1")], ["câu hỏi 2", "câu hỏi 3", "câu hỏi 4"])
+                self.assertEqual([turn.question for turn in store.history("s1", 2)], ["câu hỏi 3", "câu hỏi 4"])
+                self.assertEqual(store.history("s1", 0), [])
+
+                store.append("s1", make_turn(5, answer_size=300)) # ~370 byte: chi con cho 1 luot nua
+                self.assertEqual([turn.question for turn in store.history("s1")], ["câu hỏi 4", "câu hỏi 5"])
+                self.assertEqual(store.history("other"), [])
+
+                store.delete("s1")
+                self.assertEqual(store.history("s1"), [])
+
+    def test_incomplete_backend_fails_at_creation(self):
+        """Test backend thieu method cua SessionStore bao loi ngay khi tao, khong doi toi request dau tien"""
+        class NoDelete(SessionStore):
+            def append(self, session_id, turn):
+                pass
+
+            def history(self, session_id, max_turns=None):
+                return []
+
+        with self.assertRaises(TypeError):
+            NoDelete()
+
+    def test_memory_store_lru_and_ttl(self):
+        """Test backend memory: day session it dung nhat khi vuot max_sessions, session het han sau ttl"""
+        clock = FakeClock()
+        store = InMemorySessionStore(max_sessions=2, ttl_seconds=60, clock=clock)
+        for session_id in ("a", "b", "c"):
+            store.append(session_id, make_turn(0))
+        self.assertEqual(store.history("a"), [])
+        self.assertEqual(len(store.history("c")), 1)
+
+        clock.now += 61
+        self.assertEqual(store.history("c"), [])
+
+    def test_sqlite_store_ttl_cleanup(self):
+        """Test backend sqlite: session het han bi bo qua khi doc va bi xoa khi cleanup"""
+        clock = FakeClock()
+        store = SQLiteSessionStore(":memory:", cleanup_interval=0, clock=clock, ttl_seconds=60)
+        self.addCleanup(store.close)
+        store.append("old", make_turn(0))
+        clock.now += 61
+        self.assertEqual(store.history("old"), [])
+
+        store.append("new", make_turn(1))
+        self.assertEqual(store.stats()["entries"], 1)
+        self.assertEqual(len(store.history("new")), 1)
+
+    def test_turn_keeps_only_source_names(self):
+        """Test Turn chi luu ten nguon (khong trung), khong luu text / score cua sources"""
+        sources = [
+            {"text": "x" * 200, "metadata": {"project_name": "Villa A", "type": "project"}, "score": 0.9},
+            {"text": "y" * 200, "metadata": {"project_name": "Villa A"}, "score": 0.8},
+            {"text": "z", "metadata": {"news_item_title": "Tin B"}, "score": 0.1},
+        ]
+        turn = Turn.from_response("hỏi", "đáp", sources)
+        self.assertEqual(turn.sources, ["Villa A", "Tin B"])
+        self.assertEqual(Turn.from_json(turn.to_json()), turn)
+
+class TestConversationHistory(unittest.TestCase):
+
+    def test_history_in_prompt_is_bounded(self):
+        """Test lich su trong prompt: cat tung cau tra loi va gioi han tong do dai (bo luot cu nhat)"""
+        history = [make_turn(i, answer_size=1000) for i in range(10)]
+        text = format_history(history, max_chars=700, answer_chars=100)
+        self.assertLessEqual(len(text), 700)
+        self.assertIn("câu hỏi 9", text)
+        self.assertNotIn("câu hỏi 0", text)
+        self.assertNotIn("a" * 101, text)
+
+        prompt = build_chat_request("context", "còn dự án nào khác?", history)["messages"][0]["content"]
+        self.assertIn("LỊCH SỬ HỘI THOẠI", prompt)
+        self.assertNotIn("LỊCH SỬ HỘI THOẠI", build_chat_request("context", "câu hỏi")["messages"][0]["content"])
+
+    def test_chat_uses_session_history(self):
+        """Test /api/chat luu luot vao session store va dua lich su vao generator o luot sau"""
+        app = FastAPI()
+        app.include_router(chat.router, prefix="/api")
+        store = InMemorySessionStore()
+        generate = AsyncMock(return_value="Câu trả lời")
+        document = RetrievedDocument(id="1", score=1.0, text="Dự án biệt thự", metadata={"project_name": "Villa A"})
+        for patcher in [
+            patch.object(chat, "get_session_store", return_value=store),
+            patch.object(chat, "get_answer_cache", return_value=None),
+            patch.object(chat, "get_bm25", return_value=object()),
+            patch.object(chat, "get_reranking_service", return_value=None),
+            patch.object(chat, "hybrid_retrieve_async", AsyncMock(return_value=[document])),
+            patch.object(chat, "generate_answer_async", generate),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        client = TestClient(app)
+
+        session_id = client.post("/api/chat", json={"query": "dự án biệt thự"}).json()["session_id"]
+        self.assertEqual(generate.call_args.args[2], [])
+        client.post("/api/chat", json={"query": "còn dự án nào khác?", "session_id": session_id})
+
+        history = generate.call_args.args[2]
+        self.assertEqual([(turn.question, turn.sources) for turn in history], [("dự án biệt thự", ["Villa A"])])
+        self.assertEqual(len(store.history(session_id)), 2)
+
+    def test_session_with_history_skips_answer_cache(self):
+        """Test session co lich su khong nhan cau tra loi da cache (cache khong co lich su), van retrieve + generate"""
+        app = FastAPI()
+        app.include_router(chat.router, prefix="/api")
+        store = InMemorySessionStore()
+        store.append("s1", make_turn(0))
+        cache = MagicMock()
+        cache.get_exact.return_value = CachedAnswer(answer="Câu trả lời cũ", sources=[])
+        generate = AsyncMock(return_value="Câu trả lời mới")
+        document = RetrievedDocument(id="1", score=1.0, text="Dự án biệt thự", metadata={"project_name": "Villa A"})
+
+        async def stream_answer(context, question, history):
+            yield "Câu trả lời mới"
+
+        for patcher in [
+            patch.object(chat, "get_session_store", return_value=store),
+            patch.object(chat, "get_answer_cache", return_value=cache),
+            patch.object(chat, "stream_answer", stream_answer),
+            patch.object(chat, "get_bm25", return_value=object()),
+            patch.object(chat, "get_reranking_service", return_value=None),
+            patch.object(chat, "hybrid_retrieve_async", AsyncMock(return_value=[document])),
+            patch.object(chat, "generate_answer_async", generate),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        client = TestClient(app)
+
+        response = client.post("/api/chat", json={"query": "còn dự án nào khác?", "session_id": "s1"})
+        self.assertEqual(response.json()["answer"], "Câu trả lời mới")
+        stream = client.post("/api/chat/stream", json={"query": "còn dự án nào khác?", "session_id": "s1"}).text
+        self.assertNotIn("Câu trả lời cũ", stream)
+        self.assertNotIn('"cached": true', stream)
+        cache.get_exact.assert_not_called()
+        cache.put.assert_not_called()
+
+        self.assertEqual(client.post("/api/chat", json={"query": "câu hỏi mới"}).json()["answer"], "Câu trả lời cũ")
+
+class TestSessionStoreOffEventLoop(unittest.TestCase):
+
+    def test_blocked_session_write_does_not_block_loop(self):
+        """Test backend sqlite / redis chay trong executor: event loop van chay trong luc ghi session bi block"""
+        started, release = threading.Event(), threading.Event()
+        threads = {}
+
+        class SlowStore(SQLiteSessionStore):
+            def append(self, session_id, turn):
+                threads["append"] = threading.current_thread().name
+                started.set()
+                release.wait(2) # nhu BEGIN IMMEDIATE cho khoa cua worker khac
+                super().append(session_id, turn)
+
+        store = SlowStore(":memory:")
+        self.addCleanup(store.close)
+
+        async def main():
+            task = asyncio.create_task(chat.save_turn("s1", "hỏi", "đáp", []))
+            await asyncio.to_thread(started.wait, 2)
+            start = time.perf_counter()
+            for _ in range(5):
+                await asyncio.sleep(0.01) # loop van xu ly duoc request khac
+            elapsed = time.perf_counter() - start
+            self.assertFalse(task.done())
+            release.set()
+            await task
+            return elapsed, threading.current_thread().name
+
+        with patch.object(chat, "get_session_store", return_value=store):
+            elapsed, loop_thread = asyncio.run(main())
+        self.assertLess(elapsed, 1)
+        self.assertTrue(threads["append"].startswith("sessions-worker"))
+        self.assertNotEqual(threads["append"], loop_thread)
+        self.assertEqual(len(store.history("s1")), 1)
+        self.assertFalse(InMemorySessionStore.blocking)
+
+if __name__ == '__main__':
+    unittest.main()
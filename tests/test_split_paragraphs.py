@@ -0,0 +1,65 @@
+import time
+import unittest
+
+from ingestion.helpers.split_paragraphs import RegexTokenizer, TokenChunker
+
+TEXT = (
+    "Công ty NMK thiết kế biệt thự hiện đại tại Hà Nội. Dự án hoàn thành năm 2024! "
+    "Bạn có muốn xem thêm không? Phong cách Japandi kết hợp Nhật Bản và Bắc Âu… "
+    "Vật liệu gỗ tự nhiên\nKhông gian mở, nhiều ánh sáng. "
+    + " ".join(f"từ{i}" for i in range(120)) + ". Kết thúc dự án."
+)
+
+def word_level_tokenizer(text: str):
+    from evaluation.random_models import _tokenizer
+    return _tokenizer(text.split())[0]
+
+class TestTokenChunker(unittest.TestCase):
+
+    def assert_valid_chunks(self, chunker: TokenChunker, text: str, prefix: str = ""):
+        chunks = chunker.split(text, prefix)
+        words = text.split()
+        position = 0
+        for chunk in chunks:
+            self.assertLessEqual(chunker.count_tokens(prefix + chunk), chunker.chunk_size, chunk)
+            chunk_words = chunk.split()
+            # chunk la 1 doan lien tuc cua text, bat dau trong phan overlap cua chunk truoc
+            start = next(index for index in range(max(0, position - len(chunk_words)), len(words)) if words[index:index + len(chunk_words)] == chunk_words)
+            self.assertLessEqual(start, position)
+            position = start + len(chunk_words)
+        self.assertEqual(position, len(words)) # phu het text
+        return chunks
+
+    def test_chunks_respect_size_overlap_and_sentences(self):
+        """Test chunk + prefix khong vuot chunk_size token, cat o ranh gioi cau (. ! ? … xuong dong), cau dai cat theo token"""
+        chunker = TokenChunker(RegexTokenizer(), chunk_size=30, chunk_overlap=8)
+        chunks = self.assert_valid_chunks(chunker, TEXT, prefix="Mô tả dự án NMK: ")
+        self.assertEqual(chunks[0], "Công ty NMK thiết kế biệt thự hiện đại tại Hà Nội. Dự án hoàn thành năm 2024!")
+        self.assertEqual(chunks[1], "Dự án hoàn thành năm 2024! Bạn có muốn xem thêm không?") # overlap theo cau
+        self.assertIn("Vật liệu gỗ tự nhiên\nKhông gian mở, nhiều ánh sáng.", chunks)
+        # cau 120 tu bi cat cung, chunk sau lap lai toi da chunk_overlap token cua chunk truoc
+        long_chunks = [chunk for chunk in chunks if chunk.startswith("từ")]
+        self.assertGreater(len(long_chunks), 1)
+        overlap = set(long_chunks[0].split()) & set(long_chunks[1].split())
+        self.assertTrue(0 < len(overlap) <= 8)
+
+    def test_model_tokenizer_and_max_length(self):
+        """Test dem token bang tokenizer cua model, chunk_size bi gioi han boi model_max_length tru special token"""
+        tokenizer = word_level_tokenizer(TEXT)
+        tokenizer.model_max_length = 24
+        chunker = TokenChunker(tokenizer, chunk_size=512, chunk_overlap=5)
+        self.assertEqual(chunker.chunk_size, 22) # [CLS] ... [SEP]
+        self.assert_valid_chunks(chunker, TEXT, prefix="Nội dung tin tức: ")
+        self.assertEqual(chunker.split(""), [])
+
+    def test_linear_time_on_text_without_sentence_boundaries(self):
+        """Test text rat dai khong co dau cau van chia nhanh (khong cat chuoi lap lai)"""
+        chunker = TokenChunker(RegexTokenizer(), chunk_size=64, chunk_overlap=8)
+        text = "từ " * 200_000
+        start = time.perf_counter()
+        chunks = chunker.split(text)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(len(chunks), -(-(200_000 - 8) // 56))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import logging
 import uuid
 
-from qdrant_client.models import PointStruct, SparseVector
+from qdrant_client.models import PointStruct, PointVectors, SparseVector
 from embedding.embedder import embed_texts
 from embedding.sparse_embedder import SparseEmbedder
 
@@ -44,10 +44,44 @@ def build_hybrid_qdrant_points(chunks: list[dict]) -> list[dict]:
             },
             payload={
                 "text": chunk["text"], 
-                **chunk.get("metadata", {})
+                **chunk.get("metadata", {}),
+                "sparse_model_version": _sparse_embedder.version, # vocabulary da dung de encode sparse vector
             }
         )
         points.append(point)
         
     logger.info(f"Built {len(points)} hybrid Qdrant points.")
+    return points
+
+def build_sparse_point_vectors(chunks: list[dict]) -> list[PointVectors]:
+    """Chi encode lai sparse vector (khong embed dense) cho cac point da co trong collection khi sparse model thay doi"""
+    if _sparse_embedder is None:
+        raise RuntimeError("Sparse embedder not initialized. Call init_sparse_embedder first.")
+    
+    return [
+        PointVectors(
+            id=chunk["metadata"]["chunk_id"],
+            vector={"sparse": SparseVector(indices=sparse_vector["indices"], values=sparse_vector["values"])},
+        )
+        for chunk, sparse_vector in zip(chunks, _sparse_embedder.encode_batch([chunk["text"] for chunk in chunks]))
+    ]
+
+def build_dense_qdrant_points(chunks: list[dict]) -> list[PointStruct]:
+    """
+    Point chi co dense vector (ingestion streaming: sparse vector duoc ghi sau khi fit sparse model tren ca corpus,
+    xem build_sparse_point_vectors).
+    """
+    if not chunks:
+        return []
+    
+    dense_embeddings = embed_texts([chunk["text"] for chunk in chunks])
+    points = [
+        PointStruct(
+            id=chunk["metadata"]["chunk_id"],
+            vector={"dense": dense_vector.tolist() if hasattr(dense_vector, 'tolist') else dense_vector},
+            payload={"text": chunk["text"], **chunk.get("metadata", {})},
+        )
+        for chunk, dense_vector in zip(chunks, dense_embeddings)
+    ]
+    logger.info(f"Built {len(points)} dense Qdrant points.")
     return points
\ No newline at end of file
@@ -1,5 +1,5 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, SparseVectorParams, SparseIndexParams
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import VectorParams, Distance, SparseVectorParams, SparseIndexParams, PayloadSchemaType
 import logging 
 import os
 
@@ -13,8 +13,10 @@ COLLECTION_NAME = QDRANT_CONFIG["collection_name"] # khong dung .get vi day la b
 VECTOR_SIZE = QDRANT_CONFIG["vector_size"] # khong dung .get vi day la bat buoc phai co
 DISTANCE = QDRANT_CONFIG.get("distance", "cosine") # mac dinh la cosine, co the la "dot" hoac "euclid"
 TIMEOUT = QDRANT_CONFIG.get("timeout", 30) # Default 30 seconds
+PAYLOAD_INDEXES = QDRANT_CONFIG.get("payload_indexes", {}) # field -> keyword | integer | float | bool | ...
 
 _client: QdrantClient | None = None
+_async_client: AsyncQdrantClient | None = None
 
 def get_qdrant_client() -> QdrantClient: # them -> QdrantClient de tra ve
     global _client
@@ -49,11 +51,46 @@ def get_qdrant_client() -> QdrantClient: # them -> QdrantClient de tra ve
         logger.error(f"Failed to connect to Qdrant: {e}")
         raise ConnectionError(f"Cannot connect to Qdrant database: {e}")
 
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """Async client dung tren request path cua API, khong chan event loop khi cho Qdrant"""
+    global _async_client
+    if _async_client is not None:
+        return _async_client
+    
+    # Khong test connection o day vi day la ham sync, loi ket noi se duoc bao o request dau tien
+    if QDRANT_CONFIG.get("url"):
+        _async_client = AsyncQdrantClient(
+            url=QDRANT_CONFIG["url"],
+            api_key=QDRANT_CONFIG.get("api_key"),
+            timeout=TIMEOUT
+        )
+    else:
+        _async_client = AsyncQdrantClient(
+            host=QDRANT_CONFIG.get("host"),
+            port=QDRANT_CONFIG.get("port"),
+            api_key=QDRANT_CONFIG.get("api_key"),
+            timeout=TIMEOUT
+        )
+    return _async_client
+
+def close_qdrant_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+async def close_async_qdrant_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
 def ensure_collection(client: QdrantClient): # truyen vao client de tao collection
     existing_collection = [collection.name for collection in client.get_collections().collections]
     
     if COLLECTION_NAME in existing_collection:
         logger.info(f"Collection '{COLLECTION_NAME}' already exists.")
+        ensure_payload_indexes(client)
         return
     
     logger.info(f"Creating collection '{COLLECTION_NAME}' with hybrid vectors (dense + sparse)...")
@@ -72,4 +109,18 @@ def ensure_collection(client: QdrantClient): # truyen vao client de tao collecti
         }
     )
     logger.info(f"Collection '{COLLECTION_NAME}' created with dense vector size {VECTOR_SIZE}, distance '{DISTANCE}', and sparse vectors.")
+    ensure_payload_indexes(client)
+
+def ensure_payload_indexes(client: QdrantClient):
+    """Tao payload index cho cac key hay filter (neu chua co) de filtered search khong phai quet toan bo payload"""
+    existing_indexes = client.get_collection(COLLECTION_NAME).payload_schema or {}
+    for field_name, field_type in PAYLOAD_INDEXES.items():
+        if field_name in existing_indexes:
+            continue
+        client.create_payload_index(
+            collection_name=COLLECTION_NAME,
+            field_name=field_name,
+            field_schema=PayloadSchemaType(field_type),
+        )
+        logger.info(f"Created {field_type} payload index on '{field_name}'")
     
\ No newline at end of file
@@ -1,39 +1,218 @@
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator
+
 from qdrant_client import QdrantClient
+from qdrant_client.models import PointIdsList
 
+from core.metrics import QDRANT_RETRIES
 from core.settings_loader import load_settings
 from vectorstore.qdrant import get_qdrant_client, ensure_collection
-from vectorstore.hybrid_index import build_hybrid_qdrant_points, init_sparse_embedder
+from vectorstore.hybrid_index import build_dense_qdrant_points, build_sparse_point_vectors, init_sparse_embedder
+from embedding.batch_embed import BATCH_SIZE
 from embedding.sparse_embedder import SparseEmbedder
+from scoring.bm25 import BM25
+from scoring.bm25_snapshot import load_sparse_embedder, save_bm25_snapshot, sparse_vectors_match
 
 settings = load_settings()
 logger = logging.getLogger("vector_database")
 
 QDRANT_CONFIG = settings["vector_database"]
 COLLECTION_NAME = QDRANT_CONFIG["collection_name"]
+UPLOAD_PARALLELISM = QDRANT_CONFIG.get("upload_parallelism", 2) # so thread upload dong thoi
+UPLOAD_MAX_RETRIES = QDRANT_CONFIG.get("upload_max_retries", 3)
+UPLOAD_RETRY_BACKOFF_SECONDS = QDRANT_CONFIG.get("upload_retry_backoff_seconds", 1.0) # nhan doi sau moi lan retry
+UPLOAD_WAIT = QDRANT_CONFIG.get("upload_wait", False) # False: Qdrant tra ve ngay khi nhan batch, khong cho index xong
+SCROLL_BATCH_SIZE = 1000
+SPARSE_UPDATE_BATCH_SIZE = 256
 
-def upsert_chunks(chunks: list[dict]):
-    if not chunks:
-        logger.warning("No chunks provided to build Qdrant points.")
-        return []
+def existing_point_ids(client: QdrantClient) -> set[str]:
+    """Id cua toan bo point trong collection (khong lay payload / vector)"""
+    point_ids = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=SCROLL_BATCH_SIZE,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        point_ids.update(str(point.id) for point in points)
+        if offset is None:
+            return point_ids
+
+def _with_retry(description: str, func: Callable, **kwargs):
+    """Goi Qdrant, loi thi retry voi exponential backoff, het UPLOAD_MAX_RETRIES thi raise"""
+    for attempt in range(UPLOAD_MAX_RETRIES + 1):
+        try:
+            return func(**kwargs)
+        except Exception as e:
+            if attempt == UPLOAD_MAX_RETRIES:
+                logger.error(f"{description} failed after {attempt + 1} attempts: {e}")
+                raise
+            delay = UPLOAD_RETRY_BACKOFF_SECONDS * 2 ** attempt
+            QDRANT_RETRIES.inc(operation=getattr(func, "__name__", "unknown"))
+            logger.warning(f"{description} failed (attempt {attempt + 1}/{UPLOAD_MAX_RETRIES + 1}): {e}. Retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def _run_job(job: Callable[[], None], size: int) -> int:
+    job()
+    return size
+
+def run_upload_jobs(jobs: Iterator[tuple[int, Callable[[], None]]], total: int | None, label: str) -> int:
+    """
+    Chay cac job upload (so point, ham gui batch) tren UPLOAD_PARALLELISM thread.
+    jobs duoc tao lazy (vd. embed batch tiep theo) va chi giu toi da 2 * UPLOAD_PARALLELISM batch dang cho upload,
+    nen bo nho khong tang theo kich thuoc corpus va embedding chay song song voi upload.
+    """
+    done = 0
+    start = time.perf_counter()
+    pending = set()
+
+    def collect(futures):
+        nonlocal done
+        for future in futures:
+            done += future.result() # raise loi cua batch da het retry
+        elapsed = time.perf_counter() - start
+        logger.info(f"{label}: {done}/{total or '?'} points ({done / elapsed if elapsed else 0.0:.1f} points/s)")
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_PARALLELISM, thread_name_prefix="qdrant-upload") as executor:
+        for size, job in jobs:
+            pending.add(executor.submit(_run_job, job, size))
+            if len(pending) >= 2 * UPLOAD_PARALLELISM:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(pending)
+    return done
+
+class _ChunkStream:
+    """
+    Doc cac dot chunk (vd. ket qua cua tung chunker), giu lai toan bo chunk (sparse fit + BM25 can ca corpus)
+    va tao job upsert dense point cho chunk chua co trong collection ngay khi du 1 batch embedding.
+    """
+
+    def __init__(self, client: QdrantClient, chunk_batches: Iterable[list[dict]], existing_ids: set[str]):
+        self.client = client
+        self.chunk_batches = chunk_batches
+        self.existing_ids = existing_ids
+        self.chunks: dict[str, dict] = {} # chunk_id -> chunk, chunk trung noi dung (cung chunk_id) chi giu 1
+        self.new_chunks = 0
+        self.embedding_seconds = 0.0
+
+    def _upload_job(self, chunks: list[dict], number: int) -> tuple[int, Callable[[], None]]:
+        start = time.perf_counter()
+        points = build_dense_qdrant_points(chunks)
+        self.embedding_seconds += time.perf_counter() - start
+        return len(points), lambda: _with_retry(
+            f"Upsert batch {number}", self.client.upsert, collection_name=COLLECTION_NAME, points=points, wait=UPLOAD_WAIT,
+        )
+
+    def upload_jobs(self) -> Iterator[tuple[int, Callable[[], None]]]:
+        pending: list[dict] = []
+        number = 0
+        for batch in self.chunk_batches:
+            if any("chunk_id" not in chunk.get("metadata", {}) for chunk in batch):
+                raise ValueError("Chunks need a deterministic metadata.chunk_id, call ingestion.helpers.make_metadata.assign_chunk_ids first")
+            for chunk in batch:
+                chunk_id = chunk["metadata"]["chunk_id"]
+                if chunk_id in self.chunks:
+                    continue
+                self.chunks[chunk_id] = chunk
+                if chunk_id not in self.existing_ids: # chunk_id chua content hash nen id moi = chunk moi hoac da thay doi
+                    pending.append(chunk)
+                    self.new_chunks += 1
+            while len(pending) >= BATCH_SIZE:
+                number += 1
+                yield self._upload_job(pending[:BATCH_SIZE], number)
+                pending = pending[BATCH_SIZE:]
+        if pending:
+            yield self._upload_job(pending, number + 1)
+
+def _sparse_update_jobs(client: QdrantClient, chunks: list[dict], version: str) -> Iterator[tuple[int, Callable[[], None]]]:
+    for start in range(0, len(chunks), SPARSE_UPDATE_BATCH_SIZE):
+        batch = chunks[start:start + SPARSE_UPDATE_BATCH_SIZE]
+        point_vectors = build_sparse_point_vectors(batch)
+        point_ids = [chunk["metadata"]["chunk_id"] for chunk in batch]
+
+        def job(point_vectors=point_vectors, point_ids=point_ids, number=start // SPARSE_UPDATE_BATCH_SIZE + 1):
+            _with_retry(f"Sparse update batch {number}", client.update_vectors, collection_name=COLLECTION_NAME, points=point_vectors, wait=UPLOAD_WAIT)
+            _with_retry(
+                f"Sparse version batch {number}", client.set_payload,
+                collection_name=COLLECTION_NAME, payload={"sparse_model_version": version}, points=point_ids, wait=UPLOAD_WAIT,
+            )
+        yield len(batch), job
+
+def sync_chunk_stream(chunk_batches: Iterable[list[dict]]) -> dict:
+    """
+    Dong bo collection voi cac chunk den theo tung dot (chunk_id co dinh theo noi dung, xem ingestion.helpers.make_metadata):
+        1. chunk moi / da thay doi duoc embed + upsert (dense) ngay khi den, song song voi buoc tao chunk
+        2. khi da co du corpus: xoa point khong con trong du lieu nguon, fit sparse model (idf can ca corpus)
+           va ghi sparse vector cho moi point, ghi snapshot BM25
+    Tra ve so point upserted / deleted / unchanged.
+    """
+    stats = {"upserted": 0, "deleted": 0, "unchanged": 0}
+    start = time.perf_counter()
     
     client: QdrantClient = get_qdrant_client()
     ensure_collection(client)
+    existing_ids = existing_point_ids(client)
+    
+    stream = _ChunkStream(client, chunk_batches, existing_ids)
+    upload_start = time.perf_counter()
+    stats["upserted"] = run_upload_jobs(stream.upload_jobs(), None, "Upserting dense points")
+    upload_seconds = time.perf_counter() - upload_start
+    
+    chunks = list(stream.chunks.values())
+    if not chunks:
+        logger.warning("No chunks provided to build Qdrant points.")
+        return stats
+    
+    vanished_ids = sorted(existing_ids - stream.chunks.keys())
+    stats["unchanged"] = len(chunks) - stream.new_chunks
+    logger.info(f"Ingestion diff: {stream.new_chunks} new/changed, {len(vanished_ids)} vanished, {stats['unchanged']} unchanged chunks.")
+    
+    persisted_sparse_embedder = load_sparse_embedder()
+    if not stream.new_chunks and not vanished_ids and persisted_sparse_embedder is not None \
+            and sparse_vectors_match(client, persisted_sparse_embedder.version):
+        logger.info(f"Collection '{COLLECTION_NAME}' is up to date, nothing to embed.")
+        return stats
     
-    # Fit sparse embedder with corpus
-    logger.info("Fitting sparse embedder with corpus...")
+    if vanished_ids:
+        _with_retry(
+            "Delete vanished points",
+            client.delete,
+            collection_name=COLLECTION_NAME,
+            points_selector=PointIdsList(points=vanished_ids),
+            wait=UPLOAD_WAIT,
+        )
+        stats["deleted"] = len(vanished_ids)
+        logger.info(f"Deleted {len(vanished_ids)} vanished points from collection '{COLLECTION_NAME}'.")
+    
+    # Corpus thay doi -> idf thay doi: fit lai sparse embedder tren toan corpus, ghi lai sparse vector cho moi point
+    sparse_start = time.perf_counter()
     texts = [chunk["text"] for chunk in chunks]
     sparse_embedder = SparseEmbedder()
     sparse_embedder.fit(texts)
     init_sparse_embedder(sparse_embedder)
-    logger.info(f"Sparse embedder fitted with vocabulary size: {len(sparse_embedder.vocabulary)}")
-    
-    # Build hybrid points
-    points = build_hybrid_qdrant_points(chunks)
+    run_upload_jobs(_sparse_update_jobs(client, chunks, sparse_embedder.version), len(chunks), "Writing sparse vectors")
     
-    if not points:
-        logger.warning("No points were built from the provided chunks.")
-        return []
+    # Ghi snapshot BM25 de API start bang mmap thay vi scroll + fit lai toan bo collection
+    bm25 = BM25(sparse_embedder, k1=1.5, b=0.75)
+    bm25.build_index(texts, [chunk["metadata"]["chunk_id"] for chunk in chunks])
+    save_bm25_snapshot(bm25, texts)
+    sparse_seconds = time.perf_counter() - sparse_start
     
-    client.upsert(collection_name=COLLECTION_NAME, points=points)
-    logger.info(f"Upserted {len(points)} hybrid points into collection '{COLLECTION_NAME}'.")
\ No newline at end of file
+    total_seconds = time.perf_counter() - start
+    logger.info(
+        f"Ingestion stages: embedding {stream.new_chunks} chunks in {stream.embedding_seconds:.2f}s "
+        f"({stream.new_chunks / stream.embedding_seconds if stream.embedding_seconds else 0.0:.1f} chunks/s), "
+        f"chunk stream + dense upload {upload_seconds:.2f}s, sparse model + {len(chunks)} sparse vectors + snapshot {sparse_seconds:.2f}s, "
+        f"total {total_seconds:.2f}s"
+    )
+    return stats
+
+def upsert_chunks(chunks: list[dict]) -> dict:
+    """Dong bo collection voi danh sach chunk da co san (xem sync_chunk_stream)"""
+    return sync_chunk_stream([chunks])